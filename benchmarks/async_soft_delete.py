@@ -0,0 +1,70 @@
+"""
+Concurrent soft deletes and restores from async code: thread-wrapped sync calls vs the async API.
+Each task soft deletes (and restores) its own rows in throttled batches: sync_to_async runs the sync calls
+one at a time in the same thread, sleeps included, while the async API sleeps in the event loop.
+
+    $ python benchmarks/async_soft_delete.py [--tasks 10] [--rows 500] [--batch-size 100] [--sleep 0.01]
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from asgiref.sync import sync_to_async  # noqa: E402
+from django.core.management import call_command  # noqa: E402
+
+from tests.models import Foo  # noqa: E402
+
+
+def setup(tasks: int, rows: int):
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    Foo.objects_with_deleted.all().delete(hard=True)
+    Foo.objects.bulk_create([Foo(name='task-%d' % task) for task in range(tasks) for _ in range(rows)])
+
+
+async def thread_wrapped(task: int, batch_size: int, sleep: float):
+    queryset = Foo.objects_with_deleted.filter(name='task-%d' % task)
+    await sync_to_async(queryset.delete)(batch_size=batch_size, sleep=sleep)
+    await sync_to_async(queryset.restore)(batch_size=batch_size, sleep=sleep)
+
+
+async def native(task: int, batch_size: int, sleep: float):
+    queryset = Foo.objects_with_deleted.filter(name='task-%d' % task)
+    await queryset.adelete(batch_size=batch_size, sleep=sleep)
+    await queryset.arestore(batch_size=batch_size, sleep=sleep)
+
+
+async def run(function, tasks: int, batch_size: int, sleep: float) -> float:
+    started = time.perf_counter()
+    await asyncio.gather(*(function(task, batch_size, sleep) for task in range(tasks)))
+
+    return time.perf_counter() - started
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--tasks', type=int, default=10)
+    parser.add_argument('--rows', type=int, default=500)
+    parser.add_argument('--batch-size', type=int, default=100)
+    parser.add_argument('--sleep', type=float, default=0.01)
+    args = parser.parse_args()
+
+    setup(args.tasks, args.rows)
+
+    for name, function in (('sync_to_async(delete/restore)', thread_wrapped), ('adelete/arestore', native)):
+        seconds = asyncio.run(run(function, args.tasks, args.batch_size, args.sleep))
+        rows = 2 * args.tasks * args.rows
+
+        print('%-30s %7.3fs %10.0f rows/s' % (name, seconds, rows / seconds))
+
+
+if __name__ == '__main__':
+    main()
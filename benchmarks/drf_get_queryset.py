@@ -0,0 +1,63 @@
+"""
+Cost of get_queryset() for views with and without the soft delete mixins (no database queries involved).
+
+    $ python benchmarks/drf_get_queryset.py [--number 100000]
+"""
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'tests.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from rest_framework.generics import GenericAPIView  # noqa: E402
+from rest_framework.request import Request  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+import timestamps.drf.mixins  # noqa: E402,F401
+from tests.models import Foo  # noqa: E402
+from tests.viewsets import FooViewSet  # noqa: E402
+
+
+class PlainView(GenericAPIView):
+    queryset = Foo.objects.all()
+
+
+def make_view(view_class, action, path='/foos/'):
+    view = view_class()
+    view.action = action
+    view.request = Request(APIRequestFactory().delete(path))
+    view.format_kwarg = None
+
+    return view
+
+
+CASES = [
+    ('plain GenericAPIView', lambda: make_view(PlainView, None)),
+    ('ModelViewSet list', lambda: make_view(FooViewSet, 'list')),
+    ('ModelViewSet list_deleted', lambda: make_view(FooViewSet, 'list_deleted')),
+    ('ModelViewSet list_with_deleted', lambda: make_view(FooViewSet, 'list_with_deleted')),
+    ('ModelViewSet destroy ?permanent=1', lambda: make_view(FooViewSet, 'destroy', '/foos/1/?permanent=1')),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--number', type=int, default=100000)
+    args = parser.parse_args()
+
+    for name, factory in CASES:
+        # a new view per call, as in a request
+        seconds = min(timeit.repeat(lambda: factory().get_queryset(), number=args.number, repeat=3))
+        baseline = min(timeit.repeat(factory, number=args.number, repeat=3))
+
+        print('%-36s %8.2f us/call' % (name, (seconds - baseline) / args.number * 1e6))
+
+
+if __name__ == '__main__':
+    main()
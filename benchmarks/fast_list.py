@@ -0,0 +1,97 @@
+"""
+Per row cost of the DRF listings: model instances and field by field serialization (the default)
+vs values() with column by column conversion and FastJSONRenderer (ModelViewSet.fast_list = True).
+The time includes the query, the serialization and the rendering of one page.
+
+    $ python benchmarks/fast_list.py [--rows 10000] [--page-size 1000] [--repeat 20]
+"""
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from rest_framework.test import APIRequestFactory  # noqa: E402
+
+from timestamps.drf import renderers  # noqa: E402
+from timestamps.drf.pagination import WithDeletedPagination  # noqa: E402
+from tests.models import Foo  # noqa: E402
+from tests.viewsets import FooViewSet  # noqa: E402
+
+
+def setup(rows: int):
+    call_command('migrate', run_syncdb=True, verbosity=0)
+    Foo.objects_with_deleted.all().delete(hard=True)
+    Foo.objects.bulk_create([Foo(name='foo %d' % i) for i in range(rows)], batch_size=5000)
+
+
+def view(page_size: int, fast: bool):
+    class Pagination(WithDeletedPagination):
+        pass
+
+    Pagination.page_size = page_size
+
+    class View(FooViewSet):
+        fast_list = fast
+        with_deleted_pagination_class = Pagination
+
+    return View.as_view({'get': 'list_with_deleted'})
+
+
+def measure(function, repeat: int) -> float:
+    timings = []
+
+    for _ in range(repeat + 1):
+        started = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - started)
+
+    # the first call warms up the imports and caches; the median is steadier than the best run
+    return statistics.median(timings[1:])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=10000)
+    parser.add_argument('--page-size', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    setup(args.rows)
+    orjson = renderers.orjson
+    request = APIRequestFactory().get('/foos/with-deleted/')
+
+    # the same query, without serializing: what's left is the per row cost of each path
+    query = Foo.objects_with_deleted.order_by('-updated_at', '-pk').values_list('pk')[:args.page_size + 1]
+    seconds = measure(lambda: list(query.all()), args.repeat)
+    print('%-28s %8.2f ms/page' % ('query only', seconds * 1e3))
+
+    cases = [
+        ('instances + serializer', False, orjson),
+        ('values() + columns, json', True, None),
+        ('values() + columns, orjson', True, orjson),
+    ]
+
+    for name, fast, encoder in cases:
+        if fast and encoder is orjson and orjson is None:
+            continue
+
+        renderers.orjson = encoder
+        handler = view(args.page_size, fast)
+        seconds = measure(lambda: handler(request).render(), args.repeat)
+
+        print('%-28s %8.2f ms/page %7.2f us/row' % (name, seconds * 1e3, seconds / args.page_size * 1e6))
+
+    renderers.orjson = orjson
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,16 @@
+import os
+import tempfile
+
+from tests.settings import *  # noqa: F401,F403
+
+
+# a file, so every thread (and sync_to_async) sees the same database
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.path.join(tempfile.gettempdir(), 'timestamps-benchmarks.sqlite3'),
+    }
+}
+
+# the DRF endpoints are called with django's test client
+ALLOWED_HOSTS = ['testserver']
@@ -0,0 +1,249 @@
+"""
+Benchmark suite of the soft delete querysets, managers, instances and DRF endpoints.
+
+Seeds Foo (10% soft deleted) and Bar rows on SQLite for each size, and measures for each operation
+the latency (min and median of the repeats), the number of queries and the peak memory allocated (tracemalloc).
+Every operation runs in a transaction that is rolled back, so all the repeats see the same rows.
+Rows are seeded once per size, so 1M rows take a few minutes.
+
+    $ python benchmarks/suite.py --sizes 10000,100000,1000000 --output benchmarks/results/$(git rev-parse --short HEAD).json
+    $ python benchmarks/suite.py --sizes 10000 --compare benchmarks/results/<before>.json  # exits with 1 on regressions
+"""
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from unittest import mock
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'benchmarks.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.management import call_command  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+from django.test.utils import CaptureQueriesContext  # noqa: E402
+from django.utils import timezone  # noqa: E402
+from rest_framework.test import APIClient  # noqa: E402
+
+from timestamps.drf.pagination import DeletedPagination  # noqa: E402
+from tests.models import Foo, Bar  # noqa: E402
+
+
+SEED_BATCH_SIZE = 10000
+
+
+def seed(size: int):
+    """Foo rows (1 in 10 soft deleted) and a Bar for 1 in 10 live Foo rows."""
+    with connection.cursor() as cursor:
+        cursor.execute('DELETE FROM %s' % Bar._meta.db_table)
+        cursor.execute('DELETE FROM %s' % Foo._meta.db_table)
+
+    now = timezone.now()
+
+    for start in range(0, size, SEED_BATCH_SIZE):
+        foos, bars = [], []
+
+        for i in range(start, min(start + SEED_BATCH_SIZE, size)):
+            deleted_at = now - timedelta(minutes=i) if i % 10 == 0 else None
+            foo = Foo(id=uuid.UUID(int=i + 1), name='foo %d' % i, deleted_at=deleted_at)
+            foos.append(foo)
+
+            if i % 10 == 1:
+                bars.append(Bar(id=uuid.UUID(int=i + 1), name='bar %d' % i, foo=foo))
+
+        Foo.objects.bulk_create(foos)
+        Bar.objects.bulk_create(bars)
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+
+
+def _some_live_foos(count: int) -> list:
+    return list(Foo.objects.filter(bar__isnull=True).order_by('pk')[:count])
+
+
+def _json_delete(client, url, data):
+    return client.delete(url, data=json.dumps(data), content_type='application/json')
+
+
+# name: (setup, operation): setup runs outside of the measure, and returns the arguments of the operation
+OPERATIONS = {
+    'manager.objects.count': (lambda: (), lambda: Foo.objects.count()),
+    'manager.objects_deleted.count': (lambda: (), lambda: Foo.objects_deleted.count()),
+    'manager.objects.first_page': (lambda: (), lambda: list(Foo.objects.order_by('-updated_at')[:100])),
+    'queryset.delete': (lambda: (), lambda: Foo.objects.delete()),
+    'queryset.delete.cascade': (lambda: (), lambda: Foo.objects.delete(cascade=True)),
+    'queryset.delete.batches': (lambda: (), lambda: Foo.objects.delete(batch_size=10000)),
+    'queryset.restore': (lambda: (), lambda: Foo.objects_deleted.restore()),
+    'queryset.hard_delete': (lambda: (), lambda: Foo.objects_deleted.hard_delete()),
+    'instance.delete x100': (
+        lambda: (_some_live_foos(100),),
+        lambda foos: [foo.delete() for foo in foos],
+    ),
+    'drf.list_deleted.first_page': (
+        lambda: (APIClient(),),
+        lambda client: client.get('/foos/deleted/'),
+    ),
+    'drf.bulk_destroy': (
+        lambda: (APIClient(),),
+        lambda client: client.delete('/foos/'),
+    ),
+    'drf.bulk_destroy.pks x1000': (
+        lambda: (APIClient(), [str(foo.pk) for foo in _some_live_foos(1000)]),
+        lambda client, pks: _json_delete(client, '/foos/', {'pks': pks}),
+    ),
+}
+
+
+def _run(setup, operation, trace: bool = False):
+    with transaction.atomic():
+        args = setup()
+
+        with CaptureQueriesContext(connection) as captured:
+            if trace:
+                tracemalloc.start()
+
+            started = time.perf_counter()
+            operation(*args)
+            latency = time.perf_counter() - started
+
+            if trace:
+                peak = tracemalloc.get_traced_memory()[1]
+                tracemalloc.stop()
+
+        transaction.set_rollback(True)
+
+    queries = [
+        query for query in captured.captured_queries
+        if not query['sql'].startswith(('SAVEPOINT', 'RELEASE SAVEPOINT'))
+    ]
+
+    return latency, len(queries), peak if trace else None
+
+
+def measure(setup, operation, repeat: int) -> dict:
+    # warms up the imports, url resolvers and caches
+    _run(setup, operation)
+
+    latencies = [_run(setup, operation)[0] for _ in range(repeat)]
+
+    # tracemalloc slows the operation down: memory is measured on its own run
+    _, queries, peak = _run(setup, operation, trace=True)
+
+    return {
+        'latency_min': min(latencies),
+        'latency_median': statistics.median(latencies),
+        'queries': queries,
+        'peak_memory_kb': peak / 1024,
+    }
+
+
+def _git_commit() -> str:
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(sizes: list, repeat: int, operations: list) -> dict:
+    call_command('migrate', run_syncdb=True, verbosity=0)
+
+    results = []
+
+    # first page of the deleted listing, not the whole table
+    with mock.patch.object(DeletedPagination, 'page_size', 100):
+        for size in sizes:
+            seed(size)
+
+            for name in operations:
+                setup, operation = OPERATIONS[name]
+                result = {'size': size, 'operation': name, **measure(setup, operation, repeat)}
+                results.append(result)
+
+                print('%9d  %-32s %10.4fs %6d queries %12.0f KB' % (
+                    size, name, result['latency_median'], result['queries'], result['peak_memory_kb'],
+                ))
+
+    return {
+        'meta': {
+            'commit': _git_commit(),
+            'date': timezone.now().isoformat(),
+            'python': platform.python_version(),
+            'django': django.get_version(),
+            'sqlite': sqlite3.sqlite_version,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> list:
+    """Operations slower (min latency), with more queries or more memory than the baseline."""
+    before = {(result['size'], result['operation']): result for result in baseline['results']}
+    regressions = []
+
+    for result in report['results']:
+        old = before.get((result['size'], result['operation']))
+
+        if old is None:
+            continue
+
+        ratio = result['latency_min'] / old['latency_min'] if old['latency_min'] else 1
+        memory = result['peak_memory_kb'] / old['peak_memory_kb'] if old['peak_memory_kb'] else 1
+        worse = ratio > threshold or memory > threshold or result['queries'] > old['queries']
+
+        print('%9d  %-32s latency x%.2f  queries %d -> %d  memory x%.2f%s' % (
+            result['size'], result['operation'], ratio, old['queries'], result['queries'], memory,
+            '  REGRESSION' if worse else '',
+        ))
+
+        if worse:
+            regressions.append(result)
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='10000,100000,1000000', help='Comma separated numbers of Foo rows.')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--operations', help='Comma separated operations. Default: all of them.')
+    parser.add_argument('--output', help='JSON file to write the results to.')
+    parser.add_argument('--compare', help='JSON file of a previous run to compare the results with.')
+    parser.add_argument('--threshold', type=float, default=1.2, help='Ratio over the baseline reported as a regression.')
+    args = parser.parse_args()
+
+    operations = args.operations.split(',') if args.operations else list(OPERATIONS)
+    unknown = set(operations) - set(OPERATIONS)
+
+    if unknown:
+        parser.error('unknown operations: %s' % ', '.join(sorted(unknown)))
+
+    report = run([int(size) for size in args.sizes.split(',')], args.repeat, operations)
+
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(report, json.load(f), args.threshold)
+
+        sys.exit(1 if regressions else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -15,8 +15,52 @@ class Foo(Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
 
+    class Meta:
+        soft_delete_counters = True
+        soft_delete_cache = True
+
 
 class Bar(Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
     name = models.CharField(max_length=255)
     foo = models.ForeignKey(Foo, on_delete=models.CASCADE)
+
+    class Meta:
+        soft_delete_indexes = ['foo']
+        soft_delete_index_deleted = True
+        soft_delete_unique = [('foo', 'name')]
+        timestamp_indexes = True
+        soft_delete_counters = True
+
+
+class Baz(Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255, unique=True)
+
+    class Meta:
+        soft_delete_archive = True
+        soft_delete_counters = True
+
+
+class Qux(Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255)
+    baz = models.ForeignKey(Baz, on_delete=models.CASCADE)
+
+    class Meta:
+        soft_delete_archive = True
+
+
+class Grault(Model):
+    # references a model in archive mode without being in archive mode
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255)
+    baz = models.ForeignKey(Baz, on_delete=models.CASCADE)
+
+
+class Quux(Model):
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    name = models.CharField(max_length=255)
+
+    class Meta:
+        soft_delete_audit = True
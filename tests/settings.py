@@ -3,6 +3,7 @@ SECRET_KEY = '!fake'
 DEBUG = True
 
 INSTALLED_APPS = [
+    'django.contrib.admin',
     'django.contrib.auth',
     'django.contrib.contenttypes',
     'django.contrib.sessions',
@@ -13,15 +14,41 @@ INSTALLED_APPS = [
     'rest_framework',
 
     'timestamps',
+    'timestamps.audit',
     'tests'
 ]
 
 ROOT_URLCONF = 'tests.urls'
 
+# what django.contrib.admin checks for (the admin bulk actions write LogEntry rows)
+MIDDLEWARE = [
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+]
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-    }
+    },
+    # a second database, standing for a read replica (see TIMESTAMPS__REPLICA_DATABASE)
+    'replica': {
+        'ENGINE': 'django.db.backends.sqlite3',
+    },
 }
 
 TIME_ZONE = 'UTC'
@@ -30,4 +57,6 @@ USE_L10N = True
 USE_TZ = True
 
 TIMESTAMPS__BULK_HARD_DELETE = True
+# the tests flush the audit events themselves: no timer thread writing to the test database
+TIMESTAMPS__AUDIT_FLUSH_INTERVAL = None
 TIMESTAMPS__BULK_RESPONSE_CONTENT = True
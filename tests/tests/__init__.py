@@ -2,4 +2,25 @@ from .timestamps import *
 from .softdelete import *
 from .drf import *
 from .settings import *
-from .signals import *
\ No newline at end of file
+from .signals import *
+from .indexes import *
+from .cascade import *
+from .batches import *
+from .commands import *
+from .archive import *
+from .changes import *
+from .pagination import *
+from .ranges import *
+from .counters import *
+from .bulkpks import *
+from .asyncapi import *
+from .export import *
+from .metrics import *
+from .relations import *
+from .retrievecache import *
+from .conditional import *
+from .bulkupdates import *
+from .replica import *
+from .fastlist import *
+from .audit import *
+from .admin import *
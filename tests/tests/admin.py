@@ -0,0 +1,130 @@
+from django.contrib.admin import AdminSite
+from django.contrib.admin.models import CHANGE, DELETION, LogEntry
+from django.contrib.auth.models import User
+from django.contrib.messages.storage.cookie import CookieStorage
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase
+from timestamps.admin import SoftDeletesAdmin
+from tests.models import Baz, Foo, Quux
+
+
+class FooAdmin(SoftDeletesAdmin):
+    search_fields = ['name']
+
+
+class SoftDeletesAdminTestCase(TestCase):
+    fixtures = ['foos', 'bars']
+
+    def setUp(self):
+        cache.clear()
+        self.site = AdminSite()
+        self.admin = FooAdmin(Foo, self.site)
+        self.user = User.objects.create_superuser('admin', 'admin@example.com', 'admin')
+
+    def request(self, **params):
+        request = RequestFactory().get('/admin/tests/foo/', params)
+        request.user = self.user
+        request._messages = CookieStorage(request)
+        return request
+
+    def changelist(self, model_admin=None, **params):
+        return (model_admin or self.admin).get_changelist_instance(self.request(**params))
+
+    def test_rows_filter(self):
+        self.assertEqual(3, len(self.changelist().result_list))
+        self.assertEqual(1, len(self.changelist(rows='deleted').result_list))
+        self.assertEqual(4, len(self.changelist(rows='all').result_list))
+
+        # unknown values list the live rows
+        self.assertEqual(3, len(self.changelist(rows='nope').result_list))
+
+    def test_deleted_rows_can_be_opened(self):
+        foo = Foo.objects_deleted.first()
+        self.assertEqual(foo, self.admin.get_object(self.request(), str(foo.pk)))
+
+    def test_counts_from_the_counters(self):
+        Foo.objects.fast_count()
+        Foo.objects_deleted.fast_count()
+
+        with self.assertNumQueries(0):
+            self.assertEqual(3, self.changelist().result_count)
+            self.assertEqual(1, self.changelist(rows='deleted').result_count)
+            self.assertEqual(4, self.changelist(rows='all').result_count)
+
+        # searches are counted (then cached)
+        with self.assertNumQueries(1):
+            self.assertEqual(0, self.changelist(q='nothing like it').result_count)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(0, self.changelist(q='nothing like it').result_count)
+
+    def test_cached_counts(self):
+        model_admin = SoftDeletesAdmin(Quux, self.site)
+        Quux.objects.create(name='quux')
+
+        with self.assertNumQueries(1):
+            self.assertEqual(1, self.changelist(model_admin).result_count)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(1, self.changelist(model_admin).result_count)
+
+        model_admin.count_cache_timeout = None
+
+        with self.assertNumQueries(1):
+            self.assertEqual(1, self.changelist(model_admin).result_count)
+
+    def test_actions(self):
+        self.assertEqual(
+            ['soft_delete_selected', 'restore_selected', 'hard_delete_selected'],
+            list(self.admin.get_actions(self.request())),
+        )
+
+        request = self.request()
+        live = Foo.objects.all()[:2]
+
+        self.admin.soft_delete_selected(request, Foo.objects_with_deleted.filter(pk__in=[foo.pk for foo in live]))
+        self.assertEqual(1, Foo.objects.count())
+
+        # the live rows are kept
+        self.admin.hard_delete_selected(request, Foo.objects_with_deleted.all())
+        self.assertEqual(1, Foo.objects_with_deleted.count())
+
+        Foo.objects.delete()
+        self.admin.restore_selected(request, Foo.objects_with_deleted.all())
+        self.assertEqual(1, Foo.objects.count())
+
+        self.assertEqual(
+            ['Deleted 2 foos.', 'Permanently deleted 3 foos.', 'Restored 1 foo.'],
+            [str(message) for message in request._messages],
+        )
+
+    def test_actions_write_the_history(self):
+        request = self.request()
+        live = list(Foo.objects.order_by('pk')[:2])
+        deleted = Foo.objects_deleted.get()
+
+        # the selected live rows, their UPDATE and one INSERT of their LogEntry rows
+        with self.assertNumQueries(3):
+            self.admin.soft_delete_selected(request, Foo.objects_with_deleted.filter(pk__in=[live[0].pk, deleted.pk]))
+
+        self.admin.restore_selected(request, Foo.objects_with_deleted.filter(pk=live[0].pk))
+        self.admin.hard_delete_selected(request, Foo.objects_with_deleted.filter(pk__in=[live[1].pk, deleted.pk]))
+
+        entries = LogEntry.objects.order_by('pk')
+        self.assertEqual(
+            [
+                (str(live[0].pk), CHANGE, 'Soft deleted.'),
+                (str(live[0].pk), CHANGE, 'Restored.'),
+                (str(deleted.pk), DELETION, ''),
+            ],
+            [(entry.object_id, entry.action_flag, entry.change_message) for entry in entries],
+        )
+        self.assertTrue(all(entry.user_id == self.user.pk for entry in entries))
+        self.assertEqual(str(deleted), entries.last().object_repr)
+
+    def test_archive_mode(self):
+        model_admin = SoftDeletesAdmin(Baz, self.site)
+        changelist = self.changelist(model_admin, rows='deleted')
+
+        self.assertFalse(changelist.has_filters)
+        self.assertEqual(['soft_delete_selected'], list(model_admin.get_actions(self.request())))
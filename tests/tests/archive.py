@@ -0,0 +1,249 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection
+from django.db.models import ProtectedError
+from django.db.models.functions import Upper
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory
+from timestamps.drf.viewsets import ModelViewSet
+from timestamps import signals
+from timestamps.archive import archive_model
+from tests.models import Baz, Grault, Qux
+
+
+class ArchiveTestCase(TestCase):
+    def setUp(self):
+        self.BazArchive = archive_model(Baz)
+
+        self.baz = Baz.objects.create(name='baz')
+        self.other = Baz.objects.create(name='other')
+
+    def test_archive_model(self):
+        self.assertEqual('tests_baz_archive', self.BazArchive._meta.db_table)
+        self.assertEqual('tests', self.BazArchive._meta.app_label)
+        self.assertIs(Baz, self.BazArchive.archived_model)
+        self.assertFalse(self.BazArchive._meta.get_field('name').unique)
+
+        self.assertEqual(
+            [field.column for field in Baz._meta.concrete_fields],
+            [field.column for field in self.BazArchive._meta.concrete_fields],
+        )
+
+    def test_delete_moves_row_to_archive(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(self.baz.delete())
+
+        statements = [query['sql'].split()[0] for query in queries]
+        self.assertIn('INSERT', statements)
+        self.assertIn('DELETE', statements)
+
+        self.assertIsNotNone(self.baz.deleted_at)
+        self.assertFalse(Baz._base_manager.filter(pk=self.baz.pk).exists())
+
+        archived = Baz.objects_deleted.get(pk=self.baz.pk)
+        self.assertIsInstance(archived, self.BazArchive)
+        self.assertEqual('baz', archived.name)
+        self.assertEqual(self.baz.deleted_at, archived.deleted_at)
+
+        self.assertFalse(self.baz.delete())
+
+    def test_restore_moves_row_back(self):
+        self.baz.delete()
+
+        self.assertTrue(self.baz.restore())
+        self.assertFalse(self.baz.restore())
+
+        self.assertEqual(0, Baz.objects_deleted.count())
+        self.assertIsNone(Baz.objects.get(pk=self.baz.pk).deleted_at)
+
+    def test_restore_archived_instance(self):
+        self.baz.delete()
+
+        self.assertTrue(Baz.objects_deleted.get(pk=self.baz.pk).restore())
+        self.assertTrue(Baz.objects.filter(pk=self.baz.pk).exists())
+
+    def test_bulk_delete_and_restore(self):
+        received = []
+
+        def receiver(sender, pks, **kwargs):
+            received.append((sender, len(pks)))
+
+        signals.post_bulk_soft_delete.connect(receiver, sender=Baz)
+        self.addCleanup(signals.post_bulk_soft_delete.disconnect, receiver, sender=Baz)
+
+        self.assertEqual(2, Baz.objects.delete())
+        self.assertEqual(0, Baz.objects.count())
+        self.assertEqual(2, Baz.objects_deleted.count())
+        self.assertEqual([(Baz, 2)], received)
+
+        self.assertEqual(2, Baz.objects_deleted.restore())
+        self.assertEqual(2, Baz.objects.count())
+        self.assertEqual(0, Baz.objects_deleted.count())
+
+    def test_objects_with_deleted_reads_both_tables(self):
+        self.baz.delete()
+
+        rows = list(Baz.objects_with_deleted.order_by('name'))
+
+        self.assertEqual(['baz', 'other'], [row.name for row in rows])
+        self.assertTrue(all(isinstance(row, Baz) for row in rows))
+        self.assertIsNotNone(rows[0].deleted_at)
+        self.assertEqual(2, Baz.objects_with_deleted.count())
+
+    def test_objects_with_deleted_can_be_filtered(self):
+        self.baz.delete()
+
+        self.assertEqual(self.baz.pk, Baz.objects_with_deleted.get(name='baz').pk)
+        self.assertEqual(self.other.pk, Baz.objects_with_deleted.get(pk=self.other.pk).pk)
+
+        self.assertEqual(['other'], [row.name for row in Baz.objects_with_deleted.exclude(name='baz')])
+        self.assertEqual(
+            ['other', 'baz'],
+            [row.name for row in Baz.objects_with_deleted.order_by('-name').filter(name__in=['baz', 'other'])],
+        )
+
+        self.assertEqual(1, Baz.objects_with_deleted.all().only_deleted().count())
+
+        with self.assertRaises(Baz.DoesNotExist):
+            Baz.objects_with_deleted.get(name='nope')
+
+    def test_objects_with_deleted_restore(self):
+        self.baz.delete()
+
+        self.assertEqual(1, Baz.objects_with_deleted.restore())
+        self.assertEqual(2, Baz.objects.count())
+        self.assertEqual(0, Baz.objects_deleted.count())
+
+        self.baz.delete()
+        self.assertEqual(0, Baz.objects_with_deleted.filter(name='other').restore())
+        self.assertEqual(1, Baz.objects_with_deleted.filter(name='baz').restore())
+
+    def test_objects_with_deleted_update(self):
+        self.baz.delete()
+
+        # the live and the archived rows
+        self.assertEqual(2, Baz.objects_with_deleted.filter(name__in=['baz', 'other']).update(name=Upper('name')))
+
+        self.assertEqual('OTHER', Baz.objects.get().name)
+        self.assertEqual('BAZ', Baz.objects_deleted.get().name)
+
+        with self.assertRaises(TypeError):
+            Baz.objects_with_deleted.order_by('name')[:1].update(name='x')
+
+    def test_objects_with_deleted_delete(self):
+        self.baz.delete()
+
+        self.assertEqual(1, Baz.objects_with_deleted.delete())
+        self.assertEqual(0, Baz.objects.count())
+
+        self.assertEqual((2, {'tests.BazArchive': 2}), Baz.objects_with_deleted.delete(hard=True))
+        self.assertEqual(0, Baz.objects_with_deleted.count())
+
+    def test_drf_routes_of_deleted_objects_are_rejected(self):
+        class BazViewSet(ModelViewSet):
+            queryset = Baz.objects.all()
+            fields = ['name']
+
+        view = BazViewSet.as_view({'get': 'list_deleted'})
+
+        with self.assertRaises(ImproperlyConfigured):
+            view(APIRequestFactory().get('/bazs/deleted/'))
+
+    def test_unique_values_can_be_archived_many_times(self):
+        self.baz.delete()
+        Baz.objects.create(name='baz').delete()
+
+        self.assertEqual(2, Baz.objects_deleted.filter(name='baz').count())
+
+    def test_cascade(self):
+        Qux.objects.create(name='qux', baz=self.baz)
+        Qux.objects.create(name='qux', baz=self.other)
+
+        self.baz.delete(cascade=True)
+
+        self.assertEqual(1, Qux.objects.count())
+        self.assertEqual(1, Qux.objects_deleted.filter(baz_id=self.baz.pk).count())
+
+    def test_hard_delete_archived(self):
+        self.baz.delete()
+
+        count, per_model = Baz.objects_deleted.hard_delete()
+
+        self.assertEqual(1, count)
+        self.assertEqual(0, Baz.objects_deleted.count())
+
+
+class ArchiveReferencesTestCase(TransactionTestCase):
+    """
+    The foreign key constraints are checked on commit: TestCase never commits.
+    """
+    def setUp(self):
+        self.baz = Baz.objects.create(name='baz')
+        self.qux = Qux.objects.create(name='qux', baz=self.baz)
+
+    def test_rows_referenced_by_live_rows_are_protected(self):
+        with self.assertRaises(ProtectedError) as raised:
+            self.baz.delete()
+
+        self.assertEqual({self.qux}, raised.exception.protected_objects)
+
+        with self.assertRaises(ProtectedError):
+            Baz.objects.delete()
+
+        with self.assertRaises(ProtectedError):
+            Baz.objects.delete(batch_size=10)
+
+        self.assertIsNone(self.baz.deleted_at)
+        self.assertEqual(1, Baz.objects.count())
+        self.assertEqual(0, Baz.objects_deleted.count())
+
+    def test_cascade_moves_the_referencing_rows(self):
+        other = Baz.objects.create(name='other')
+        Qux.objects.create(name='qux', baz=other)
+
+        self.assertTrue(self.baz.delete(cascade=True))
+        self.assertEqual((2, {'tests.Baz': 1, 'tests.Qux': 1}), Baz.objects.delete(cascade=True))
+
+        self.assertEqual(0, Qux.objects.count())
+        self.assertEqual(2, Qux.objects_deleted.count())
+
+    def test_protected_error_hints(self):
+        with self.assertRaisesMessage(ProtectedError, 'cascade=True'):
+            self.baz.delete()
+
+        self.qux.delete()
+        Grault.objects.create(name='grault', baz=self.baz)
+
+        # the cascade doesn't move rows of models not in archive mode
+        with self.assertRaises(ProtectedError) as raised:
+            self.baz.delete(cascade=True)
+
+        self.assertNotIn('cascade=True', str(raised.exception))
+
+    def test_rows_whose_parent_is_archived_are_not_restored(self):
+        self.assertTrue(self.baz.delete(cascade=True))
+
+        qux = Qux.objects_deleted.get()
+
+        with self.assertRaises(ProtectedError) as raised:
+            qux.restore()
+
+        self.assertEqual({qux}, raised.exception.protected_objects)
+
+        with self.assertRaises(ProtectedError):
+            Qux.objects_deleted.restore()
+
+        self.assertEqual(0, Qux.objects.count())
+        self.assertEqual(1, Qux.objects_deleted.count())
+
+        # once the parent is restored
+        self.assertEqual(1, Baz.objects_deleted.restore())
+        self.assertEqual(1, Qux.objects_deleted.restore())
+        self.assertEqual(self.baz.pk, Qux.objects.get().baz_id)
+
+    def test_unreferenced_rows(self):
+        self.qux.delete()
+
+        self.assertTrue(self.baz.delete())
+        self.assertEqual(1, Baz.objects_deleted.count())
+
@@ -0,0 +1,80 @@
+from django.test import TestCase
+from timestamps.signals import post_restore, post_soft_delete, pre_soft_delete
+from tests.models import Foo, Bar, Baz
+
+
+class AsyncSoftDeletesTestCase(TestCase):
+    fixtures = ['foos', 'bars']
+
+    async def test_instance_delete_and_restore(self):
+        foo = await Foo.objects.afirst()
+        sent = []
+
+        def receiver(sender, instance, using, **kwargs):
+            sent.append((kwargs['signal'], instance.pk))
+
+        for signal in (pre_soft_delete, post_soft_delete, post_restore):
+            signal.connect(receiver, sender=Foo)
+            self.addCleanup(signal.disconnect, receiver, sender=Foo)
+
+        self.assertTrue(await foo.adelete())
+        self.assertFalse(await foo.asoft_delete())
+        self.assertIsNotNone(foo.deleted_at)
+        self.assertTrue(await Foo.objects_deleted.filter(pk=foo.pk).aexists())
+
+        self.assertTrue(await foo.arestore())
+        self.assertIsNone(foo.deleted_at)
+
+        self.assertEqual(
+            [(pre_soft_delete, foo.pk), (post_soft_delete, foo.pk), (pre_soft_delete, foo.pk), (post_restore, foo.pk)],
+            sent,
+        )
+
+    async def test_instance_hard_delete(self):
+        foo = await Foo.objects.afirst()
+        await foo.ahard_delete()
+
+        self.assertFalse(await Foo.objects_with_deleted.filter(pk=foo.pk).aexists())
+
+    async def test_instance_cascade(self):
+        bar = await Bar.objects.select_related('foo').afirst()
+
+        await bar.foo.adelete(cascade=True)
+
+        self.assertTrue(await Bar.objects_deleted.filter(pk=bar.pk).aexists())
+
+    async def test_bulk(self):
+        self.assertEqual(3, await Foo.objects.asoft_delete())
+        self.assertEqual(0, await Foo.objects.acount())
+
+        self.assertEqual(4, await Foo.objects_deleted.arestore())
+        self.assertEqual(4, await Foo.objects.acount())
+
+        count, _ = await Foo.objects.filter(name__startswith='Cum').ahard_delete()
+        self.assertEqual(1, count)
+
+    async def test_bulk_in_batches(self):
+        progress = []
+
+        async def report(count, total):
+            progress.append((count, total))
+
+        count = await Foo.objects.adelete(batch_size=2, sleep=0.001, progress=report)
+
+        self.assertEqual(3, count)
+        self.assertEqual([(2, 2), (1, 3)], progress)
+
+        self.assertEqual(4, await Foo.objects_deleted.arestore(batch_size=3, progress=lambda *args: None))
+
+        count, per_model = await Foo.objects_with_deleted.ahard_delete(batch_size=3)
+        self.assertEqual(0, await Foo.objects_with_deleted.acount())
+        self.assertEqual(4, per_model['tests.Foo'])
+
+    async def test_archive_mode(self):
+        baz = await Baz.objects.acreate(name='baz')
+
+        await baz.adelete()
+        archived = await Baz.objects_deleted.aget(pk=baz.pk)
+
+        self.assertTrue(await archived.arestore())
+        self.assertTrue(await Baz.objects.filter(pk=baz.pk).aexists())
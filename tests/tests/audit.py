@@ -0,0 +1,195 @@
+from unittest import mock
+from django.db import DatabaseError, transaction
+from django.contrib.auth.models import AnonymousUser, User
+from django.test import RequestFactory, TestCase, override_settings
+from django.utils.functional import SimpleLazyObject
+from timestamps import signals
+from timestamps.audit import receivers
+from timestamps.audit.middleware import AuditActorMiddleware
+from timestamps.audit.models import AuditEvent
+from timestamps.audit.writer import actor, writer
+from tests.models import Bar, Foo, Quux
+
+
+class AuditTestCase(TestCase):
+    def setUp(self):
+        writer.clear()
+        self.quuxes = Quux.objects.bulk_create([Quux(name='quux %d' % i) for i in range(5)])
+
+    def events(self):
+        writer.flush()
+        return list(AuditEvent.objects.order_by('id').values_list('action', 'model', 'count', 'actor'))
+
+    def test_instance_operations(self):
+        quux = self.quuxes[0]
+        pk = str(quux.pk)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            with actor('alice'):
+                quux.delete()
+                quux.restore()
+
+            quux.hard_delete()
+
+        self.assertEqual([
+            ('soft_delete', 'tests.Quux', 1, 'alice'),
+            ('restore', 'tests.Quux', 1, 'alice'),
+            ('hard_delete', 'tests.Quux', 1, ''),
+        ], self.events())
+
+        self.assertEqual([pk], AuditEvent.objects.first().pks)
+
+    @override_settings(TIMESTAMPS__BULK_SIGNALS_CHUNK_SIZE=2)
+    def test_bulk_operations_record_one_event_per_batch(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Quux.objects.delete()
+            Quux.objects_deleted.hard_delete()
+
+        # the chunks of a transaction are merged, and so are the rows of a hard delete
+        self.assertEqual([
+            ('soft_delete', 'tests.Quux', 5, ''),
+            ('hard_delete', 'tests.Quux', 5, ''),
+        ], self.events())
+
+        self.assertEqual(
+            sorted(str(quux.pk) for quux in self.quuxes),
+            sorted(AuditEvent.objects.get(action='soft_delete').pks),
+        )
+
+    @override_settings(TIMESTAMPS__AUDIT_MAX_PKS=2, TIMESTAMPS__BULK_SIGNALS_CHUNK_SIZE=1)
+    def test_events_are_split(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Quux.objects.delete()
+
+        self.assertEqual([2, 2, 1], [count for _, _, count, _ in self.events()])
+
+    def test_rollback_drops_the_events(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Quux.objects.delete()
+                    raise ValueError
+            except ValueError:
+                pass
+
+            self.quuxes[0].delete()
+
+        self.assertEqual([('soft_delete', 'tests.Quux', 1, '')], self.events())
+
+    def test_consecutive_events_are_merged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for quux in self.quuxes:
+                quux.delete()
+
+            self.quuxes[0].restore()
+
+        # buffered: nothing written yet
+        self.assertEqual(0, AuditEvent.objects.count())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(2, writer.flush())
+
+        self.assertEqual([5, 1], list(AuditEvent.objects.order_by('id').values_list('count', flat=True)))
+
+    @override_settings(TIMESTAMPS__AUDIT_BUFFER_SIZE=2)
+    def test_buffer_size(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            for quux in self.quuxes[:3]:
+                quux.delete()
+                quux.restore()
+
+        # the 6 events are written by pairs, without calling flush()
+        self.assertEqual(6, AuditEvent.objects.count())
+
+    def test_events_of_separate_transactions_are_not_merged(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    self.quuxes[0].delete()
+                    raise ValueError
+            except ValueError:
+                pass
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quuxes[1].delete()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quuxes[2].delete()
+
+        self.assertEqual([1, 1], [count for _, _, count, _ in self.events()])
+
+    @override_settings(TIMESTAMPS__AUDIT_BUFFER_SIZE=1)
+    def test_write_errors_are_logged_and_the_events_kept(self):
+        with mock.patch('django.db.models.query.QuerySet.bulk_create', side_effect=DatabaseError('down')):
+            with self.assertLogs('timestamps.audit', 'ERROR'):
+                # committed: the error isn't raised into the caller
+                with self.captureOnCommitCallbacks(execute=True):
+                    self.quuxes[0].delete()
+
+            self.assertEqual(0, AuditEvent.objects.count())
+
+            with self.assertRaises(DatabaseError):
+                writer.flush()
+
+        self.assertEqual([('soft_delete', 'tests.Quux', 1, '')], self.events())
+
+    def test_models_without_the_option(self):
+        Foo.objects.create(name='foo').delete()
+
+        self.assertEqual([], self.events())
+
+    def test_rows_soft_deleted_by_a_cascade(self):
+        # as if Bar had Meta.soft_delete_audit (connect_receivers() runs once, when the app is ready)
+        signals.post_bulk_soft_delete.connect(receivers._bulk_soft_deleted, sender=Bar)
+        self.addCleanup(signals.post_bulk_soft_delete.disconnect, receivers._bulk_soft_deleted, sender=Bar)
+
+        foo = Foo.objects.create(name='foo')
+        bars = Bar.objects.bulk_create([Bar(name='bar %d' % i, foo=foo) for i in range(3)])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            foo.delete(cascade=True)
+
+        self.assertEqual([('soft_delete', 'tests.Bar', 3, '')], self.events())
+        self.assertEqual(sorted(str(bar.pk) for bar in bars), sorted(AuditEvent.objects.get().pks))
+
+    def test_middleware_looks_the_user_up_when_recording(self):
+        loaded = []
+
+        def get_user():
+            loaded.append(True)
+            return AnonymousUser()
+
+        def view(request):
+            return None
+
+        request = RequestFactory().delete('/')
+        request.user = SimpleLazyObject(get_user)
+        AuditActorMiddleware(view)(request)
+
+        self.assertEqual([], loaded)
+
+        # a view authenticating the user itself (as DRF does, setting request.user)
+        user = User.objects.create(username='bob')
+
+        def authenticating_view(request):
+            request.user = user
+            self.quuxes[0].delete()
+
+        request = RequestFactory().delete('/')
+        request.user = SimpleLazyObject(get_user)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            AuditActorMiddleware(authenticating_view)(request)
+
+        self.assertEqual([], loaded)
+        self.assertEqual([('soft_delete', 'tests.Quux', 1, str(user.pk))], self.events())
+
+    def test_append_only(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.quuxes[0].delete()
+
+        writer.flush()
+        event = AuditEvent.objects.get()
+
+        with self.assertRaises(ValueError):
+            event.save()
@@ -0,0 +1,54 @@
+from unittest import mock
+from django.test import TestCase
+from tests.models import Foo, Bar
+
+
+class BatchesTestCase(TestCase):
+    def setUp(self):
+        Foo.objects.bulk_create([Foo(name='foo-%d' % i) for i in range(25)])
+
+    def test_soft_delete_in_batches(self):
+        progress = mock.Mock()
+
+        count = Foo.objects.delete(batch_size=10, progress=progress)
+
+        self.assertEqual(25, count)
+        self.assertEqual(0, Foo.objects.count())
+        self.assertEqual([mock.call(10, 10), mock.call(10, 20), mock.call(5, 25)], progress.call_args_list)
+
+    def test_soft_delete_in_batches_skips_deleted_rows(self):
+        Foo.objects.filter(pk__in=Foo.objects.values('pk')[:5]).delete()
+
+        self.assertEqual(20, Foo.objects_with_deleted.delete(batch_size=10))
+
+    def test_soft_delete_sleeps_between_batches(self):
+        with mock.patch('timestamps.querysets.time.sleep') as sleep:
+            Foo.objects.soft_delete(batch_size=10, sleep=0.5)
+
+        self.assertEqual([mock.call(0.5), mock.call(0.5)], sleep.call_args_list)
+
+    def test_restore_in_batches(self):
+        Foo.objects.delete()
+
+        progress = mock.Mock()
+
+        self.assertEqual(25, Foo.objects_deleted.restore(batch_size=20, progress=progress))
+        self.assertEqual(25, Foo.objects.count())
+        self.assertEqual(2, progress.call_count)
+
+    def test_hard_delete_in_batches(self):
+        count, per_model = Foo.objects.hard_delete(batch_size=10)
+
+        self.assertEqual(25, count)
+        self.assertEqual({'tests.Foo': 25}, per_model)
+        self.assertEqual(0, Foo.objects_with_deleted.count())
+
+    def test_cascade_in_batches(self):
+        for foo in Foo.objects.all()[:3]:
+            Bar.objects.create(name='bar', foo=foo)
+
+        count, per_model = Foo.objects.delete(cascade=True, batch_size=10)
+
+        self.assertEqual(28, count)
+        self.assertEqual({'tests.Foo': 25, 'tests.Bar': 3}, per_model)
+        self.assertEqual(0, Bar.objects.count())
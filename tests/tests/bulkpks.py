@@ -0,0 +1,73 @@
+import json
+from unittest import mock
+from django.test import TestCase
+from rest_framework import status
+from tests.models import Foo
+
+
+class BulkByPrimaryKeysTestCase(TestCase):
+    fixtures = ['foos']
+
+    active = ['32a6fab2-9e0f-4d23-9a3b-c642470e629d', '0133c730-ed24-445e-9a61-c4bd033cd32f']
+    deleted = '381b0e65-bc13-43de-b216-8673c18aa645'
+    unknown = '00000000-0000-0000-0000-000000000000'
+
+    def request(self, method, url, pks):
+        return getattr(self.client, method)(url, data=json.dumps({'pks': pks}), content_type='application/json')
+
+    def test_bulk_soft_delete(self):
+        response = self.request('delete', '/foos/', [*self.active, self.deleted, self.unknown])
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        data = response.json()
+        self.assertEqual(2, data['count'])
+        self.assertEqual([self.deleted, self.unknown], data['not_found'])
+
+        self.assertEqual(1, Foo.objects.count())
+        self.assertEqual(3, Foo.objects_deleted.count())
+
+    def test_bulk_hard_delete(self):
+        response = self.request('delete', '/foos/?permanent=1', [self.active[0], self.deleted])
+        data = response.json()
+
+        self.assertEqual(2, data['count'])
+        self.assertEqual({'tests.Foo': 2}, data['count_per_model'])
+        self.assertEqual([], data['not_found'])
+        self.assertEqual(2, Foo.objects_with_deleted.count())
+
+    def test_bulk_restore(self):
+        response = self.request('patch', '/foos/restore/', [self.deleted, self.active[0]])
+        data = response.json()
+
+        self.assertEqual(1, data['count'])
+        self.assertEqual([self.active[0]], data['not_found'])
+        self.assertEqual(4, Foo.objects.count())
+
+    @mock.patch('django.conf.settings.TIMESTAMPS__BULK_PKS_CHUNK_SIZE', 2, create=True)
+    def test_chunks(self):
+        pks = [*self.active, self.unknown]
+
+        with self.assertNumQueries(5):  # savepoint, select + update, select (nothing found), release
+            response = self.request('delete', '/foos/', pks)
+
+        self.assertEqual({'count': 2, 'chunks': [2, 0], 'not_found': [self.unknown]}, response.json())
+
+    def test_invalid_pks(self):
+        for pks in [[], 'abc', ['abc']]:
+            response = self.request('delete', '/foos/', pks)
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+        self.assertEqual(3, Foo.objects.count())
+
+    def test_bodies_without_pks(self):
+        # only a missing or empty body acts on the whole queryset
+        for body in [[1, 2], {'ids': self.active}, {'pks': None}]:
+            response = self.client.delete('/foos/', data=json.dumps(body), content_type='application/json')
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+            self.assertIn('pks', response.json())
+
+        self.assertEqual(3, Foo.objects.count())
+
+        response = self.client.delete('/foos/')
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertEqual(0, Foo.objects.count())
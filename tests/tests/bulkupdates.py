@@ -0,0 +1,89 @@
+from datetime import datetime, timezone as tz
+from django.test import TestCase
+from django.utils import timezone
+from tests.models import Foo, Baz
+
+
+# after the updated_at of the fixtures
+FIXTURES_UPDATED_AT = datetime(2021, 1, 2, tzinfo=tz.utc)
+
+
+class BulkUpdatedAtTestCase(TestCase):
+    fixtures = ['foos']
+
+    def assertUpdated(self, manager, count):
+        self.assertEqual(count, manager.filter(updated_at__gt=FIXTURES_UPDATED_AT).count())
+
+    def test_update(self):
+        with self.assertNumQueries(1):
+            Foo.objects.update(name='renamed')
+
+        self.assertUpdated(Foo.objects, 3)
+        self.assertUpdated(Foo.objects_deleted, 0)
+
+        # one statement: one value
+        self.assertEqual(1, len(set(Foo.objects.values_list('updated_at', flat=True))))
+
+    def test_explicit_updated_at_is_kept(self):
+        Foo.objects.update(updated_at=FIXTURES_UPDATED_AT)
+        self.assertUpdated(Foo.objects, 0)
+
+    def test_bulk_update(self):
+        foos = list(Foo.objects.all())
+
+        for foo in foos:
+            foo.name = foo.name.upper()
+
+        Foo.objects.bulk_update(foos, ['name'])
+        self.assertUpdated(Foo.objects, 3)
+
+    def test_touch(self):
+        before = timezone.now()
+        self.assertEqual(1, Foo.objects_deleted.touch())
+
+        self.assertUpdated(Foo.objects, 0)
+        self.assertGreaterEqual(Foo.objects_deleted.get().updated_at, before)
+
+    def test_timestamps_never_go_backwards(self):
+        foo = Foo.objects.create(name='foo')
+        stamps = [foo.updated_at]
+
+        for write in [
+            lambda: Foo.objects.filter(pk=foo.pk).update(name='renamed'),
+            lambda: Foo.objects.filter(pk=foo.pk).delete(),
+            lambda: Foo.objects_deleted.filter(pk=foo.pk).restore(),
+            lambda: Foo.objects.filter(pk=foo.pk).touch(),
+            lambda: foo.save(),
+            lambda: foo.delete(),
+            lambda: foo.restore(),
+        ]:
+            write()
+            foo.refresh_from_db()
+            stamps.append(foo.updated_at)
+
+        self.assertEqual(sorted(stamps), stamps)
+
+    def test_soft_deletes_set_updated_at_to_deleted_at(self):
+        Foo.objects.delete()
+
+        for foo in Foo.objects_deleted.all():
+            self.assertEqual(foo.deleted_at, foo.updated_at)
+
+    def test_soft_delete_and_restore(self):
+        Foo.objects.delete(batch_size=2)
+        self.assertUpdated(Foo.objects_deleted, 3)
+
+        Foo.objects_deleted.restore()
+        self.assertUpdated(Foo.objects, 4)
+
+    def test_archive_mode(self):
+        baz = Baz.objects.create(name='baz')
+        Baz.objects.update(updated_at=FIXTURES_UPDATED_AT)
+
+        Baz.objects.delete()
+        self.assertUpdated(Baz.objects_deleted, 1)
+
+        Baz.objects_deleted.update(updated_at=FIXTURES_UPDATED_AT)
+        Baz.objects_deleted.restore()
+        self.assertUpdated(Baz.objects, 1)
+        self.assertEqual(baz.pk, Baz.objects.get().pk)
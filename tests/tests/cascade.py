@@ -0,0 +1,87 @@
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from timestamps import signals
+from tests.models import Foo, Bar
+
+
+class CascadeSoftDeleteTestCase(TestCase):
+    def setUp(self):
+        self.foo = Foo.objects.create(name='foo')
+        self.other = Foo.objects.create(name='other')
+
+        Bar.objects.bulk_create([Bar(name='bar-%d' % i, foo=self.foo) for i in range(10)])
+        Bar.objects.create(name='bar', foo=self.other)
+
+    def test_instance_delete_does_not_cascade_by_default(self):
+        self.foo.delete()
+        self.assertEqual(11, Bar.objects.count())
+
+    def test_instance_delete_cascade(self):
+        self.foo.delete(cascade=True)
+
+        self.assertEqual(1, Bar.objects.count())
+        self.assertEqual(10, Bar.objects_deleted.filter(foo=self.foo).count())
+
+        # all the rows share the deletion stamp
+        self.assertEqual({self.foo.deleted_at}, set(Bar.objects_deleted.values_list('deleted_at', flat=True)))
+
+    def test_instance_soft_delete_cascade(self):
+        self.foo.soft_delete(cascade=True)
+        self.assertEqual(1, Bar.objects.count())
+
+    def test_queryset_delete_cascade(self):
+        with CaptureQueriesContext(connection) as queries:
+            count, per_model = Foo.objects.filter(pk=self.foo.pk).delete(cascade=True)
+
+        # one statement per table, no matter how many rows are related
+        statements = [query['sql'] for query in queries if not query['sql'].startswith(('SAVEPOINT', 'RELEASE'))]
+        self.assertEqual(2, len(statements))
+
+        self.assertEqual(11, count)
+        self.assertEqual({'tests.Foo': 1, 'tests.Bar': 10}, per_model)
+        self.assertEqual(1, Bar.objects.count())
+
+    def test_manager_delete_cascade(self):
+        count, per_model = Foo.objects.delete(cascade=True)
+
+        self.assertEqual({'tests.Foo': 2, 'tests.Bar': 11}, per_model)
+        self.assertEqual(0, Bar.objects.count())
+
+    def test_cascade_keeps_rows_deleted_before(self):
+        bar = Bar.objects.filter(foo=self.foo).first()
+        bar.delete()
+
+        self.foo.delete(cascade=True)
+        bar.refresh_from_db()
+
+        self.assertNotEqual(self.foo.deleted_at, bar.deleted_at)
+
+    def test_cascade_from_meta(self):
+        Foo._meta.soft_delete_cascade = True
+
+        try:
+            Foo.objects.filter(pk=self.foo.pk).delete()
+        finally:
+            del Foo._meta.soft_delete_cascade
+
+        self.assertEqual(1, Bar.objects.count())
+
+    def test_cascade_sends_the_bulk_signals_of_the_related_rows(self):
+        received = []
+
+        def receiver(signal, sender, pks, using, **kwargs):
+            received.append((signal, sender, set(pks)))
+
+        for signal in (signals.pre_bulk_soft_delete, signals.post_bulk_soft_delete):
+            signal.connect(receiver, sender=Bar)
+            self.addCleanup(signal.disconnect, receiver, sender=Bar)
+
+        self.foo.delete(cascade=True)
+
+        pks = set(Bar.objects_deleted.values_list('pk', flat=True))
+        self.assertEqual(10, len(pks))
+        self.assertEqual(
+            [(signals.pre_bulk_soft_delete, Bar, pks), (signals.post_bulk_soft_delete, Bar, pks)],
+            received,
+        )
@@ -0,0 +1,122 @@
+from datetime import datetime, timezone as tz
+from django.db import NotSupportedError
+from django.test import TestCase
+from rest_framework import status
+from tests.models import Bar, Baz, Foo
+
+
+class ChangedSinceTestCase(TestCase):
+    fixtures = ['foos']
+
+    def test_all_rows_changed_since_the_beginning(self):
+        rows = list(Foo.objects_with_deleted.changed_since(datetime(2020, 1, 1, tzinfo=tz.utc)))
+        self.assertEqual(4, len(rows))
+
+        # the deleted row changed last
+        self.assertEqual('381b0e65-bc13-43de-b216-8673c18aa645', str(rows[-1].pk))
+        self.assertEqual(rows[-1].deleted_at, rows[-1].updated_at)
+
+    def test_deleted_at_counts_as_a_change(self):
+        rows = list(Foo.objects_with_deleted.changed_since(datetime(2021, 1, 1, 12, tzinfo=tz.utc)))
+
+        self.assertEqual(1, len(rows))
+        self.assertIsNotNone(rows[0].deleted_at)
+
+    def test_updates_and_deletes_are_changes(self):
+        since = datetime(2021, 1, 2, tzinfo=tz.utc)
+        self.assertEqual(0, Foo.objects_with_deleted.changed_since(since).count())
+
+        updated = Foo.objects.create(name='updated')
+        deleted = Foo.objects.create(name='deleted')
+        deleted.delete()
+
+        rows = list(Foo.objects_with_deleted.changed_since(since))
+
+        self.assertEqual([updated.pk, deleted.pk], [row.pk for row in rows])
+        self.assertIsNone(rows[0].deleted_at)
+        self.assertIsNotNone(rows[1].deleted_at)
+
+    def test_cursor_resumes_after_the_last_row(self):
+        queryset = Foo.objects_with_deleted.changed_since()
+        seen = []
+        cursor = None
+
+        # rows with the same updated_at are split across pages by the primary key
+        while True:
+            rows = list(Foo.objects_with_deleted.changed_since(cursor=cursor)[:1])
+
+            if not rows:
+                break
+
+            seen.append(rows[0].pk)
+            cursor = queryset.changes_cursor(rows[0])
+
+        self.assertEqual([row.pk for row in queryset], seen)
+        self.assertEqual(4, len(set(seen)))
+
+    def test_keyset_scan_of_the_index(self):
+        names = {index.fields[0]: index.name for index in Bar._meta.indexes if index.name.endswith('_tsc')}
+        cursor = Bar.objects_with_deleted.all().changes_cursor(Bar(updated_at=datetime(2021, 1, 1, tzinfo=tz.utc)))
+        plan = Bar.objects_with_deleted.changed_since(cursor=cursor).explain()
+
+        self.assertIn(names['updated_at'], plan)
+        self.assertNotIn('TEMP B-TREE', plan)
+
+    def test_restores_are_changes(self):
+        since = datetime(2021, 1, 2, tzinfo=tz.utc)
+        foo = Foo.objects_deleted.get()
+        foo.restore()
+
+        self.assertEqual([foo.pk], [row.pk for row in Foo.objects_with_deleted.changed_since(since)])
+
+    def test_archive_mode_is_rejected(self):
+        with self.assertRaises(NotSupportedError):
+            Baz.objects_with_deleted.changed_since()
+
+    def test_invalid_cursor(self):
+        for cursor in ['abc', 'W10=', 'WyJhIiwgImIiXQ==']:
+            with self.assertRaises(ValueError):
+                Foo.objects_with_deleted.changed_since(cursor=cursor)
+
+
+class ChangesViewSetTestCase(TestCase):
+    fixtures = ['foos']
+
+    def test_changes_with_tombstones(self):
+        response = self.client.get('/foos/changes/', {'since': '2020-01-01T00:00:00Z'})
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+        data = response.json()
+        self.assertEqual(4, len(data['results']))
+        self.assertFalse(data['has_more'])
+        self.assertIsNotNone(data['cursor'])
+
+        tombstone = data['results'][-1]
+        self.assertEqual({'id', 'deleted_at'}, set(tombstone))
+        self.assertEqual('381b0e65-bc13-43de-b216-8673c18aa645', tombstone['id'])
+        self.assertIn('name', data['results'][0])
+
+    def test_changes_pages(self):
+        response = self.client.get('/foos/changes/', {'limit': 3})
+        data = response.json()
+
+        self.assertEqual(3, len(data['results']))
+        self.assertTrue(data['has_more'])
+
+        response = self.client.get('/foos/changes/', {'limit': 3, 'cursor': data['cursor']})
+        next_data = response.json()
+
+        self.assertEqual(1, len(next_data['results']))
+        self.assertFalse(next_data['has_more'])
+
+        # nothing changed since: the cursor is kept for the next poll
+        response = self.client.get('/foos/changes/', {'cursor': next_data['cursor']})
+        self.assertEqual({'results': [], 'cursor': next_data['cursor'], 'has_more': False}, response.json())
+
+    def test_changes_invalid_params(self):
+        for params in [{'since': 'abc'}, {'cursor': 'abc'}, {'limit': 0}, {'limit': 'abc'}]:
+            response = self.client.get('/foos/changes/', params)
+            self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
+
+            # errors keyed by the parameter, as the other validation errors
+            self.assertEqual(list(params), list(response.json()))
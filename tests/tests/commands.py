@@ -0,0 +1,82 @@
+from datetime import timedelta
+from io import StringIO
+from unittest import mock
+from django.core.management import call_command
+from django.test import TestCase
+from django.utils import timezone
+from timestamps.management.commands.purge_soft_deleted import purge
+from timestamps.querysets import SoftDeleteQuerySet
+from tests.models import Foo, Bar
+
+
+class PurgeSoftDeletedTestCase(TestCase):
+    fixtures = ['foos', 'bars']
+
+    def purge(self, *args, **kwargs):
+        out = StringIO()
+        call_command('purge_soft_deleted', 'tests', *args, stdout=out, **kwargs)
+        return out.getvalue()
+
+    def test_purge(self):
+        recent = Foo.objects.create(name='recent')
+        recent.delete()
+
+        output = self.purge(days=30)
+
+        self.assertEqual(0, Foo.objects_deleted.exclude(pk=recent.pk).count())
+        self.assertEqual(0, Bar.objects_deleted.count())
+        self.assertEqual(3, Foo.objects.count())
+        self.assertTrue(Foo.objects_deleted.filter(pk=recent.pk).exists())
+
+        # the deleted bar belongs to the deleted foo: purged as a related row
+        self.assertIn('tests.Foo: 1 rows purged (+1 related) in 1 batches', output)
+        self.assertIn('tests.Bar: 0 rows purged', output)
+        self.assertIn('2 rows purged', output)
+
+    def test_dry_run(self):
+        output = self.purge(days=30, dry_run=True)
+
+        self.assertEqual(1, Foo.objects_deleted.count())
+        self.assertIn('tests.Foo: 1 rows would be purged', output)
+
+    def test_no_retention_skips(self):
+        output = self.purge()
+
+        self.assertEqual(1, Foo.objects_deleted.count())
+        self.assertIn('tests.Foo: skipped', output)
+
+    def test_model_retention(self):
+        Foo._meta.soft_delete_retention = timedelta(days=365 * 100)
+
+        try:
+            self.purge('tests.Foo', days=30)
+        finally:
+            del Foo._meta.soft_delete_retention
+
+        self.assertEqual(1, Foo.objects_deleted.count())
+
+    def test_time_budget(self):
+        Foo.objects.bulk_create([Foo(name='old', deleted_at=timezone.now() - timedelta(days=60)) for _ in range(5)])
+
+        output = self.purge('tests.Foo', days=30, batch_size=2, time_budget=0.000001)
+
+        self.assertIn('stopped by the time budget', output)
+        self.assertEqual(6, Foo.objects_deleted.count())
+
+    def test_rows_deleted_again_during_the_purge_are_kept(self):
+        foo = Foo.objects_deleted.get()
+        keyset_batches = SoftDeleteQuerySet._keyset_batches
+
+        def batches(queryset, *args, **kwargs):
+            for using, pks in keyset_batches(queryset, *args, **kwargs):
+                # restored and soft deleted again once the page is read
+                Foo.objects_deleted.filter(pk=foo.pk).restore()
+                Foo.objects.filter(pk=foo.pk).delete()
+
+                yield using, pks
+
+        with mock.patch.object(SoftDeleteQuerySet, '_keyset_batches', batches):
+            stats = purge('tests.Foo', timezone.now() - timedelta(days=30), 1000, 0, False)
+
+        self.assertEqual(0, stats['rows'])
+        self.assertTrue(Foo.objects_deleted.filter(pk=foo.pk).exists())
@@ -0,0 +1,91 @@
+from django.core.cache import cache
+from django.test import TestCase
+from rest_framework.test import APIRequestFactory
+from timestamps.drf.mixins import CachedRetrieveModelMixin, ConditionalModelMixin
+from tests.models import Foo
+from tests.viewsets import FooViewSet
+
+
+class ConditionalFooViewSet(ConditionalModelMixin, FooViewSet):
+    pass
+
+
+class CachedConditionalFooViewSet(CachedRetrieveModelMixin, ConditionalFooViewSet):
+    pass
+
+
+class ConditionalGetTestCase(TestCase):
+    fixtures = ['foos']
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def get(self, action, path='/foos/', view_class=ConditionalFooViewSet, headers=None, **kwargs):
+        view = view_class.as_view({'get': action})
+        return view(self.factory.get(path, **(headers or {})), **kwargs)
+
+    def test_list(self):
+        for action in ('list', 'list_deleted', 'list_with_deleted'):
+            response = self.get(action)
+            self.assertEqual(200, response.status_code)
+            self.assertIn('Last-Modified', response)
+
+            # the aggregate only: nothing is serialized
+            with self.assertNumQueries(1):
+                not_modified = self.get(action, headers={'HTTP_IF_NONE_MATCH': response['ETag']})
+
+            self.assertEqual(304, not_modified.status_code)
+
+    def test_list_changes_the_etag(self):
+        etag = self.get('list')['ETag']
+
+        Foo.objects.first().delete()
+        self.assertEqual(200, self.get('list', headers={'HTTP_IF_NONE_MATCH': etag}).status_code)
+
+        etag = self.get('list_with_deleted')['ETag']
+
+        Foo.objects_deleted.first().restore()
+        self.assertEqual(200, self.get('list_with_deleted', headers={'HTTP_IF_NONE_MATCH': etag}).status_code)
+
+    def test_list_etag_depends_on_the_query_string(self):
+        self.assertNotEqual(self.get('list')['ETag'], self.get('list', path='/foos/?page=2')['ETag'])
+
+    def test_detail(self):
+        foo = Foo.objects_deleted.first()
+        response = self.get('retrieve_deleted', pk=str(foo.pk))
+        etag = response['ETag']
+
+        with self.assertNumQueries(1):
+            not_modified = self.get('retrieve_deleted', headers={'HTTP_IF_NONE_MATCH': etag}, pk=str(foo.pk))
+
+        self.assertEqual(304, not_modified.status_code)
+
+        foo.restore()
+        response = self.get('retrieve_with_deleted', headers={'HTTP_IF_NONE_MATCH': etag}, pk=str(foo.pk))
+        self.assertEqual(200, response.status_code)
+
+    def test_if_modified_since(self):
+        foo = Foo.objects.first()
+        response = self.get('retrieve', pk=str(foo.pk))
+
+        not_modified = self.get('retrieve', headers={'HTTP_IF_MODIFIED_SINCE': response['Last-Modified']}, pk=str(foo.pk))
+        self.assertEqual(304, not_modified.status_code)
+
+    def test_cached_detail(self):
+        foo = Foo.objects.first()
+        etag = self.get('retrieve', view_class=CachedConditionalFooViewSet, pk=str(foo.pk))['ETag']
+
+        # the EXISTS query of the cache hit only
+        with self.assertNumQueries(1):
+            response = self.get(
+                'retrieve', view_class=CachedConditionalFooViewSet, headers={'HTTP_IF_NONE_MATCH': etag}, pk=str(foo.pk)
+            )
+
+        self.assertEqual(304, response.status_code)
+
+    def test_views_without_validators(self):
+        foo = Foo.objects.first()
+
+        self.assertNotIn('ETag', self.get('list', view_class=FooViewSet))
+        self.assertNotIn('ETag', self.get('retrieve', view_class=FooViewSet, pk=str(foo.pk)))
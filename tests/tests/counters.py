@@ -0,0 +1,151 @@
+from io import StringIO
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from tests.models import Bar, Baz, Foo
+
+
+class SoftDeleteCountersTestCase(TestCase):
+    fixtures = ['foos', 'bars']
+
+    def setUp(self):
+        cache.clear()
+
+        # counted once, then kept up to date
+        self.assertEqual(3, Foo.objects.fast_count())
+        self.assertEqual(1, Foo.objects_deleted.fast_count())
+
+    def assertCounts(self, live, deleted):
+        with self.assertNumQueries(0):
+            self.assertEqual(live, Foo.objects.fast_count())
+            self.assertEqual(deleted, Foo.objects_deleted.fast_count())
+            self.assertEqual(live + deleted, Foo.objects_with_deleted.fast_count())
+
+    def test_create(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Foo.objects.create(name='foo')
+
+        self.assertCounts(4, 1)
+
+    def test_bulk_create(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Foo.objects.bulk_create([Foo(name='foo %d' % i) for i in range(5)])
+            Foo.objects_with_deleted.bulk_create([Foo(name='deleted', deleted_at=timezone.now())])
+
+        self.assertCounts(8, 2)
+
+        # with conflicts, the inserted rows aren't known: counted again
+        with self.captureOnCommitCallbacks(execute=True):
+            Foo.objects.bulk_create([Foo(name='foo')], ignore_conflicts=True)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(9, Foo.objects.fast_count())
+
+    def test_instance_delete_and_restore(self):
+        foo = Foo.objects.first()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            foo.delete()
+            foo.delete()  # already deleted: not counted twice
+
+        self.assertCounts(2, 2)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            foo.restore()
+
+        self.assertCounts(3, 1)
+
+    def test_bulk_delete_and_restore(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Foo.objects.delete()
+
+        self.assertCounts(0, 4)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Foo.objects_deleted.restore(batch_size=2)
+
+        self.assertCounts(4, 0)
+
+    def test_hard_delete(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            Foo.objects_deleted.hard_delete()
+            Foo.objects.first().hard_delete()
+
+        self.assertCounts(2, 0)
+
+    def test_hard_delete_is_a_fast_delete(self):
+        self.assertEqual(1, Bar.objects.fast_count())
+        self.assertEqual(1, Bar.objects_deleted.fast_count())
+
+        # no post_delete receiver: one aggregate, then a DELETE without loading the rows
+        with self.captureOnCommitCallbacks(execute=True):
+            with CaptureQueriesContext(connection) as queries:
+                self.assertEqual((2, {'tests.Bar': 2}), Bar.objects_with_deleted.hard_delete())
+
+        self.assertEqual(['SELECT', 'DELETE'], [query['sql'].split()[0] for query in queries])
+
+        with self.assertNumQueries(0):
+            self.assertEqual(0, Bar.objects.fast_count())
+            self.assertEqual(0, Bar.objects_deleted.fast_count())
+
+    def test_cascaded_hard_deletes_reset_the_counters(self):
+        foo = Foo.objects.get(bar__name='megabar')
+        self.assertEqual(1, Bar.objects.fast_count())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            foo.hard_delete()
+
+        self.assertCounts(2, 1)
+
+        # recounted
+        with self.assertNumQueries(1):
+            self.assertEqual(0, Bar.objects.fast_count())
+
+    def test_rollback_keeps_the_counters(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            try:
+                with transaction.atomic():
+                    Foo.objects.delete()
+                    raise ValueError
+            except ValueError:
+                pass
+
+        self.assertCounts(3, 1)
+
+    def test_archive_mode(self):
+        baz = Baz.objects.create(name='baz')
+        self.assertEqual(1, Baz.objects.fast_count())
+        self.assertEqual(0, Baz.objects_deleted.fast_count())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            baz.delete()
+
+        self.assertEqual(0, Baz.objects.fast_count())
+        self.assertEqual(1, Baz.objects_deleted.fast_count())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Baz.objects_deleted.get().delete()
+
+        self.assertEqual(0, Baz.objects_deleted.fast_count())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Baz.objects.create(name='baz').delete()
+            Baz.objects_deleted.hard_delete()
+
+        self.assertEqual(0, Baz.objects_deleted.fast_count())
+
+    def test_reconcile_command(self):
+        # writes bypassing the querysets of the model (e.g. raw SQL) aren't counted: the counters drift
+        QuerySet(Foo).bulk_create([Foo(name='a'), Foo(name='b')])
+        self.assertEqual(3, Foo.objects.fast_count())
+
+        out = StringIO()
+        call_command('reconcile_soft_delete_counters', 'tests', stdout=out)
+
+        self.assertIn('tests.Foo: 5 live rows (drift +2, repaired)', out.getvalue())
+        self.assertIn('tests.Foo: 1 deleted rows', out.getvalue())
+        self.assertCounts(5, 1)
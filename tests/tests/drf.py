@@ -168,3 +168,37 @@ class ViewsWithNoActionTestCase(TestCase):
 
         response = self.client.get(f'/bars/{uuid}/')
         self.assertEquals(status.HTTP_404_NOT_FOUND, response.status_code)
+
+
+class QuerySetDispatchTestCase(TestCase):
+    fixtures = ['foos']
+
+    def test_generic_views_are_untouched(self):
+        from rest_framework.generics import GenericAPIView
+        from timestamps.drf import mixins
+
+        self.assertEquals('rest_framework.generics', GenericAPIView.get_queryset.__module__)
+        self.assertIsNot(mixins.SoftDeleteQuerySetMixin.get_queryset, GenericAPIView.get_queryset)
+
+    def test_transforms_are_resolved_per_view_class(self):
+        from timestamps.drf.mixins import ListDeletedModelMixin, _queryset_transforms
+        from tests.viewsets import FooViewSet
+
+        class DeletedView(ListDeletedModelMixin):
+            pass
+
+        self.assertEquals({'list_deleted'}, set(_queryset_transforms(DeletedView)))
+        self.assertIn('bulk_restore', _queryset_transforms(FooViewSet))
+        self.assertNotIn('list', _queryset_transforms(FooViewSet))
+
+    def test_permanent_is_parsed_once_per_request(self):
+        from unittest import mock
+        from timestamps.drf import utils
+
+        pk = '32a6fab2-9e0f-4d23-9a3b-c642470e629d'
+
+        with mock.patch.object(utils, 'can_hard_delete', wraps=utils.can_hard_delete) as can_hard_delete:
+            response = self.client.delete('/foos/{}/?permanent=1'.format(pk))
+
+        self.assertEquals(status.HTTP_204_NO_CONTENT, response.status_code)
+        self.assertEquals(1, can_hard_delete.call_count)
@@ -0,0 +1,66 @@
+import csv
+import io
+import json
+from unittest import mock
+from django.db.models import QuerySet
+from django.test import TestCase
+from rest_framework import status
+from tests.models import Foo
+
+
+class ExportTestCase(TestCase):
+    fixtures = ['foos']
+
+    def export(self, url, **params):
+        response = self.client.get(url, params)
+
+        self.assertEqual(status.HTTP_200_OK, response.status_code)
+        self.assertTrue(response.streaming)
+
+        return response, b''.join(response.streaming_content).decode()
+
+    def test_export_deleted_ndjson(self):
+        response, content = self.export('/foos/deleted/export/')
+
+        self.assertEqual('application/x-ndjson', response['Content-Type'])
+        self.assertIn('foo-deleted.ndjson', response['Content-Disposition'])
+
+        rows = [json.loads(line) for line in content.splitlines()]
+        self.assertEqual(['381b0e65-bc13-43de-b216-8673c18aa645'], [row['id'] for row in rows])
+
+    def test_export_with_deleted_csv(self):
+        response, content = self.export('/foos/with-deleted/export/', type='csv')
+
+        self.assertEqual('text/csv', response['Content-Type'])
+
+        rows = list(csv.DictReader(io.StringIO(content)))
+        self.assertEqual(4, len(rows))
+        self.assertEqual({'id', 'name', 'created_at', 'updated_at'}, set(rows[0]))
+
+    def test_export_reads_in_chunks(self):
+        for i in range(10):
+            Foo.objects.create(name='foo %d' % i).delete()
+
+        with mock.patch.object(QuerySet, 'iterator', autospec=True, side_effect=QuerySet.iterator) as iterator, \
+                mock.patch('django.conf.settings.TIMESTAMPS__EXPORT_CHUNK_SIZE', 4, create=True):
+            _, content = self.export('/foos/deleted/export/')
+
+        iterator.assert_called_once_with(mock.ANY, chunk_size=4)
+        self.assertEqual(11, len(content.splitlines()))
+
+    def test_export_is_filtered_like_the_listing(self):
+        _, content = self.export('/foos/deleted/export/', type='csv')
+        self.assertEqual(2, len(content.splitlines()))
+
+        _, content = self.export('/foos/with-deleted/export/', type='ndjson')
+        self.assertEqual(4, len(content.splitlines()))
+
+    def test_empty_export(self):
+        Foo.objects_deleted.restore()
+
+        _, content = self.export('/foos/deleted/export/', type='csv')
+        self.assertEqual('', content)
+
+    def test_invalid_type(self):
+        response = self.client.get('/foos/deleted/export/', {'type': 'xml'})
+        self.assertEqual(status.HTTP_400_BAD_REQUEST, response.status_code)
@@ -0,0 +1,106 @@
+from rest_framework import serializers
+from rest_framework.pagination import PageNumberPagination
+from rest_framework.test import APIRequestFactory
+from django.test import TestCase
+from timestamps.drf.pagination import DeletedPagination, WithDeletedPagination
+from timestamps.drf.values import values_plan
+from timestamps.drf.viewsets import ModelViewSet
+from tests.models import Foo, Bar
+from tests.serializers import FooSerializer, BarSerializer
+from tests.viewsets import FooViewSet
+
+
+class PageNumber(PageNumberPagination):
+    page_size = 2
+
+
+class Deleted(DeletedPagination):
+    page_size = 1
+
+
+class WithDeleted(WithDeletedPagination):
+    page_size = 2
+
+
+class FastFooViewSet(FooViewSet):
+    queryset = Foo.objects.order_by('pk')
+    fast_list = True
+    pagination_class = PageNumber
+    deleted_pagination_class = Deleted
+    with_deleted_pagination_class = WithDeleted
+
+
+class BarViewSet(ModelViewSet):
+    queryset = Bar.objects.all()
+    serializer_class = BarSerializer
+
+
+class FastBarViewSet(BarViewSet):
+    fast_list = True
+
+
+class FooMethodSerializer(FooSerializer):
+    upper_name = serializers.SerializerMethodField()
+
+    def get_upper_name(self, foo):
+        return foo.name.upper()
+
+
+class FastListTestCase(TestCase):
+    fixtures = ['foos', 'bars']
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+
+    def get(self, view_class, action, path='/'):
+        response = view_class.as_view({'get': action})(self.factory.get(path))
+        response.render()
+        return response
+
+    def assertSameContent(self, slow, fast, action, path='/'):
+        expected = self.get(slow, action, path)
+        actual = self.get(fast, action, path)
+
+        self.assertEqual(200, actual.status_code)
+        self.assertEqual(expected.content, actual.content)
+
+        return actual
+
+    def test_same_output(self):
+        class SlowFooViewSet(FastFooViewSet):
+            fast_list = False
+
+        for action in ('list', 'list_deleted', 'list_with_deleted'):
+            self.assertSameContent(SlowFooViewSet, FastFooViewSet, action)
+
+        self.assertSameContent(SlowFooViewSet, FastFooViewSet, 'list', '/?page=2')
+
+    def test_keyset_pagination_cursor(self):
+        class SlowFooViewSet(FastFooViewSet):
+            fast_list = False
+
+        response = self.assertSameContent(SlowFooViewSet, FastFooViewSet, 'list_with_deleted')
+        self.assertIsNotNone(response.data['next'])
+
+        cursor = response.data['next'].split('cursor=')[1]
+        self.assertSameContent(SlowFooViewSet, FastFooViewSet, 'list_with_deleted', '/?cursor=%s' % cursor)
+
+    def test_foreign_keys(self):
+        self.assertSameContent(BarViewSet, FastBarViewSet, 'list')
+
+    def test_no_model_instances(self):
+        with self.assertNumQueries(2):
+            response = self.get(FastFooViewSet, 'list')
+
+        self.assertEqual(2, len(response.data['results']))
+        self.assertIsInstance(response.data['results'][0], dict)
+
+    def test_serializers_needing_objects(self):
+        self.assertIsNotNone(values_plan(FooSerializer()))
+        self.assertIsNone(values_plan(FooMethodSerializer()))
+
+        class MethodFooViewSet(FastFooViewSet):
+            serializer_class = FooMethodSerializer
+
+        response = self.get(MethodFooViewSet, 'list')
+        self.assertEqual(response.data['results'][0]['name'].upper(), response.data['results'][0]['upper_name'])
@@ -0,0 +1,51 @@
+from django.db import IntegrityError, transaction
+from django.db.migrations.state import ModelState
+from django.test import TestCase
+from tests.models import Foo, Bar
+
+
+class SoftDeleteIndexesTestCase(TestCase):
+    def test_live_index_is_declared(self):
+        indexes = [index for index in Bar._meta.indexes if index.fields == ['foo']]
+
+        self.assertEqual(1, len(indexes))
+        self.assertTrue(indexes[0].name.endswith('_sdl'))
+        self.assertIn(('deleted_at__isnull', True), indexes[0].condition.children)
+
+    def test_deleted_index_is_declared(self):
+        indexes = [index for index in Bar._meta.indexes if index.fields == ['deleted_at']]
+
+        self.assertEqual(1, len(indexes))
+        self.assertIn(('deleted_at__isnull', False), indexes[0].condition.children)
+
+    def test_index_names_fit_in_30_chars(self):
+        for index in Bar._meta.indexes:
+            self.assertLessEqual(len(index.name), 30)
+
+    def test_models_without_options_have_no_indexes(self):
+        self.assertEqual([], Foo._meta.indexes)
+        self.assertEqual([], Foo._meta.constraints)
+
+    def test_indexes_and_constraints_are_visible_to_migrations(self):
+        options = ModelState.from_model(Bar).options
+
+        self.assertEqual(
+            {index.name for index in Bar._meta.indexes},
+            {index.name for index in options['indexes']},
+        )
+        self.assertEqual(
+            {constraint.name for constraint in Bar._meta.constraints},
+            {constraint.name for constraint in options['constraints']},
+        )
+
+    def test_unique_constraint_only_covers_live_rows(self):
+        foo = Foo.objects.create(name='foo')
+        bar = Bar.objects.create(name='bar', foo=foo)
+
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            Bar.objects.create(name='bar', foo=foo)
+
+        bar.delete()
+        Bar.objects.create(name='bar', foo=foo)
+
+        self.assertEqual(2, Bar.objects_with_deleted.filter(foo=foo, name='bar').count())
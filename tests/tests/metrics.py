@@ -0,0 +1,97 @@
+from django.test import RequestFactory, TestCase, override_settings
+from timestamps import metrics
+from timestamps.signals import post_soft_delete
+from tests.models import Foo
+
+
+class CustomRegistry(metrics.Registry):
+    pass
+
+
+@override_settings(TIMESTAMPS__METRICS=True)
+class MetricsTestCase(TestCase):
+    fixtures = ['foos']
+
+    def setUp(self):
+        metrics.get_registry().reset()
+
+    def operation(self, operation, target='queryset', model='tests.Foo'):
+        return metrics.get_registry().operations.get((operation, target, model))
+
+    def test_instance_operations(self):
+        foo = Foo.objects.first()
+
+        foo.delete()
+        foo.delete()  # already deleted: no rows
+        foo.restore()
+        foo.hard_delete()
+
+        count, rows, seconds = self.operation('soft_delete', 'instance')
+        self.assertEqual((2, 1), (count, rows))
+        self.assertGreater(seconds, 0)
+
+        self.assertEqual((1, 1), self.operation('restore', 'instance')[:2])
+        self.assertEqual((1, 1), self.operation('hard_delete', 'instance')[:2])
+
+    def test_queryset_operations(self):
+        Foo.objects.delete()
+        Foo.objects_deleted.restore(batch_size=2)
+        Foo.objects_with_deleted.delete(hard=True)
+
+        self.assertEqual((1, 3), self.operation('soft_delete')[:2])
+        self.assertEqual((1, 4), self.operation('restore')[:2])
+        self.assertEqual((1, 4), self.operation('hard_delete')[:2])
+
+        # the manager delegates to the queryset, and the instance isn't measured inside it
+        self.assertIsNone(self.operation('soft_delete', 'instance'))
+
+    async def test_async_operations_are_recorded_once(self):
+        await Foo.objects.adelete()
+        foo = await Foo.objects_deleted.afirst()
+        await foo.arestore()
+
+        self.assertEqual((1, 3), self.operation('soft_delete')[:2])
+        self.assertEqual((1, 1), self.operation('restore', 'instance')[:2])
+
+    def test_signal_receivers(self):
+        def receiver(**kwargs):
+            pass
+
+        post_soft_delete.connect(receiver, sender=Foo)
+        self.addCleanup(post_soft_delete.disconnect, receiver, sender=Foo)
+
+        foo = Foo.objects.first()
+        foo.delete()
+        foo.restore()
+
+        count, seconds = metrics.get_registry().signals[('post_soft_delete', 'tests.Foo')]
+        self.assertEqual(1, count)
+
+        # signals without receivers aren't recorded
+        self.assertNotIn(('pre_restore', 'tests.Foo'), metrics.get_registry().signals)
+
+    def test_prometheus_export(self):
+        Foo.objects.delete()
+
+        response = metrics.prometheus(RequestFactory().get('/metrics'))
+        content = response.content.decode()
+
+        self.assertTrue(response['Content-Type'].startswith('text/plain; version=0.0.4'))
+        self.assertIn('# TYPE timestamps_operations_total counter', content)
+        self.assertIn('timestamps_operations_total{operation="soft_delete",target="queryset",model="tests.Foo"} 1', content)
+        self.assertIn('timestamps_rows_total{operation="soft_delete",target="queryset",model="tests.Foo"} 3', content)
+        self.assertIn('timestamps_operation_seconds_count{operation="soft_delete",target="queryset",model="tests.Foo"} 1',
+                      content)
+
+    @override_settings(TIMESTAMPS__METRICS_REGISTRY='tests.tests.metrics.CustomRegistry')
+    def test_pluggable_registry(self):
+        self.assertIsInstance(metrics.get_registry(), CustomRegistry)
+
+    @override_settings(TIMESTAMPS__METRICS=False)
+    def test_disabled(self):
+        self.assertIsNone(metrics.get_registry())
+
+        Foo.objects.delete()
+
+        response = metrics.prometheus(RequestFactory().get('/metrics'))
+        self.assertEqual(b'', response.content)
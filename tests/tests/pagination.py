@@ -0,0 +1,68 @@
+from unittest import mock
+from django.test import TestCase
+from rest_framework import status
+from timestamps.drf.pagination import DeletedPagination, WithDeletedPagination
+from tests.models import Foo
+
+
+class KeysetPaginationTestCase(TestCase):
+    fixtures = ['foos']
+
+    def setUp(self):
+        for i in range(5):
+            Foo.objects.create(name='deleted %d' % i).delete()
+
+    def pages(self, url):
+        pages = []
+
+        while url:
+            response = self.client.get(url)
+            self.assertEqual(status.HTTP_200_OK, response.status_code)
+
+            data = response.json()
+            pages.append([row['id'] for row in data['results']])
+            url = data['next']
+
+        return pages
+
+    def test_not_paginated_without_page_size(self):
+        response = self.client.get('/foos/deleted/')
+        self.assertEqual(6, len(response.json()))
+
+    @mock.patch.object(DeletedPagination, 'page_size', 2)
+    def test_deleted_pages(self):
+        pages = self.pages('/foos/deleted/')
+
+        self.assertEqual([2, 2, 2], [len(page) for page in pages])
+
+        expected = Foo.objects_deleted.order_by('-deleted_at', '-pk').values_list('pk', flat=True)
+        self.assertEqual([str(pk) for pk in expected], sum(pages, []))
+
+    @mock.patch.object(WithDeletedPagination, 'page_size', 3)
+    def test_with_deleted_pages(self):
+        # all the rows of the fixture have the same updated_at: ties are split by the primary key
+        pages = self.pages('/foos/with-deleted/')
+
+        self.assertEqual([3, 3, 3], [len(page) for page in pages])
+
+        expected = Foo.objects_with_deleted.order_by('-updated_at', '-pk').values_list('pk', flat=True)
+        self.assertEqual([str(pk) for pk in expected], sum(pages, []))
+
+    @mock.patch.object(DeletedPagination, 'page_size', 2)
+    def test_page_without_offset_and_count(self):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+
+        first = self.client.get('/foos/deleted/').json()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(first['next'])
+
+        self.assertEqual(1, len(queries))
+        self.assertNotIn('COUNT', queries[0]['sql'])
+        self.assertNotIn('OFFSET', queries[0]['sql'])
+
+    @mock.patch.object(DeletedPagination, 'page_size', 2)
+    def test_invalid_cursor(self):
+        response = self.client.get('/foos/deleted/', {'cursor': 'abc'})
+        self.assertEqual(status.HTTP_404_NOT_FOUND, response.status_code)
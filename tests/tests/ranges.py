@@ -0,0 +1,60 @@
+from datetime import datetime, timedelta, timezone as tz
+from django.test import TestCase
+from timestamps.managers import TimestampableManager
+from timestamps.querysets import TimestampableQuerySet
+from tests.models import Foo, Bar
+
+
+class TimeRangeQuerySetTestCase(TestCase):
+    fixtures = ['foos']
+
+    def setUp(self):
+        self.start = datetime(2021, 1, 1, tzinfo=tz.utc)
+        self.end = self.start + timedelta(days=1)
+
+    def test_created_and_updated_ranges(self):
+        self.assertEqual(3, Foo.objects.created_between(self.start, self.end).count())
+        self.assertEqual(4, Foo.objects_with_deleted.updated_since(self.start).count())
+
+        # half-open ranges: the end is excluded
+        self.assertEqual(0, Foo.objects.created_between(self.start - timedelta(days=1), self.start).count())
+        self.assertEqual(0, Foo.objects.updated_since(self.end).count())
+
+        foo = Foo.objects.create(name='new')
+        self.assertEqual([foo], list(Foo.objects.created_since(self.end)))
+
+    def test_deleted_ranges(self):
+        self.assertEqual(1, Foo.objects_deleted.deleted_between(self.start, self.end).count())
+        self.assertEqual(1, Foo.objects_deleted.deleted_since(self.start).count())
+        self.assertEqual(0, Foo.objects_deleted.deleted_since(self.end).count())
+
+    def test_querysets_can_be_chained(self):
+        queryset = Foo.objects_with_deleted.created_between(self.start, self.end).deleted_since(self.start)
+        self.assertEqual(1, queryset.count())
+
+    def test_timestampable_manager(self):
+        manager = TimestampableManager()
+        manager.model = Foo
+
+        self.assertIsInstance(manager.all(), TimestampableQuerySet)
+        self.assertEqual(4, manager.created_since(self.start).count())
+
+
+class TimestampIndexesTestCase(TestCase):
+    def test_indexes_lead_with_deleted_at(self):
+        indexes = [index.fields for index in Bar._meta.indexes if index.name.endswith('_tsi')]
+        self.assertEqual([['deleted_at', 'created_at'], ['deleted_at', 'updated_at']], indexes)
+
+    def test_models_without_the_option_have_no_indexes(self):
+        self.assertEqual([], Foo._meta.indexes)
+
+    def test_query_plans_use_the_indexes(self):
+        names = {index.fields[-1]: index.name for index in Bar._meta.indexes if index.name.endswith('_tsi')}
+        now = datetime.now(tz.utc)
+
+        self.assertIn(names['updated_at'], Bar.objects.updated_since(now).explain())
+        self.assertIn(names['created_at'], Bar.objects.created_between(now, now).explain())
+
+        # a (deleted_at, ...) index, or the partial one of soft_delete_index_deleted
+        plan = Bar.objects_deleted.deleted_between(now, now).explain()
+        self.assertRegex(plan, r'USING (COVERING )?INDEX tests_bar_deleted_')
@@ -0,0 +1,82 @@
+from django.db.models import Prefetch
+from django.test import TestCase
+from timestamps.managers import DeletedManager, SoftDeleteManager, WithDeletedManager
+from tests.models import Foo, Bar
+
+
+class NamedManager(SoftDeleteManager):
+    def named(self, name):
+        return self.filter(name=name)
+
+
+class SoftDeleteRelationsTestCase(TestCase):
+    fixtures = ['foos', 'bars']
+
+    deleted_foo = '381b0e65-bc13-43de-b216-8673c18aa645'
+
+    def test_reverse_relation_returns_live_rows(self):
+        foo = Foo.objects_with_deleted.get(pk=self.deleted_foo)
+
+        self.assertEqual(0, foo.bar_set.count())
+        self.assertEqual(1, foo.bar_set(manager='objects_with_deleted').count())
+        self.assertEqual(1, foo.bar_set(manager='objects_deleted').count())
+
+        bar = Bar.objects.create(name='live', foo=foo)
+        self.assertEqual([bar], list(foo.bar_set.all()))
+        self.assertEqual(2, foo.bar_set(manager='objects_with_deleted').count())
+        self.assertEqual(1, foo.bar_set(manager='objects_deleted').count())
+
+    def test_prefetch_returns_live_rows_with_one_query(self):
+        with self.assertNumQueries(2):
+            foos = list(Foo.objects_with_deleted.prefetch_related('bar_set'))
+            bars = {str(foo.pk): len(foo.bar_set.all()) for foo in foos}
+
+        self.assertEqual(0, bars[self.deleted_foo])
+        self.assertEqual(1, sum(bars.values()))
+
+    def test_prefetch_with_deleted(self):
+        with self.assertNumQueries(2):
+            foos = list(Foo.objects_with_deleted.prefetch_related(
+                Prefetch('bar_set', queryset=Bar.objects_with_deleted.all(), to_attr='all_bars'),
+            ))
+            bars = {str(foo.pk): len(foo.all_bars) for foo in foos}
+
+        self.assertEqual(1, bars[self.deleted_foo])
+        self.assertEqual(2, sum(bars.values()))
+
+    def test_managers_keep_their_kind(self):
+        self.assertIsInstance(Foo.objects_deleted, DeletedManager)
+        self.assertIsInstance(Foo.objects_with_deleted, WithDeletedManager)
+
+        # still supported
+        self.assertIsInstance(SoftDeleteManager(only_deleted=True), DeletedManager)
+        self.assertIsInstance(SoftDeleteManager(with_deleted=True), WithDeletedManager)
+        self.assertIs(SoftDeleteManager, type(SoftDeleteManager()))
+
+    def test_subclasses_keep_their_methods(self):
+        manager = NamedManager(only_deleted=True)
+        manager.model = Foo
+
+        self.assertIsInstance(manager, NamedManager)
+        self.assertTrue(manager.only_deleted)
+        self.assertEqual(1, manager.all().count())
+        self.assertEqual(0, manager.named('nope').count())
+        self.assertIs(type(manager), type(NamedManager(only_deleted=True)))
+
+        manager = NamedManager(with_deleted=True)
+        manager.model = Foo
+        self.assertEqual(1, manager.named(Foo.objects_deleted.get().name).count())
+
+        # deconstructed as the class it was made with
+        self.assertEqual(
+            (False, '%s.NamedManager' % __name__, None, (), {'with_deleted': True}),
+            manager.deconstruct(),
+        )
+
+    def test_managers_honor_the_database_and_hints(self):
+        foo = Foo.objects.first()
+
+        queryset = Foo.objects_deleted.db_manager('other', hints={'instance': foo}).all()
+
+        self.assertEqual('other', queryset._db)
+        self.assertEqual({'instance': foo}, queryset._hints)
@@ -0,0 +1,76 @@
+from django.test import TestCase, override_settings
+from rest_framework.test import APIRequestFactory
+from tests.models import Foo
+from tests.viewsets import FooViewSet
+
+
+@override_settings(TIMESTAMPS__REPLICA_DATABASE='replica')
+class ReplicaTestCase(TestCase):
+    databases = {'default', 'replica'}
+    fixtures = ['foos']
+
+    def setUp(self):
+        # the fixtures are loaded in both databases: tell their rows apart
+        Foo.objects_with_deleted.using('replica').update(name='replica')
+        self.factory = APIRequestFactory()
+
+    def deleted_count(self, using):
+        return Foo.objects_deleted.using(using).count()
+
+    def test_deleted_reads_go_to_the_replica(self):
+        self.assertEqual('replica', Foo.objects_deleted.get().name)
+        self.assertNotEqual('replica', Foo.objects.first().name)
+        self.assertNotEqual('replica', Foo.objects_with_deleted.first().name)
+
+    def test_explicit_database_wins(self):
+        self.assertNotEqual('replica', Foo.objects_deleted.using('default').get().name)
+
+    def test_bulk_writes_go_to_the_primary(self):
+        self.assertEqual(1, Foo.objects_deleted.restore())
+
+        self.assertEqual(0, self.deleted_count('default'))
+        self.assertEqual(1, self.deleted_count('replica'))
+
+    def test_objects_read_from_the_replica_are_written_to_the_primary(self):
+        foo = Foo.objects_deleted.get()
+        self.assertEqual('default', foo._state.db)
+
+        self.assertTrue(foo.restore())
+        self.assertEqual(0, self.deleted_count('default'))
+        self.assertEqual(1, self.deleted_count('replica'))
+
+        foo = Foo.objects_deleted.using('replica').get()
+        foo.hard_delete()
+        self.assertEqual(1, self.deleted_count('replica'))
+
+    def test_using_is_propagated(self):
+        foo = Foo.objects.using('replica').first()
+        foo.soft_delete(using='replica')
+
+        self.assertEqual(1, self.deleted_count('default'))
+        self.assertEqual(2, self.deleted_count('replica'))
+
+        Foo.objects.using('replica').delete(batch_size=1)
+        Foo.objects_deleted.using('replica').filter(pk=foo.pk).restore()
+
+        self.assertEqual(1, self.deleted_count('default'))
+        self.assertEqual(3, self.deleted_count('replica'))
+
+    def test_drf_reads_go_to_the_replica(self):
+        foo = Foo.objects_deleted.get()
+
+        for action, kwargs in (('list_deleted', {}), ('retrieve_deleted', {'pk': str(foo.pk)})):
+            response = FooViewSet.as_view({'get': action})(self.factory.get('/foos/deleted/'), **kwargs)
+            self.assertIn('"name":"replica"', response.rendered_content.decode())
+
+        response = FooViewSet.as_view({'get': 'list_with_deleted'})(self.factory.get('/foos/with-deleted/'))
+        self.assertEqual(4, response.rendered_content.decode().count('"name":"replica"'))
+
+    def test_drf_restore_writes_to_the_primary(self):
+        foo = Foo.objects_deleted.get()
+
+        response = FooViewSet.as_view({'patch': 'restore'})(self.factory.patch('/'), pk=str(foo.pk))
+        self.assertEqual(200, response.status_code)
+
+        self.assertEqual(0, self.deleted_count('default'))
+        self.assertEqual(1, self.deleted_count('replica'))
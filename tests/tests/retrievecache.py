@@ -0,0 +1,145 @@
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.permissions import BasePermission
+from rest_framework.test import APIRequestFactory
+from timestamps.drf.mixins import CachedRetrieveModelMixin
+from tests.models import Foo
+from tests.viewsets import FooViewSet
+
+
+class CachedFooViewSet(CachedRetrieveModelMixin, FooViewSet):
+    pass
+
+
+class ScopedFooViewSet(CachedFooViewSet):
+    # e.g. the rows of the user
+    def get_queryset(self):
+        queryset = super(ScopedFooViewSet, self).get_queryset()
+
+        if self.request.META.get('HTTP_X_SCOPE') == 'all':
+            return queryset
+
+        return queryset.filter(name__startswith='Cum')
+
+
+class OwnerOnly(BasePermission):
+    def has_object_permission(self, request, view, obj):
+        return True
+
+
+class RetrieveCacheTestCase(TestCase):
+    fixtures = ['foos']
+
+    def setUp(self):
+        cache.clear()
+        self.factory = APIRequestFactory()
+
+    def retrieve(self, pk, action='retrieve', view_class=CachedFooViewSet, **headers):
+        view = view_class.as_view({'get': action})
+        return view(self.factory.get('/foos/%s/' % pk, **headers), pk=str(pk))
+
+    def assertCached(self, pk, action='retrieve'):
+        # only checks that the object is still in the queryset of the view
+        with CaptureQueriesContext(connection) as queries:
+            response = self.retrieve(pk, action)
+
+        self.assertEqual(1, len(queries))
+        self.assertIn('SELECT 1 AS', queries[0]['sql'])
+        self.assertEqual(200, response.status_code)
+        return response
+
+    def assertNotCached(self, pk, action='retrieve'):
+        with self.assertNumQueries(1):
+            response = self.retrieve(pk, action)
+
+        self.assertEqual(200, response.status_code)
+        return response
+
+    def test_hit(self):
+        foo = Foo.objects.first()
+
+        self.assertNotCached(foo.pk)
+        self.assertEqual(foo.name, self.assertCached(foo.pk).data['name'])
+
+    def test_hits_are_scoped_by_the_queryset_of_the_view(self):
+        foo = Foo.objects.exclude(name__startswith='Cum').first()
+
+        self.assertEqual(404, self.retrieve(foo.pk, view_class=ScopedFooViewSet).status_code)
+
+        # cached by a request with a wider scope: same view, action and query string
+        self.assertEqual(200, self.retrieve(foo.pk, view_class=ScopedFooViewSet, HTTP_X_SCOPE='all').status_code)
+
+        self.assertEqual(404, self.retrieve(foo.pk, view_class=ScopedFooViewSet).status_code)
+        self.assertEqual(200, self.retrieve(foo.pk, view_class=ScopedFooViewSet, HTTP_X_SCOPE='all').status_code)
+
+    def test_each_action_is_cached_apart(self):
+        foo = Foo.objects_deleted.first()
+
+        self.assertEqual(404, self.retrieve(foo.pk).status_code)
+        self.assertNotCached(foo.pk, 'retrieve_deleted')
+        self.assertNotCached(foo.pk, 'retrieve_with_deleted')
+
+        self.assertCached(foo.pk, 'retrieve_deleted')
+        self.assertCached(foo.pk, 'retrieve_with_deleted')
+
+    def test_save_invalidates(self):
+        foo = Foo.objects.first()
+        self.assertNotCached(foo.pk)
+
+        foo.name = 'renamed'
+        foo.save()
+
+        self.assertEqual('renamed', self.assertNotCached(foo.pk).data['name'])
+
+    def test_soft_delete_and_restore_invalidate(self):
+        foo = Foo.objects.first()
+        self.assertNotCached(foo.pk)
+        self.assertNotCached(foo.pk, 'retrieve_with_deleted')
+
+        foo.delete()
+
+        self.assertEqual(404, self.retrieve(foo.pk).status_code)
+        self.assertNotCached(foo.pk, 'retrieve_with_deleted')
+
+        foo.restore()
+        self.assertNotCached(foo.pk)
+
+    def test_bulk_operations_invalidate(self):
+        foo = Foo.objects.first()
+        self.assertNotCached(foo.pk)
+
+        Foo.objects.filter(pk=foo.pk).update(name='renamed')
+        self.assertEqual('renamed', self.assertNotCached(foo.pk).data['name'])
+
+        Foo.objects.filter(pk=foo.pk).delete()
+        self.assertEqual(404, self.retrieve(foo.pk).status_code)
+
+        self.assertNotCached(foo.pk, 'retrieve_deleted')
+        Foo.objects_deleted.filter(pk=foo.pk).restore()
+        self.assertEqual(404, self.retrieve(foo.pk, 'retrieve_deleted').status_code)
+
+    def test_hard_delete_invalidates(self):
+        foo = Foo.objects.first()
+        self.assertNotCached(foo.pk)
+
+        foo.hard_delete()
+        self.assertEqual(404, self.retrieve(foo.pk).status_code)
+
+    def test_object_permissions_are_not_cached(self):
+        class View(CachedFooViewSet):
+            permission_classes = [OwnerOnly]
+
+        foo = Foo.objects.first()
+
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(200, self.retrieve(foo.pk, view_class=View).status_code)
+
+    def test_views_without_the_cache(self):
+        foo = Foo.objects.first()
+
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertEqual(200, self.retrieve(foo.pk, view_class=FooViewSet).status_code)
@@ -1,4 +1,4 @@
-from django.test import TransactionTestCase
+from django.test import TransactionTestCase, override_settings
 from timestamps import signals
 
 from tests.models import FooSoftDeletes as Foo
@@ -88,3 +88,65 @@ class TestSoftDeleteSignal(TransactionTestCase):
         self.assertTrue(self.signaled)
 
         signals.post_restore.disconnect(handler)
+
+
+@Foo.fake_me
+class TestBulkSoftDeleteSignal(TransactionTestCase):
+    def setUp(self):
+        self.received = []
+
+        for _ in range(5):
+            Foo().save()
+
+    def handler(self, signal_name):
+        def receiver(sender, pks, using, **kwargs):
+            self.assertEqual(sender, Foo)
+            self.assertEqual('default', using)
+            self.received.append((signal_name, list(pks)))
+
+        return receiver
+
+    def connect(self, signal, name):
+        receiver = self.handler(name)
+        signal.connect(receiver, sender=Foo, weak=False)
+        self.addCleanup(signal.disconnect, receiver, sender=Foo)
+
+    def test_no_receivers_no_primary_keys_query(self):
+        with self.assertNumQueries(1):
+            self.assertEqual(5, Foo.objects.delete())
+
+        with self.assertNumQueries(1):
+            self.assertEqual(5, Foo.objects_deleted.restore())
+
+    @override_settings(TIMESTAMPS__BULK_SIGNALS_CHUNK_SIZE=2)
+    def test_bulk_soft_delete_in_chunks(self):
+        self.connect(signals.pre_bulk_soft_delete, 'pre')
+        self.connect(signals.post_bulk_soft_delete, 'post')
+
+        self.assertEqual(5, Foo.objects.delete())
+
+        self.assertEqual(['pre', 'post'] * 3, [name for name, _ in self.received])
+        self.assertEqual([2, 2, 1], [len(pks) for name, pks in self.received if name == 'pre'])
+
+        pks = set(Foo.objects_with_deleted.values_list('pk', flat=True))
+        self.assertEqual(pks, {pk for name, chunk in self.received if name == 'post' for pk in chunk})
+
+    def test_bulk_soft_delete_sends_only_affected_rows(self):
+        deleted = Foo.objects.first()
+        deleted.delete()
+
+        self.connect(signals.post_bulk_soft_delete, 'post')
+
+        self.assertEqual(4, Foo.objects_with_deleted.delete())
+        self.assertNotIn(deleted.pk, self.received[0][1])
+
+    def test_bulk_restore(self):
+        Foo.objects.filter(pk__in=Foo.objects.values('pk')[:3]).delete()
+
+        self.connect(signals.pre_bulk_restore, 'pre')
+        self.connect(signals.post_bulk_restore, 'post')
+
+        self.assertEqual(3, Foo.objects_with_deleted.restore())
+
+        self.assertEqual(['pre', 'post'], [name for name, _ in self.received])
+        self.assertEqual(3, len(self.received[1][1]))
@@ -1,5 +1,8 @@
-from django.test import TransactionTestCase
+from django.db import connection
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
 from tests.models import FooSoftDeletes as Foo
+from tests.models import Foo as FooModel
 
 
 @Foo.fake_me
@@ -145,3 +148,77 @@ class SoftDeletesTestCase(TransactionTestCase):
 
         Foo.objects_deleted.restore()
         self.assertEquals(2, Foo.objects.count())
+
+
+@Foo.fake_me
+class SoftDeletesRaceTestCase(TransactionTestCase):
+    def test_delete_reports_if_row_was_deleted(self):
+        foo = Foo()
+        foo.save()
+
+        self.assertTrue(foo.delete())
+        self.assertFalse(foo.delete())
+
+    def test_concurrent_deletes_only_one_succeeds(self):
+        foo = Foo()
+        foo.save()
+
+        first, second = Foo.objects.get(pk=foo.pk), Foo.objects.get(pk=foo.pk)
+
+        self.assertTrue(first.delete())
+        self.assertFalse(second.delete())
+
+        # the stale instance is left untouched
+        self.assertIsNone(second.deleted_at)
+
+    def test_concurrent_restores_only_one_succeeds(self):
+        foo = Foo()
+        foo.save()
+        foo.delete()
+
+        first, second = Foo.objects_deleted.get(pk=foo.pk), Foo.objects_deleted.get(pk=foo.pk)
+
+        self.assertTrue(first.restore())
+        self.assertFalse(second.restore())
+
+    def test_delete_unsaved_object(self):
+        with self.assertRaises(ValueError):
+            Foo().delete()
+
+        with self.assertRaises(ValueError):
+            Foo().restore()
+
+
+class SoftDeletesSingleUpdateTestCase(TestCase):
+    def test_delete_updates_only_timestamps(self):
+        foo = FooModel.objects.create(name='foo')
+        updated_at = foo.updated_at
+
+        foo.name = 'not saved'
+
+        with CaptureQueriesContext(connection) as queries:
+            foo.delete()
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+
+        self.assertEqual(1, len(updates))
+        self.assertNotIn('"name"', updates[0])
+        self.assertIn('"deleted_at" IS NULL', updates[0])
+
+        foo.refresh_from_db()
+        self.assertEqual('foo', foo.name)
+        self.assertEqual(foo.deleted_at, foo.updated_at)
+        self.assertGreater(foo.updated_at, updated_at)
+
+    def test_restore_updates_only_timestamps(self):
+        foo = FooModel.objects.create(name='foo')
+        foo.delete()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.assertTrue(foo.restore())
+
+        updates = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+
+        self.assertEqual(1, len(updates))
+        self.assertIn('"deleted_at" IS NOT NULL', updates[0])
+        self.assertIsNone(foo.deleted_at)
@@ -0,0 +1,243 @@
+import hashlib
+
+from django.conf import settings
+from django.contrib import admin, messages
+from django.contrib.admin.options import get_content_type_for_model
+from django.core.cache import caches
+from django.core.exceptions import EmptyResultSet
+from django.utils.translation import gettext_lazy as _, ngettext
+from .archive import archive_model
+from . import counters
+
+
+def _cache():
+    # the cached counts live next to the row counters
+    return caches[getattr(settings, 'TIMESTAMPS__COUNTERS_CACHE', 'default')]
+
+
+class SoftDeletesListFilter(admin.SimpleListFilter):
+    """
+    Live (the default), deleted or all the rows. The choices aren't counted.
+    Models in archive mode only list their live rows: register their archive model to browse the deleted ones.
+    """
+    title = _('rows')
+    parameter_name = 'rows'
+
+    LIVE = 'live'
+    DELETED = 'deleted'
+    ALL = 'all'
+
+    # the manager listing the rows of each choice
+    MANAGERS = {LIVE: 'objects', DELETED: 'objects_deleted', ALL: 'objects_with_deleted'}
+
+    def lookups(self, request, model_admin):
+        if archive_model(model_admin.model) is not None:
+            return ()
+
+        return (self.DELETED, _('Deleted')), (self.ALL, _('All'))
+
+    def rows(self) -> str:
+        value = self.value()
+        return value if value in (self.DELETED, self.ALL) and self.has_output() else self.LIVE
+
+    def choices(self, changelist):
+        yield {
+            'selected': self.rows() == self.LIVE,
+            'query_string': changelist.get_query_string(remove=[self.parameter_name]),
+            'display': _('Live'),
+        }
+
+        for lookup, title in self.lookup_choices:
+            yield {
+                'selected': self.rows() == lookup,
+                'query_string': changelist.get_query_string({self.parameter_name: lookup}),
+                'display': title,
+            }
+
+    def queryset(self, request, queryset):
+        if not self.has_output():
+            return queryset
+
+        rows = self.rows()
+
+        if rows == self.LIVE:
+            return queryset.without_deleted()
+
+        if rows == self.DELETED:
+            return queryset.only_deleted()
+
+        return queryset
+
+
+class SoftDeletesAdmin(admin.ModelAdmin):
+    """
+    ModelAdmin of SoftDeletes models:
+    - lists the live, deleted or all the rows (SoftDeletesListFilter), and opens any of them;
+    - soft deletes, restores and hard deletes the selected rows with one bulk operation each
+      (instead of django's delete_selected, that loads the rows and their related objects),
+      and writes their LogEntry rows (history) with one INSERT;
+    - counts without COUNT(*) where possible: the row counters of Meta.soft_delete_counters
+      for the unfiltered lists, otherwise COUNT(*) cached for count_cache_timeout seconds.
+    """
+    list_filter_class = SoftDeletesListFilter
+
+    actions = ['soft_delete_selected', 'restore_selected', 'hard_delete_selected']
+
+    # a second COUNT(*) of the whole table on each page
+    show_full_result_count = False
+
+    # seconds a filtered COUNT(*) is cached (None: counted on each page)
+    count_cache_timeout = 60
+
+    def get_queryset(self, request):
+        # the filter selects the rows, so the change (and history) views open deleted rows too
+        if archive_model(self.model) is not None:
+            return super(SoftDeletesAdmin, self).get_queryset(request)
+
+        queryset = self.model.objects_with_deleted.get_queryset()
+        ordering = self.get_ordering(request)
+
+        if ordering:
+            queryset = queryset.order_by(*ordering)
+
+        return queryset
+
+    def get_list_filter(self, request):
+        return [self.list_filter_class, *super(SoftDeletesAdmin, self).get_list_filter(request)]
+
+    def get_actions(self, request):
+        actions = super(SoftDeletesAdmin, self).get_actions(request)
+        actions.pop('delete_selected', None)
+
+        if archive_model(self.model) is not None:
+            actions.pop('restore_selected', None)
+            actions.pop('hard_delete_selected', None)
+
+        return actions
+
+    def get_paginator(self, request, queryset, per_page, orphans=0, allow_empty_first_page=True):
+        paginator = super(SoftDeletesAdmin, self).get_paginator(
+            request, queryset, per_page, orphans, allow_empty_first_page
+        )
+
+        count = self.get_count(queryset)
+
+        # Paginator.count is a cached property: no COUNT(*)
+        if count is not None:
+            paginator.count = count
+
+        return paginator
+
+    def get_count(self, queryset):
+        """
+        Number of rows of the changelist, or None to count them.
+        """
+        count = self._counted(queryset)
+
+        if count is not None or not self.count_cache_timeout:
+            return count
+
+        try:
+            sql, params = queryset.query.sql_with_params()
+        except EmptyResultSet:
+            return None
+
+        digest = hashlib.md5(repr((sql, params)).encode()).hexdigest()
+        key = 'timestamps:admin_count:%s:%s:%s' % (queryset.db, self.model._meta.label_lower, digest)
+
+        cache = _cache()
+        count = cache.get(key)
+
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, timeout=self.count_cache_timeout)
+
+        return count
+
+    def _counted(self, queryset):
+        # only the rows of a manager, without search or any other filter
+        if not counters.is_counted(self.model):
+            return None
+
+        where = queryset.query.where
+
+        for name in SoftDeletesListFilter.MANAGERS.values():
+            manager = getattr(self.model, name).db_manager(queryset.db)
+
+            if manager.get_queryset().query.where == where:
+                return manager.fast_count()
+
+        return None
+
+    def _message(self, request, singular: str, plural: str, count: int) -> None:
+        self.message_user(request, ngettext(singular, plural, count) % {
+            'count': count,
+            'verbose_name': self.model._meta.verbose_name,
+            'verbose_name_plural': self.model._meta.verbose_name_plural,
+        }, messages.SUCCESS)
+
+    def _count(self, result) -> int:
+        # cascades and hard deletes return (total, rows per model)
+        if isinstance(result, tuple):
+            return result[1].get(self.model._meta.label, 0)
+
+        return result
+
+    def _log(self, request, objects, action_flag: int, message: str = '') -> None:
+        # what log_change / log_deletion write, for all the rows at once (they write one INSERT each)
+        from django.contrib.admin.models import LogEntry
+
+        content_type = get_content_type_for_model(self.model)
+
+        LogEntry.objects.bulk_create([
+            LogEntry(
+                user_id=request.user.pk,
+                content_type_id=content_type.pk,
+                object_id=str(obj.pk),
+                object_repr=str(obj)[:200],
+                action_flag=action_flag,
+                change_message=message,
+            )
+            for obj in objects
+        ])
+
+    def soft_delete_selected(self, request, queryset):
+        from django.contrib.admin.models import CHANGE
+
+        # the rows deleted by this action: the live ones (read before they move, in archive mode)
+        objects = list(queryset.without_deleted())
+        count = self._count(queryset.delete())
+        self._log(request, objects, CHANGE, 'Soft deleted.')
+        self._message(request, 'Deleted %(count)d %(verbose_name)s.', 'Deleted %(count)d %(verbose_name_plural)s.', count)
+
+    soft_delete_selected.allowed_permissions = ('delete',)
+    soft_delete_selected.short_description = _('Delete selected %(verbose_name_plural)s')
+
+    def restore_selected(self, request, queryset):
+        from django.contrib.admin.models import CHANGE
+
+        objects = list(queryset.only_deleted())
+        count = queryset.restore()
+        self._log(request, objects, CHANGE, 'Restored.')
+        self._message(request, 'Restored %(count)d %(verbose_name)s.', 'Restored %(count)d %(verbose_name_plural)s.', count)
+
+    restore_selected.allowed_permissions = ('delete',)
+    restore_selected.short_description = _('Restore selected %(verbose_name_plural)s')
+
+    def hard_delete_selected(self, request, queryset):
+        from django.contrib.admin.models import DELETION
+
+        # only the rows already soft deleted: deleting for good takes two steps, without a confirmation page
+        queryset = queryset.only_deleted()
+        objects = list(queryset)
+        count = self._count(queryset.delete(hard=True))
+        self._log(request, objects, DELETION)
+        self._message(
+            request,
+            'Permanently deleted %(count)d %(verbose_name)s.',
+            'Permanently deleted %(count)d %(verbose_name_plural)s.',
+            count,
+        )
+
+    hard_delete_selected.allowed_permissions = ('delete',)
+    hard_delete_selected.short_description = _('Permanently delete selected deleted %(verbose_name_plural)s')
@@ -0,0 +1,326 @@
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections, models, router, transaction
+from django.db.models import ProtectedError
+from django.db.models.sql import Query
+from .managers import ArchiveManager
+
+
+# rows moved per INSERT ... SELECT + DELETE pair (keeps IN lists under the database parameter limits)
+CHUNK_SIZE = 1000
+
+
+class ArchivedModel(models.Model):
+    """
+    Base class of the generated archive models, that keep the soft deleted rows
+    of a SoftDeletes model with Meta.soft_delete_archive = True.
+    """
+    archived_model = None
+
+    objects = ArchiveManager()
+
+    class Meta:
+        abstract = True
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        from .querysets import primary_db
+
+        instance = super(ArchivedModel, cls).from_db(db, field_names, values)
+        instance._state.db = primary_db(cls, db)
+        return instance
+
+    def delete(self, using=None, keep_parents: bool = False):
+        from .deletion import hard_deleted
+
+        using = using or router.db_for_write(type(self), instance=self)
+        pk = self.pk
+
+        result = super(ArchivedModel, self).delete(using, keep_parents)
+        hard_deleted(self.archived_model, using, result[1], deleted=1, pk=pk)
+
+        return result
+
+    def restore(self, using=None) -> bool:
+        return self._archived_instance().restore(using=using or router.db_for_write(type(self), instance=self))
+
+    async def arestore(self, using=None) -> bool:
+        return await self._archived_instance().arestore(using=using or router.db_for_write(type(self), instance=self))
+
+    def _archived_instance(self):
+        model = self.archived_model
+        return model(**{field.attname: getattr(self, field.attname) for field in model._meta.concrete_fields})
+
+
+def archive_model(model):
+    """
+    Returns the archive model of a SoftDeletes model, or None if it isn't in archive mode.
+    """
+    return getattr(model, '_archive_model', None)
+
+
+def deleted_rows(model, using=None):
+    """
+    Returns a queryset with the soft deleted rows of a model, wherever they are stored.
+    """
+    from .querysets import ArchiveQuerySet, SoftDeleteQuerySet
+
+    archive = archive_model(model)
+
+    if archive is not None:
+        return ArchiveQuerySet(archive, using=using)
+
+    return SoftDeleteQuerySet(model, using=using).only_deleted()
+
+
+def _archive_field(field):
+    # models aren't loaded yet: deconstructing a relation must not look up swappable models.
+    # the new field is swappable as usual, so its migrations still reference the setting.
+    swappable = getattr(field, 'swappable', None)
+
+    if swappable:
+        field.swappable = False
+
+    try:
+        name, path, args, kwargs = field.deconstruct()
+    finally:
+        if swappable:
+            field.swappable = swappable
+
+    field_class = field.__class__
+
+    if not field.primary_key:
+        # the same value can be soft deleted many times
+        kwargs.pop('unique', None)
+
+    # the primary key is always copied from the row of the model
+    kwargs.pop('auto_created', None)
+
+    if field.is_relation:
+        # archived rows don't need (or block) the related rows
+        kwargs.update(related_name='+', db_constraint=False)
+        kwargs.pop('related_query_name', None)
+
+        if isinstance(field, models.OneToOneField):
+            field_class = models.ForeignKey
+            kwargs.pop('parent_link', None)
+
+    return field_class(*args, **kwargs)
+
+
+def create_archive_model(model):
+    """
+    Generates the model of the archive table: same app, same columns, table suffixed with "_archive".
+    It's a regular model of the app, so makemigrations creates its table.
+    """
+    opts = model._meta
+
+    if opts.parents:
+        raise ImproperlyConfigured(
+            "%s: soft_delete_archive isn't supported with multi-table inheritance." % opts.label
+        )
+
+    attrs = {field.name: _archive_field(field) for field in opts.local_concrete_fields}
+
+    attrs.update({
+        '__module__': model.__module__,
+        'archived_model': model,
+        'Meta': type('Meta', (), {
+            'app_label': opts.app_label,
+            'db_table': '%s_archive' % opts.db_table,
+            'verbose_name': '%s (archive)' % opts.verbose_name,
+            'verbose_name_plural': '%s (archive)' % opts.verbose_name_plural,
+        }),
+    })
+
+    model._archive_model = type('%sArchive' % model.__name__, (ArchivedModel,), attrs)
+
+    return model._archive_model
+
+
+def referencing_rows(model, pks: list, using: str, cascade: bool = False):
+    """
+    Yields, per relation, the rows of other tables whose foreign key constraint points to these rows of the model:
+    moving the rows to the archive table would fail with an IntegrityError (on commit, where checks are deferred).
+    With cascade, the live rows of the SoftDeletes models in archive mode are moved along, so they don't count.
+    """
+    from .deletion import soft_delete_relations
+
+    cascaded = set(soft_delete_relations(model)) if cascade else set()
+
+    # hidden relations too: the foreign keys of the many to many tables
+    for relation in model._meta.get_fields(include_hidden=True):
+        if not (relation.auto_created and not relation.concrete and (relation.one_to_many or relation.one_to_one)):
+            continue
+
+        if not getattr(relation.field, 'db_constraint', True):
+            continue
+
+        related = relation.related_model
+
+        # the cascade moves the live rows of related models in archive mode (their deleted rows are archived already)
+        if relation in cascaded and archive_model(related) is not None:
+            continue
+
+        rows = related._base_manager.using(using)
+
+        for i in range(0, len(pks), CHUNK_SIZE):
+            chunk = rows.filter(**{'%s__in' % relation.field.name: pks[i:i + CHUNK_SIZE]})
+
+            # rows moved along with their parent
+            if related is model:
+                chunk = chunk.exclude(pk__in=pks)
+
+            if chunk.exists():
+                yield relation, chunk
+                break
+
+
+def missing_parents(archive, pks: list, using: str):
+    """
+    Yields, per foreign key of the archived model, the archived rows (of these primary keys)
+    whose parent isn't in the parent's table (e.g. it's archived too):
+    moving them back would fail with an IntegrityError (on commit, where checks are deferred).
+    """
+    model = archive.archived_model
+    rows = archive._base_manager.using(using)
+
+    for field in model._meta.concrete_fields:
+        if not field.is_relation or not field.db_constraint:
+            continue
+
+        target = field.target_field.attname
+
+        for i in range(0, len(pks), CHUNK_SIZE):
+            chunk = rows.filter(pk__in=pks[i:i + CHUNK_SIZE]).exclude(**{'%s__isnull' % field.attname: True})
+            values = set(chunk.values_list(field.attname, flat=True))
+
+            # parents restored along with their children
+            if field.related_model is model and field.target_field.primary_key:
+                values.difference_update(pks)
+
+            if not values:
+                continue
+
+            found = field.related_model._base_manager.using(using).filter(**{'%s__in' % target: values})
+            missing = values.difference(found.values_list(target, flat=True))
+
+            if missing:
+                yield field, chunk.filter(**{'%s__in' % field.attname: missing})
+                break
+
+
+def move_rows(queryset, target, using: str, check=None, **values) -> int:
+    """
+    Moves the rows of the queryset to the table of the target model:
+    INSERT INTO target (...) SELECT ... FROM source WHERE pk IN (...) followed by
+    DELETE FROM source WHERE pk IN (...), for each chunk of rows.
+    Values override the selected columns (e.g. deleted_at).
+    `check` is called with the primary keys of the rows before they're moved.
+    """
+    source = queryset.model
+    connection = connections[using]
+    quote = connection.ops.quote_name
+    pk_field = source._meta.pk
+
+    compiler = Query(source).get_compiler(using=using)
+
+    columns, select, select_params = [], [], []
+
+    for field in source._meta.local_concrete_fields:
+        columns.append(quote(field.column))
+
+        if field.attname not in values:
+            select.append(quote(field.column))
+            continue
+
+        value = values[field.attname]
+
+        # expressions (e.g. updated_at=Now()) are evaluated by the INSERT ... SELECT
+        if hasattr(value, 'resolve_expression'):
+            sql, params = compiler.compile(value.resolve_expression(compiler.query))
+            select.append(sql)
+            select_params.extend(params)
+        else:
+            select.append('%s')
+            select_params.append(field.get_db_prep_save(value, connection))
+
+    insert_sql = 'INSERT INTO %s (%s) SELECT %s FROM %s WHERE %s IN ({pks})' % (
+        quote(target._meta.db_table),
+        ', '.join(columns),
+        ', '.join(select),
+        quote(source._meta.db_table),
+        quote(pk_field.column),
+    )
+
+    delete_sql = 'DELETE FROM %s WHERE %s IN ({pks})' % (
+        quote(source._meta.db_table),
+        quote(pk_field.column),
+    )
+
+    count = 0
+
+    with transaction.atomic(using=using):
+        # locks the rows, so concurrent moves of the same rows don't both succeed
+        pks = list(queryset.using(using).select_for_update().values_list('pk', flat=True))
+
+        if check is not None and pks:
+            check(pks)
+
+        with connection.cursor() as cursor:
+            for i in range(0, len(pks), CHUNK_SIZE):
+                chunk = [pk_field.get_db_prep_value(value, connection) for value in pks[i:i + CHUNK_SIZE]]
+                placeholders = ', '.join(['%s'] * len(chunk))
+
+                cursor.execute(insert_sql.replace('{pks}', placeholders), [*select_params, *chunk])
+                cursor.execute(delete_sql.replace('{pks}', placeholders), chunk)
+
+                count += cursor.rowcount
+
+    return count
+
+
+def archive_rows(queryset, using: str, cascade: bool = False, **values) -> int:
+    """
+    Moves the rows to the archive table. Raises ProtectedError (and moves nothing) if rows of other tables
+    still reference them with a foreign key constraint.
+    """
+    from .deletion import soft_delete_relations
+
+    model = queryset.model
+
+    def check(pks):
+        for relation, rows in referencing_rows(model, pks, using, cascade):
+            # the cascade only moves the rows of SoftDeletes models in archive mode
+            if not cascade and relation in soft_delete_relations(model) and archive_model(relation.related_model):
+                hint = 'soft delete them with cascade=True, or use db_constraint=False'
+            else:
+                hint = 'hard delete them or change their foreign key first, or use db_constraint=False'
+
+            raise ProtectedError(
+                "Cannot soft delete some instances of model '%s' in archive mode because they are referenced "
+                "through the foreign key '%s.%s': %s."
+                % (model.__name__, relation.related_model.__name__, relation.field.name, hint),
+                set(rows[:100]),
+            )
+
+    return move_rows(queryset, archive_model(model), using, check=check, **values)
+
+
+def restore_rows(queryset, using: str, **values) -> int:
+    """
+    Moves the rows back to the table of the model. Raises ProtectedError (and moves nothing)
+    if the parents they reference with a foreign key constraint aren't in their table (e.g. archived too).
+    """
+    archive = queryset.model
+    model = archive.archived_model
+
+    def check(pks):
+        for field, rows in missing_parents(archive, pks, using):
+            raise ProtectedError(
+                "Cannot restore some instances of model '%s' because the rows of '%s' they reference "
+                "through the foreign key '%s' aren't in its table: restore them first."
+                % (model.__name__, field.related_model.__name__, field.name),
+                set(rows[:100]),
+            )
+
+    return move_rows(queryset, model, using, check=check, **values)
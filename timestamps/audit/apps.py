@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+
+
+class AuditConfig(AppConfig):
+    name = 'timestamps.audit'
+    label = 'timestamps_audit'
+    verbose_name = 'Soft delete audit'
+    default_auto_field = 'django.db.models.BigAutoField'
+
+    def ready(self):
+        from .receivers import connect_receivers
+
+        connect_receivers()
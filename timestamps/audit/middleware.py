@@ -0,0 +1,15 @@
+from .writer import actor
+
+
+class AuditActorMiddleware:
+    """
+    Records the user of the request as the actor of its audit events (after AuthenticationMiddleware).
+    The user is only looked up when an event is recorded: requests that don't delete anything don't load it,
+    and users authenticated by the view (e.g. DRF's token authentication, which sets request.user) are seen.
+    """
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with actor(lambda: getattr(request, 'user', None)):
+            return self.get_response(request)
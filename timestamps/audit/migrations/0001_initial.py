@@ -0,0 +1,33 @@
+# Generated by Django 4.2.30 on 2026-10-18 09:19
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AuditEvent',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('action', models.CharField(choices=[('soft_delete', 'soft delete'), ('restore', 'restore'), ('hard_delete', 'hard delete')], max_length=16, verbose_name='action')),
+                ('model', models.CharField(max_length=255, verbose_name='model')),
+                ('pks', models.JSONField(encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='primary keys')),
+                ('count', models.PositiveIntegerField(verbose_name='count')),
+                ('actor', models.CharField(blank=True, max_length=255, verbose_name='actor')),
+                ('using', models.CharField(max_length=255, verbose_name='database')),
+                ('created_at', models.DateTimeField(verbose_name='created_at')),
+            ],
+            options={
+                'verbose_name': 'audit event',
+                'verbose_name_plural': 'audit events',
+                'indexes': [models.Index(fields=['model', 'created_at'], name='timestamps__model_de296a_idx'), models.Index(fields=['created_at'], name='timestamps__created_c7f16a_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,44 @@
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class AuditEvent(models.Model):
+    """
+    One soft delete, restore or hard delete: of an object, or of a batch of rows of a bulk operation.
+    Append-only: rows are inserted in batches by the audit writer (see timestamps.audit.writer).
+    """
+    SOFT_DELETE = 'soft_delete'
+    RESTORE = 'restore'
+    HARD_DELETE = 'hard_delete'
+
+    ACTIONS = [
+        (SOFT_DELETE, _('soft delete')),
+        (RESTORE, _('restore')),
+        (HARD_DELETE, _('hard delete')),
+    ]
+
+    action = models.CharField(max_length=16, choices=ACTIONS, verbose_name=_('action'))
+    model = models.CharField(max_length=255, verbose_name=_('model'))  # app_label.ModelName
+    pks = models.JSONField(encoder=DjangoJSONEncoder, verbose_name=_('primary keys'))
+    count = models.PositiveIntegerField(verbose_name=_('count'))
+    actor = models.CharField(max_length=255, blank=True, verbose_name=_('actor'))
+    using = models.CharField(max_length=255, verbose_name=_('database'))
+    created_at = models.DateTimeField(verbose_name=_('created_at'))
+
+    class Meta:
+        verbose_name = _('audit event')
+        verbose_name_plural = _('audit events')
+        indexes = [
+            models.Index(fields=['model', 'created_at']),
+            models.Index(fields=['created_at']),
+        ]
+
+    def __str__(self):
+        return '%s %s (%d) at %s' % (self.action, self.model, self.count, self.created_at)
+
+    def save(self, *args, **kwargs):
+        if not self._state.adding:
+            raise ValueError('Audit events are append-only.')
+
+        super(AuditEvent, self).save(*args, **kwargs)
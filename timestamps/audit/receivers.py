@@ -0,0 +1,52 @@
+from django.apps import apps
+from django.db.models.signals import post_delete
+
+from timestamps import signals
+from .models import AuditEvent
+from .writer import record
+
+
+def _soft_deleted(sender, instance, using, **kwargs):
+    record(AuditEvent.SOFT_DELETE, sender, [instance.pk], using)
+
+
+def _restored(sender, instance, using, **kwargs):
+    record(AuditEvent.RESTORE, sender, [instance.pk], using)
+
+
+def _bulk_soft_deleted(sender, pks, using, **kwargs):
+    record(AuditEvent.SOFT_DELETE, sender, pks, using)
+
+
+def _bulk_restored(sender, pks, using, **kwargs):
+    record(AuditEvent.RESTORE, sender, pks, using)
+
+
+def _hard_deleted(sender, instance, using, **kwargs):
+    # rows hard deleted from the archive table are rows of the archived model
+    record(AuditEvent.HARD_DELETE, getattr(sender, 'archived_model', None) or sender, [instance.pk], using)
+
+
+def connect_receivers() -> None:
+    """
+    Connects the receivers to the models with Meta.soft_delete_audit = True (and their archive models) only:
+    a post_delete receiver keeps Django from fast deleting the rows of its model,
+    and bulk signal receivers make bulk operations read the primary keys of their rows.
+    """
+    from timestamps.archive import archive_model
+    from timestamps.models import SoftDeletes
+
+    for model in apps.get_models():
+        if not issubclass(model, SoftDeletes) or not getattr(model._meta, 'soft_delete_audit', False):
+            continue
+
+        signals.post_soft_delete.connect(_soft_deleted, sender=model)
+        signals.post_restore.connect(_restored, sender=model)
+        signals.post_bulk_soft_delete.connect(_bulk_soft_deleted, sender=model)
+        signals.post_bulk_restore.connect(_bulk_restored, sender=model)
+        post_delete.connect(_hard_deleted, sender=model)
+
+        archive = archive_model(model)
+
+        if archive is not None:
+            post_delete.connect(_hard_deleted, sender=archive)
@@ -0,0 +1,197 @@
+import atexit
+import logging
+import threading
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+
+logger = logging.getLogger('timestamps.audit')
+
+_actor = ContextVar('timestamps_audit_actor', default=None)
+
+
+def _actor_id(user) -> str:
+    # a callable (e.g. the user of the request) is only called when an event is recorded
+    if callable(user):
+        user = user()
+
+    if user is None or not getattr(user, 'is_authenticated', True):
+        return ''
+
+    return str(getattr(user, 'pk', user))
+
+
+@contextmanager
+def actor(user):
+    """
+    The user (or any identifier) recorded as the actor of the events of the block,
+    or a callable returning it, called when an event is recorded.
+    """
+    token = _actor.set(user)
+
+    try:
+        yield
+    finally:
+        _actor.reset(token)
+
+
+class _Event:
+    __slots__ = ('action', 'model', 'using', 'actor', 'pks', 'created_at')
+
+    def __init__(self, action: str, model: str, using: str, pks: list):
+        self.action, self.model, self.using, self.actor = action, model, using, _actor_id(_actor.get())
+        self.pks = list(pks)
+        self.created_at = timezone.now()
+
+    def key(self) -> tuple:
+        return self.action, self.model, self.using, self.actor
+
+
+class Writer:
+    """
+    Buffers the audit events, and inserts them with bulk_create():
+    - events recorded in a transaction are only buffered once it commits (a rollback drops them);
+    - consecutive events of the same action, model, database and actor committed together are merged
+      (e.g. the rows of a hard delete), up to TIMESTAMPS__AUDIT_MAX_PKS primary keys per event;
+    - the buffer is written when it holds TIMESTAMPS__AUDIT_BUFFER_SIZE events,
+      TIMESTAMPS__AUDIT_FLUSH_INTERVAL seconds after its first event (by a timer thread), and at exit.
+    When writing fails, the error is logged and the events are kept for the next flush.
+    Buffered events are lost if the process dies: lower the thresholds for a stricter trail.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._buffer = []
+        self._timer = None
+
+    def record(self, action: str, model, pks, using: str) -> None:
+        pks = list(pks)
+
+        if not pks:
+            return
+
+        event = _Event(action, model._meta.label, using, pks)
+
+        # the commit hooks of a transaction run one after the other, without recording anything in between:
+        # an event is only merged into the event buffered just before it, by the same commit
+        self._local.last = None
+
+        if not transaction.get_connection(using).in_atomic_block:
+            self._buffer_event(event)
+            return
+
+        transaction.on_commit(lambda: self._buffer_event(event, merge=True), using=using)
+
+    def _buffer_event(self, event: _Event, merge: bool = False) -> None:
+        max_pks = getattr(settings, 'TIMESTAMPS__AUDIT_MAX_PKS', 1000)
+        interval = getattr(settings, 'TIMESTAMPS__AUDIT_FLUSH_INTERVAL', 1.0)
+
+        with self._lock:
+            last = getattr(self._local, 'last', None) if merge else None
+
+            if (
+                last is not None
+                and self._buffer and self._buffer[-1] is last
+                and last.key() == event.key()
+                and len(last.pks) + len(event.pks) <= max_pks
+            ):
+                last.pks.extend(event.pks)
+            else:
+                self._buffer.append(event)
+                last = event
+
+            self._local.last = last
+            size = len(self._buffer)
+
+            if interval is not None and self._timer is None:
+                self._timer = threading.Timer(interval, self._flush_from_timer)
+                self._timer.daemon = True
+                self._timer.start()
+
+        if size >= getattr(settings, 'TIMESTAMPS__AUDIT_BUFFER_SIZE', 100):
+            # runs in the commit hooks of the caller: its transaction is committed already, don't raise into it
+            self._flush_and_log()
+
+    def _flush_and_log(self) -> None:
+        try:
+            self.flush()
+        except Exception:
+            logger.exception('Writing the audit events failed: they are kept for the next flush.')
+
+    def _flush_from_timer(self) -> None:
+        with self._lock:
+            self._timer = None
+
+        try:
+            self._flush_and_log()
+        finally:
+            # the connections of the timer thread aren't reused
+            connections.close_all()
+
+    def flush(self) -> int:
+        """
+        Writes the buffered events. Returns the number of events written.
+        If writing fails, the events are put back in the buffer and the error is raised.
+        """
+        from .models import AuditEvent
+
+        with self._lock:
+            events, self._buffer = self._buffer, []
+
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+
+        if not events:
+            return 0
+
+        rows = [
+            AuditEvent(
+                action=event.action,
+                model=event.model,
+                pks=event.pks,
+                count=len(event.pks),
+                actor=event.actor,
+                using=event.using,
+                created_at=event.created_at,
+            )
+            for event in events
+        ]
+
+        try:
+            AuditEvent.objects.using(router.db_for_write(AuditEvent)).bulk_create(rows)
+        except Exception:
+            with self._lock:
+                # before the events buffered in the meantime
+                self._buffer[:0] = events
+
+            raise
+
+        return len(rows)
+
+    def clear(self) -> None:
+        """Drops the buffered events (e.g. between tests)."""
+        with self._lock:
+            self._buffer = []
+
+        self._local.last = None
+
+
+writer = Writer()
+
+
+def record(action: str, model, pks, using: str) -> None:
+    writer.record(action, model, pks, using)
+
+
+def flush() -> int:
+    return writer.flush()
+
+
+@atexit.register
+def _flush_at_exit():
+    writer._flush_and_log()
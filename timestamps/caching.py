@@ -0,0 +1,97 @@
+import hashlib
+import uuid
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models.signals import post_save
+
+from . import signals
+
+
+def _cache():
+    return caches[getattr(settings, 'TIMESTAMPS__RETRIEVE_CACHE', 'default')]
+
+
+def is_cached(model) -> bool:
+    return getattr(model._meta, 'soft_delete_cache', False)
+
+
+def _model_key(model) -> str:
+    return 'timestamps:retrieve:%s' % model._meta.label_lower
+
+
+def _object_key(model, pk) -> str:
+    return '%s:%s' % (_model_key(model), pk)
+
+
+def _token(cache, key: str, tokens: dict) -> str:
+    value = tokens.get(key)
+
+    if value is None:
+        cache.add(key, uuid.uuid4().hex, timeout=None)
+        value = cache.get(key)
+
+    return value
+
+
+def lookup(model, pk, variant: str):
+    """
+    Returns (data, state): the cached data of an object (None if it isn't cached, or not valid anymore),
+    and the versions to give to store() when it's not.
+    The data is valid while the version of its object (changed by each write of the object)
+    and the version of its model (changed by each bulk write) are the ones it was stored with:
+    one cache round trip, no database query.
+    """
+    cache = _cache()
+    model_key, object_key = '%s:version' % _model_key(model), '%s:version' % _object_key(model, pk)
+    data_key = '%s:%s' % (_object_key(model, pk), hashlib.md5(variant.encode()).hexdigest())
+
+    values = cache.get_many([model_key, object_key, data_key])
+    cached = values.get(data_key)
+
+    if cached is not None and cached[:2] == (values.get(model_key), values.get(object_key)):
+        return cached[2], None
+
+    # the versions are read before the database: a write in the meantime makes the stored data invalid
+    return None, (data_key, _token(cache, model_key, values), _token(cache, object_key, values))
+
+
+def store(state, data) -> None:
+    data_key, model_version, object_version = state
+    timeout = getattr(settings, 'TIMESTAMPS__RETRIEVE_CACHE_TIMEOUT', 300)
+
+    _cache().set(data_key, (model_version, object_version, data), timeout=timeout)
+
+
+def _new_version(key: str, using: str) -> None:
+    cache = _cache()
+    cache.set(key, uuid.uuid4().hex, timeout=None)
+
+    # a read of the old row (before this transaction commits) may have been cached in the meantime
+    transaction.on_commit(lambda: cache.set(key, uuid.uuid4().hex, timeout=None), using=using)
+
+
+def invalidate(model, pk, using: str) -> None:
+    if is_cached(model):
+        _new_version('%s:version' % _object_key(model, pk), using)
+
+
+def invalidate_model(model, using: str) -> None:
+    """Invalidates every cached object of the model (bulk writes don't know their rows)."""
+    if is_cached(model):
+        _new_version('%s:version' % _model_key(model), using)
+
+
+def _instance_changed(sender, instance, using, **kwargs):
+    invalidate(sender, instance.pk, using)
+
+
+def contribute_cache(model) -> None:
+    """
+    Invalidates the cached objects of a model with Meta.soft_delete_cache = True when they change:
+    saves, soft deletes and restores (bulk ones invalidate the whole model).
+    Hard deletes invalidate them directly: a post_delete receiver would keep django from fast deleting the rows.
+    """
+    for signal in (post_save, signals.pre_soft_delete, signals.post_soft_delete, signals.post_restore):
+        signal.connect(_instance_changed, sender=model)
@@ -0,0 +1,117 @@
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.db.models import Count, Q
+from django.db.models.signals import post_save
+
+
+def _cache():
+    return caches[getattr(settings, 'TIMESTAMPS__COUNTERS_CACHE', 'default')]
+
+
+def _key(model, using: str, deleted: bool) -> str:
+    return 'timestamps:count:%s:%s:%s' % (using, model._meta.label_lower, 'deleted' if deleted else 'live')
+
+
+def is_counted(model) -> bool:
+    return getattr(model._meta, 'soft_delete_counters', False)
+
+
+def add(model, using: str, live: int = 0, deleted: int = 0) -> None:
+    """
+    Adds to the live and deleted row counters of a model, once the transaction is committed
+    (so a rollback doesn't change them). Counters that aren't cached yet are left alone:
+    they are counted on the next fast_count().
+    """
+    if not is_counted(model) or not (live or deleted):
+        return
+
+    def apply():
+        cache = _cache()
+
+        for is_deleted, delta in ((False, live), (True, deleted)):
+            if not delta:
+                continue
+
+            try:
+                cache.incr(_key(model, using, is_deleted), delta)
+            except ValueError:
+                pass
+
+    transaction.on_commit(apply, using=using)
+
+
+def rows_moved(model, using: str, count: int, deleted: bool) -> None:
+    """Rows soft deleted (deleted=True) or restored."""
+    if deleted:
+        add(model, using, live=-count, deleted=count)
+    else:
+        add(model, using, live=count, deleted=-count)
+
+
+def count_rows(model, using: str, deleted: bool) -> int:
+    from .archive import deleted_rows
+    from .querysets import SoftDeleteQuerySet
+
+    if deleted:
+        return deleted_rows(model, using).count()
+
+    return SoftDeleteQuerySet(model, using=using).without_deleted().count()
+
+
+def get_count(model, using: str, deleted: bool) -> int:
+    cache = _cache()
+    key = _key(model, using, deleted)
+    value = cache.get(key)
+
+    if value is None:
+        value = count_rows(model, using, deleted)
+        cache.add(key, value, timeout=None)
+
+    return value
+
+
+def set_count(model, using: str, deleted: bool, value: int) -> None:
+    _cache().set(_key(model, using, deleted), value, timeout=None)
+
+
+def _created(sender, instance, created, using, **kwargs):
+    if not created:
+        return
+
+    if instance.deleted_at is None:
+        add(sender, using, live=1)
+    else:
+        add(sender, using, deleted=1)
+
+
+def count_before_delete(queryset) -> tuple:
+    """
+    (live, deleted) rows of a queryset about to be hard deleted, with one conditional aggregate.
+    """
+    counts = queryset.aggregate(
+        live=Count('pk', filter=Q(deleted_at__isnull=True)),
+        deleted=Count('pk', filter=Q(deleted_at__isnull=False)),
+    )
+
+    return counts['live'], counts['deleted']
+
+
+def reset(model, using: str) -> None:
+    """
+    Forgets the counters of a model once the transaction is committed: they are counted on the next fast_count().
+    """
+    if not is_counted(model):
+        return
+
+    keys = [_key(model, using, False), _key(model, using, True)]
+    transaction.on_commit(lambda: _cache().delete_many(keys), using=using)
+
+
+def contribute_counters(model) -> None:
+    """
+    Keeps the counters of a model with Meta.soft_delete_counters = True up to date on creates
+    (bulk creates, soft deletes, restores and hard deletes update them directly). There's no post_delete receiver:
+    it would keep django from fast deleting the rows.
+    """
+    post_save.connect(_created, sender=model)
@@ -0,0 +1,31 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+
+
+def encode_cursor(*values) -> str:
+    """
+    Encodes the position of a row (e.g. its timestamp and primary key) into an opaque cursor.
+    """
+    values = [value.isoformat() if isinstance(value, datetime) else str(value) for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor: str, fields: list) -> list:
+    """
+    Decodes a cursor made with encode_cursor(), converting each value with the given model fields.
+    Raises ValueError when the cursor is invalid.
+    """
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, UnicodeError, ValueError) as e:
+        raise ValueError('Invalid cursor.') from e
+
+    if not isinstance(values, list) or len(values) != len(fields):
+        raise ValueError('Invalid cursor.')
+
+    try:
+        return [field.to_python(value) for field, value in zip(fields, values)]
+    except Exception as e:
+        raise ValueError('Invalid cursor.') from e
@@ -0,0 +1,113 @@
+from collections import Counter, deque
+from django.apps import apps
+from django.db.models import CASCADE
+from . import caching, counters, signals
+
+
+def soft_delete_relations(model):
+    """
+    Reverse relations of a model whose rows must be soft deleted along with it:
+    foreign keys with on_delete=CASCADE from other SoftDeletes models.
+    """
+    from .models import SoftDeletes
+
+    for relation in model._meta.related_objects:
+        if relation.many_to_many or relation.on_delete is not CASCADE:
+            continue
+
+        if issubclass(relation.related_model, SoftDeletes):
+            yield relation
+
+
+def cascade_soft_delete(model, deleted_at, using: str, pks=None) -> Counter:
+    """
+    Walks the relation graph the same way django's Collector does,
+    but without loading any object: each relation costs one
+    UPDATE child SET deleted_at = ... WHERE fk IN (SELECT pk FROM parent WHERE deleted_at = ...)
+    Children with bulk signal receivers are sent the bulk signals, as any bulk soft delete
+    (their primary keys are read first).
+
+    The rows of `model` must already be soft deleted with `deleted_at`,
+    which is the stamp used to find the parents of each level.
+    Self-referencing (and cyclic) relations are walked until no more rows are updated.
+
+    Returns the number of related rows soft deleted, per model label.
+    """
+    from .archive import deleted_rows
+    from .querysets import SoftDeleteQuerySet
+
+    deleted = Counter()
+
+    queue = deque([(model, pks)])
+    queued = {model}
+
+    while queue:
+        parent, parent_pks = queue.popleft()
+        queued.discard(parent)
+
+        parents = deleted_rows(parent, using).filter(deleted_at=deleted_at)
+
+        if parent_pks is not None:
+            parents = parents.filter(pk__in=parent_pks)
+
+        for relation in soft_delete_relations(parent):
+            child, field = relation.related_model, relation.field
+
+            children = SoftDeleteQuerySet(child, using=using).without_deleted().filter(**{
+                '%s__in' % field.attname: parents.values(field.target_field.attname),
+            })
+
+            count = children._update_sending_signals(
+                signals.pre_bulk_soft_delete,
+                signals.post_bulk_soft_delete,
+                cascade=True,
+                deleted_at=deleted_at
+            )
+
+            if not count:
+                continue
+
+            deleted[child._meta.label] += count
+
+            if child not in queued:
+                queue.append((child, None))
+                queued.add(child)
+
+    return deleted
+
+
+def hard_deleted(model, using: str, per_model: dict, live: int = 0, deleted: int = 0, pk=None) -> None:
+    """
+    Updates the row counters and the retrieve cache after a hard delete of rows of a SoftDeletes model
+    (live and deleted rows, counted before the DELETE; pk: the deleted instance).
+    The other models of per_model (rows deleted by cascade, whose state is unknown) have their counters reset.
+    """
+    from .archive import archive_model
+
+    archive = archive_model(model)
+    labels = {model._meta.label, archive._meta.label if archive is not None else None}
+
+    for label, count in per_model.items():
+        if not count:
+            continue
+
+        if label in labels:
+            related = model
+        else:
+            try:
+                related = apps.get_model(label)
+            except LookupError:
+                # models outside the app registry (e.g. in tests) have neither counters nor cache
+                continue
+
+            related = getattr(related, 'archived_model', None) or related
+
+        if related is model and count == live + deleted:
+            counters.add(model, using, live=-live, deleted=-deleted)
+        else:
+            counters.reset(related, using)
+
+        if related is model and pk is not None and count == 1:
+            caching.invalidate(model, pk, using)
+        else:
+            caching.invalidate_model(related, using)
@@ -1,35 +1,349 @@
-import aspectlib
+import csv
+import json
+from collections import Counter
+from functools import lru_cache
 
 from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured, ValidationError as DjangoValidationError
+from django.db import router, transaction
+from django.db.models.lookups import IsNull
+from django.http import StreamingHttpResponse
 from rest_framework import status, mixins
-from rest_framework.generics import GenericAPIView
-from rest_framework.mixins import ListModelMixin, RetrieveModelMixin
+from rest_framework.exceptions import ValidationError
+from rest_framework.fields import DateTimeField, IntegerField
+from rest_framework.permissions import BasePermission
+from rest_framework.renderers import JSONRenderer
+from rest_framework.mixins import ListModelMixin
 from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
 
-from timestamps.drf.utils import is_hard_delete_request
+from timestamps.drf.pagination import DeletedPagination, WithDeletedPagination
+from timestamps.drf.renderers import FastJSONRenderer
+from timestamps.drf.utils import (
+    add_validators,
+    conditional_response,
+    instance_validators,
+    is_hard_delete_request,
+    queryset_validators,
+)
+from timestamps.drf.values import serialize_values, values_columns, values_plan
+from timestamps import caching
+from timestamps.archive import archive_model
+from timestamps.querysets import SoftDeleteQuerySet
 
 
-class ListDeletedModelMixin:
+class SoftDeleteQuerySetMixin:
+    """
+    Base of the soft delete mixins: get_queryset() returns the deleted rows
+    (or all of them) for the actions of the mixins used by the view.
+    The transform of each action is looked up in a table built once per view class,
+    so other actions (and views without these mixins) pay nothing.
+    """
+    def get_queryset(self):
+        queryset = super(SoftDeleteQuerySetMixin, self).get_queryset()
+        transform = _queryset_transforms(type(self)).get(getattr(self, 'action', None))
+
+        if transform is None:
+            return queryset
+
+        return transform(self, queryset)
+
+
+def _list(view, request, pagination_class, *args, **kwargs):
+    # the view's pagination_class is kept for the other listings
+    if pagination_class is not None:
+        view._paginator = pagination_class()
+
+    validators = None
+
+    if getattr(view, 'conditional_get', False):
+        validators = queryset_validators(request, view.filter_queryset(view.get_queryset()))
+        response = conditional_response(request, validators)
+
+        if response is not None:
+            return response
+
+    response = _fast_list(view, request) if getattr(view, 'fast_list', False) else None
+
+    if response is None:
+        response = ListModelMixin.list(view, request, *args, **kwargs)
+
+    return add_validators(response, validators)
+
+
+def _fast_list(view, request):
+    """
+    ListModelMixin.list() without model instances: the columns of the serializer's fields are read with values(),
+    converted column by column, and rendered with FastJSONRenderer (orjson, when it's installed).
+    Returns None when the serializer needs the objects (see values_plan()).
+    """
+    plan = values_plan(view.get_serializer())
+
+    if plan is None:
+        return None
+
+    queryset = view.filter_queryset(view.get_queryset())
+
+    # values() isn't supported after union() (e.g. with_deleted in archive mode)
+    if queryset.query.combinator:
+        return None
+
+    # the paginations also read the columns of their ordering from the rows (e.g. the cursor of the next page)
+    columns = values_columns(plan)
+    ordering = getattr(view.paginator, 'ordering', None) or ()
+    names = {field.name for field in queryset.model._meta.get_fields()} | {'pk'}
+
+    for name in [ordering] if isinstance(ordering, str) else ordering:
+        name = name.lstrip('-')
+
+        if name in names and name not in columns:
+            columns.append(name)
+
+    rows = queryset.values(*columns)
+    page = view.paginate_queryset(rows)
+
+    if page is None:
+        response = Response(serialize_values(plan, list(rows)))
+    else:
+        response = view.get_paginated_response(serialize_values(plan, list(page)))
+
+    if type(request.accepted_renderer) is JSONRenderer:
+        request.accepted_renderer = FastJSONRenderer()
+
+    return response
+
+
+class ListDeletedModelMixin(SoftDeleteQuerySetMixin):
+    deleted_pagination_class = DeletedPagination
+
     def list_deleted(self, request, *args, **kwargs):
-        return ListModelMixin.list(self, request, *args, **kwargs)
+        return _list(self, request, self.deleted_pagination_class, *args, **kwargs)
 
 
-class ListWithDeletedModelMixin:
+class ListWithDeletedModelMixin(SoftDeleteQuerySetMixin):
+    with_deleted_pagination_class = WithDeletedPagination
+
     def list_with_deleted(self, request, *args, **kwargs):
-        return ListModelMixin.list(self, request, *args, **kwargs)
+        return _list(self, request, self.with_deleted_pagination_class, *args, **kwargs)
+
+
+class _Echo:
+    # file-like object for csv.writer: returns the line instead of buffering it
+    def write(self, value):
+        return value
+
+
+def _export_ndjson(rows):
+    encoder = JSONEncoder()
+
+    for row in rows:
+        yield encoder.encode(row) + '\n'
+
+
+def _export_csv(rows):
+    writer = csv.writer(_Echo())
+    header = None
+
+    for row in rows:
+        if header is None:
+            header = list(row)
+            yield writer.writerow(header)
+
+        yield writer.writerow([
+            json.dumps(row[key], cls=JSONEncoder) if isinstance(row[key], (dict, list)) else row[key]
+            for key in header
+        ])
+
+
+EXPORT_TYPES = {
+    'ndjson': ('application/x-ndjson', _export_ndjson),
+    'csv': ('text/csv', _export_csv),
+}
+
+
+def _export(view, request, name: str):
+    """
+    Streams the rows of the queryset: they're read in chunks (QuerySet.iterator()) and serialized one by one,
+    so memory stays flat whatever the number of rows.
+    The type is chosen by ?type=ndjson|csv (DRF keeps ?format for the renderers).
+    """
+    export_type = request.query_params.get('type', 'ndjson')
+
+    if export_type not in EXPORT_TYPES:
+        raise ValidationError({'type': ['Expected one of: %s.' % ', '.join(EXPORT_TYPES)]})
+
+    content_type, export = EXPORT_TYPES[export_type]
+
+    queryset = view.filter_queryset(view.get_queryset())
+    serializer = view.get_serializer()
+    chunk_size = getattr(settings, 'TIMESTAMPS__EXPORT_CHUNK_SIZE', 2000)
+
+    rows = (serializer.to_representation(row) for row in queryset.iterator(chunk_size=chunk_size))
+
+    response = StreamingHttpResponse(export(rows), content_type=content_type)
+    response['Content-Disposition'] = 'attachment; filename="%s-%s.%s"' % (
+        queryset.model._meta.model_name,
+        name,
+        export_type,
+    )
+
+    return response
+
+
+class ExportDeletedModelMixin(SoftDeleteQuerySetMixin):
+    def export_deleted(self, request, *args, **kwargs):
+        return _export(self, request, 'deleted')
+
+
+class ExportWithDeletedModelMixin(SoftDeleteQuerySetMixin):
+    def export_with_deleted(self, request, *args, **kwargs):
+        return _export(self, request, 'with-deleted')
+
 
+def _cached_pk(view, model, kwargs):
+    if not getattr(view, 'retrieve_cache', False):
+        return None
 
-class RetrieveDeletedModelMixin:
+    if not caching.is_cached(model):
+        raise ImproperlyConfigured(
+            '%s.retrieve_cache needs Meta.soft_delete_cache = True on %s' % (type(view).__name__, model._meta.label)
+        )
+
+    # the cached objects are invalidated by pk
+    if view.lookup_field not in ('pk', model._meta.pk.name):
+        return None
+
+    # object permissions need the object: they can't be checked against a cached response
+    for permission in view.get_permissions():
+        if type(permission).has_object_permission is not BasePermission.has_object_permission:
+            return None
+
+    try:
+        return model._meta.pk.to_python(kwargs[view.lookup_url_kwarg or view.lookup_field])
+    except DjangoValidationError:
+        return None
+
+
+def _retrieve(view, request, *args, **kwargs):
+    """
+    RetrieveModelMixin.retrieve(), reading through the cache when the view has retrieve_cache = True,
+    and answering 304 Not Modified from the timestamps of the object when it has conditional_get = True.
+    The responses are cached per view, action and query string. A hit is only served if the object
+    is still in the queryset of the view (one EXISTS query): the cache is shared by all the scopes of the view.
+    """
+    model = view.get_queryset().model
+    pk = _cached_pk(view, model, kwargs)
+    conditional = getattr(view, 'conditional_get', False)
+
+    if pk is not None:
+        variant = '%s.%s:%s:%s' % (type(view).__module__, type(view).__qualname__, view.action, request.GET.urlencode())
+        cached, state = caching.lookup(model, pk, variant)
+
+        if cached is not None and view.filter_queryset(view.get_queryset()).filter(pk=pk).exists():
+            data, validators = cached
+            return conditional_response(request, validators) or add_validators(Response(data), validators)
+
+    instance = view.get_object()
+    validators = instance_validators(request, instance) if conditional else None
+    response = conditional_response(request, validators)
+
+    if response is not None:
+        return response
+
+    data = view.get_serializer(instance).data
+
+    if pk is not None:
+        caching.store(state, (data, validators))
+
+    return add_validators(Response(data), validators)
+
+
+class CachedRetrieveModelMixin(SoftDeleteQuerySetMixin):
+    """
+    Reads retrieve, retrieve_deleted and retrieve_with_deleted through the cache
+    (the model needs Meta.soft_delete_cache = True).
+    """
+    retrieve_cache = True
+
+    def retrieve(self, request, *args, **kwargs):
+        return _retrieve(self, request, *args, **kwargs)
+
+
+class ConditionalModelMixin(SoftDeleteQuerySetMixin):
+    """
+    Adds ETag and Last-Modified to the listings and detail routes, computed from the timestamps
+    (the model needs updated_at), and answers conditional requests with 304 Not Modified
+    without serializing anything.
+    """
+    conditional_get = True
+
+    def list(self, request, *args, **kwargs):
+        return _list(self, request, None, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return _retrieve(self, request, *args, **kwargs)
+
+
+class RetrieveDeletedModelMixin(SoftDeleteQuerySetMixin):
     def retrieve_deleted(self, request, *args, **kwargs):
-        return RetrieveModelMixin.retrieve(self, request, *args, **kwargs)
+        return _retrieve(self, request, *args, **kwargs)
 
 
-class RetrieveWithDeletedModelMixin:
+class RetrieveWithDeletedModelMixin(SoftDeleteQuerySetMixin):
     def retrieve_with_deleted(self, request, *args, **kwargs):
-        return RetrieveModelMixin.retrieve(self, request, *args, **kwargs)
+        return _retrieve(self, request, *args, **kwargs)
+
+
+class ListChangesModelMixin(SoftDeleteQuerySetMixin):
+    """
+    Incremental change feed: GET changes/?since=<datetime>&cursor=<cursor>&limit=<n>
+    Rows created, updated or deleted since the given point, ordered by the time they changed.
+    Deleted rows are sent as tombstones ({pk: ..., 'deleted_at': ...}).
+    """
+    def changes(self, request, *args, **kwargs):
+        since = request.query_params.get('since')
+        cursor = request.query_params.get('cursor')
+        limit = request.query_params.get('limit') or getattr(settings, 'TIMESTAMPS__CHANGES_PAGE_SIZE', 100)
+
+        since = _query_param('since', DateTimeField(), since) if since else None
+        limit = _query_param(
+            'limit',
+            IntegerField(min_value=1, max_value=getattr(settings, 'TIMESTAMPS__CHANGES_MAX_PAGE_SIZE', 1000)),
+            limit,
+        )
+
+        queryset = self.filter_queryset(self.get_queryset())
+
+        try:
+            queryset = queryset.changed_since(since, cursor=cursor)
+        except ValueError as e:
+            raise ValidationError({'cursor': [str(e)]})
+
+        # one extra row tells if there are more changes
+        rows = list(queryset[:limit + 1])
+        has_more = len(rows) > limit
+        rows = rows[:limit]
 
+        if rows:
+            cursor = queryset.changes_cursor(rows[-1])
 
-class RestoreModelMixin:
+        return Response({
+            'results': [self.serialize_change(row) for row in rows],
+            'cursor': cursor,
+            'has_more': has_more,
+        })
+
+    def serialize_change(self, row):
+        if row.deleted_at is None:
+            return self.get_serializer(instance=row).data
+
+        return {
+            row._meta.pk.name: row._meta.pk.value_to_string(row),
+            'deleted_at': DateTimeField().to_representation(row.deleted_at),
+        }
+
+
+class RestoreModelMixin(SoftDeleteQuerySetMixin):
     def restore(self, request, *args, **kwargs):
         instance = self.get_object()
         self.perform_restore(instance)
@@ -40,9 +354,93 @@ class RestoreModelMixin:
         return instance.restore()
 
 
-class BulkRestoreModelMixin:
+def _query_param(name: str, field, value):
+    """
+    A query parameter validated by a serializer field: its errors are keyed by the name of the parameter.
+    """
+    try:
+        return field.run_validation(value)
+    except ValidationError as e:
+        raise ValidationError({name: e.detail})
+
+
+def _request_pks(request):
+    """
+    The primary keys sent in the body of a bulk request ({"pks": [...]}), or None (a missing or empty body)
+    to act on the whole queryset. Any other body is rejected.
+    """
+    data = request.data
+
+    # QueryDict (form data) is a dict too: parsers give an empty one for a missing body
+    if isinstance(data, dict) and not data:
+        return None
+
+    if hasattr(data, 'getlist'):
+        pks = data.getlist('pks')
+    else:
+        pks = data.get('pks') if isinstance(data, dict) else None
+
+    if not isinstance(pks, list) or not pks:
+        raise ValidationError({'pks': ['Expected a non-empty list of primary keys.']})
+
+    return pks
+
+
+def _perform_bulk_by_pks(queryset, pks: list, perform) -> dict:
+    """
+    Runs a bulk operation on the rows of the queryset with the given primary keys, in one transaction.
+    The primary keys are split in chunks, keeping the IN lists under the database parameter limits:
+    each chunk costs a SELECT ... FOR UPDATE of the rows found (so the counts are exact) and the operation.
+    """
+    pk_field = queryset.model._meta.pk
+
+    try:
+        # normalized value: value sent by the client (reported back if it isn't found)
+        pks = {pk_field.to_python(pk): pk for pk in pks}
+    except DjangoValidationError as e:
+        raise ValidationError({'pks': e.messages})
+
+    values = list(pks)
+    chunk_size = getattr(settings, 'TIMESTAMPS__BULK_PKS_CHUNK_SIZE', 1000)
+    using = router.db_for_write(queryset.model)
+    queryset = queryset.using(using)
+
+    chunks, found, count_per_model = [], set(), Counter()
+
+    with transaction.atomic(using=using):
+        for i in range(0, len(values), chunk_size):
+            existing = list(
+                queryset.filter(pk__in=values[i:i + chunk_size]).select_for_update().values_list('pk', flat=True)
+            )
+            count = perform(queryset.filter(pk__in=existing)) if existing else 0
+
+            if isinstance(count, tuple):
+                count, per_model = count
+                count_per_model.update(per_model)
+
+            found.update(existing)
+            chunks.append(count)
+
+    data = {
+        'count': sum(chunks),
+        'chunks': chunks,
+        'not_found': [pks[pk] for pk in values if pk not in found],
+    }
+
+    if count_per_model:
+        data['count_per_model'] = dict(count_per_model)
+
+    return data
+
+
+class BulkRestoreModelMixin(SoftDeleteQuerySetMixin):
     def bulk_restore(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
+        pks = _request_pks(request)
+
+        if pks is not None:
+            return Response(data=_perform_bulk_by_pks(queryset, pks, self.perform_bulk_restore))
+
         count = self.perform_bulk_restore(queryset)
 
         if getattr(settings, 'TIMESTAMPS__BULK_RESPONSE_CONTENT', False):
@@ -54,17 +452,21 @@ class BulkRestoreModelMixin:
         return qs.restore()
 
 
-class DestroyModelMixin(mixins.DestroyModelMixin):
+class DestroyModelMixin(SoftDeleteQuerySetMixin, mixins.DestroyModelMixin):
     def perform_destroy(self, instance):
         return instance.delete(hard=is_hard_delete_request(self))
 
 
-class BulkDestroyModelMixin:
+class BulkDestroyModelMixin(SoftDeleteQuerySetMixin):
     def perform_bulk_destroy(self, qs):
         return qs.delete(hard=is_hard_delete_request(self))
 
     def bulk_destroy(self, request, *args, **kwargs):
         queryset = self.filter_queryset(self.get_queryset())
+        pks = _request_pks(request)
+
+        if pks is not None:
+            return Response(data=_perform_bulk_by_pks(queryset, pks, self.perform_bulk_destroy))
 
         count = self.perform_bulk_destroy(queryset)
 
@@ -81,10 +483,7 @@ class BulkDestroyModelMixin:
         return Response(data={'count': count}, status=status.HTTP_200_OK)
 
 
-def __remove_clause_deleted_at(queryset):
-    from timestamps.querysets import SoftDeleteQuerySet
-    from django.db.models.lookups import IsNull
-
+def _remove_clause_deleted_at(queryset):
     if not isinstance(queryset, SoftDeleteQuerySet):
         return queryset
 
@@ -99,48 +498,64 @@ def __remove_clause_deleted_at(queryset):
     return queryset
 
 
-# Using Aspect-Oriented Programming (AOP)
-# to change behavior of GenericAPIView.get_queryset(self).
-# Doing this way, there is no need to pollute CoreModelViewSet
-# and gives to developers the possibility
-# to use only a subset of Mixins of soft deleting technology,
-# without the need to use all the views mixins, extended in CoreModelViewSet.
-@aspectlib.Aspect
-def __get_queryset(*args, **kwargs):
-    queryset = yield aspectlib.Proceed
+def _with_deleted(view, queryset):
+    if archive_model(queryset.model) is not None:
+        # the deleted rows are in the archive table: they'd be silently missing
+        raise ImproperlyConfigured(
+            "%s: the routes of deleted objects aren't supported in archive mode." % queryset.model._meta.label
+        )
 
-    view = args[0]
+    return _remove_clause_deleted_at(queryset)
 
-    if not hasattr(view, 'action'):
-        yield aspectlib.Return(queryset) 
 
-    mixin = {
-        'list_with_deleted': ListWithDeletedModelMixin,
-        'retrieve_with_deleted': RetrieveWithDeletedModelMixin,
-    }
+def _only_deleted(view, queryset):
+    return _with_deleted(view, queryset).only_deleted()
 
-    if is_hard_delete_request(view):
-        mixin['destroy'] = DestroyModelMixin
-        mixin['bulk_destroy'] = BulkDestroyModelMixin
 
-    mixin = mixin.get(view.action, None)
+def _from_replica(queryset):
+    if not isinstance(queryset, SoftDeleteQuerySet):
+        return queryset
+
+    return queryset.from_replica()
 
-    if mixin and isinstance(view, mixin):
-        queryset = __remove_clause_deleted_at(queryset)
-        yield aspectlib.Return(queryset)
 
-    mixin = {
-        'list_deleted': ListDeletedModelMixin,
-        'retrieve_deleted': RetrieveDeletedModelMixin,
-        'restore': RestoreModelMixin,
-        'bulk_restore': BulkRestoreModelMixin,
-    }.get(view.action, None)
+def _with_deleted_from_replica(view, queryset):
+    return _from_replica(_with_deleted(view, queryset))
 
-    if mixin and isinstance(view, mixin):
-        queryset = __remove_clause_deleted_at(queryset)
-        yield aspectlib.Return(queryset.only_deleted())
 
-    yield aspectlib.Return(queryset)
+def _only_deleted_from_replica(view, queryset):
+    return _from_replica(_only_deleted(view, queryset))
 
 
-aspectlib.weave(target=GenericAPIView.get_queryset, aspects=__get_queryset)
+def _with_deleted_if_hard_delete(view, queryset):
+    if is_hard_delete_request(view):
+        return _remove_clause_deleted_at(queryset)
+
+    return queryset
+
+
+# action: (mixin providing it, queryset transform)
+# read-only listings of deleted rows read from settings.TIMESTAMPS__REPLICA_DATABASE (if set).
+# the change feed doesn't: a lagging replica would make it skip changes.
+QUERYSET_TRANSFORMS = {
+    'list_with_deleted': (ListWithDeletedModelMixin, _with_deleted_from_replica),
+    'retrieve_with_deleted': (RetrieveWithDeletedModelMixin, _with_deleted_from_replica),
+    'changes': (ListChangesModelMixin, _with_deleted),
+    'export_with_deleted': (ExportWithDeletedModelMixin, _with_deleted_from_replica),
+    'destroy': (DestroyModelMixin, _with_deleted_if_hard_delete),
+    'bulk_destroy': (BulkDestroyModelMixin, _with_deleted_if_hard_delete),
+    'list_deleted': (ListDeletedModelMixin, _only_deleted_from_replica),
+    'retrieve_deleted': (RetrieveDeletedModelMixin, _only_deleted_from_replica),
+    'export_deleted': (ExportDeletedModelMixin, _only_deleted_from_replica),
+    'restore': (RestoreModelMixin, _only_deleted),
+    'bulk_restore': (BulkRestoreModelMixin, _only_deleted),
+}
+
+
+@lru_cache(maxsize=None)
+def _queryset_transforms(view_class) -> dict:
+    return {
+        action: transform
+        for action, (mixin, transform) in QUERYSET_TRANSFORMS.items()
+        if issubclass(view_class, mixin)
+    }
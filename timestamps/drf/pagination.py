@@ -0,0 +1,136 @@
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+from timestamps.cursors import decode_cursor, encode_cursor
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination on a unique ordering (e.g. a timestamp and the primary key):
+    each page is WHERE (timestamp, pk) < (last timestamp, last pk) ORDER BY timestamp, pk LIMIT n,
+    so every page costs the same, with no OFFSET and no COUNT(*).
+    Only the next page is linked. Fields the model doesn't have are left out of the ordering.
+    """
+    ordering = ('-pk',)
+    page_size = api_settings.PAGE_SIZE
+    page_size_query_param = None
+    max_page_size = None
+    cursor_query_param = 'cursor'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def get_ordering(self, queryset) -> list:
+        opts = queryset.model._meta
+        names = {field.name for field in opts.get_fields()} | {'pk'}
+
+        return [name for name in self.ordering if name.lstrip('-') in names]
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                page_size = int(request.query_params[self.page_size_query_param])
+
+                if page_size > 0:
+                    return min(page_size, self.max_page_size) if self.max_page_size else page_size
+            except (KeyError, ValueError):
+                pass
+
+        return self.page_size
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.page_size = self.get_page_size(request)
+
+        if not self.page_size:
+            return None
+
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+
+        queryset = queryset.order_by(*self.ordering)
+        cursor = request.query_params.get(self.cursor_query_param)
+
+        if cursor:
+            queryset = queryset.filter(self.after(queryset.model, cursor))
+
+        # one extra row tells if there is a next page
+        rows = list(queryset[:self.page_size + 1])
+
+        self.has_next = len(rows) > self.page_size
+        self.rows = rows[:self.page_size]
+
+        return self.rows
+
+    def after(self, model, cursor: str) -> Q:
+        opts = model._meta
+        fields = [opts.pk if name.lstrip('-') == 'pk' else opts.get_field(name.lstrip('-')) for name in self.ordering]
+
+        try:
+            values = decode_cursor(cursor, fields)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y)
+        condition, equal = Q(), {}
+
+        for name, value in zip(self.ordering, values):
+            lookup = '%s__%s' % (name.lstrip('-'), 'lt' if name.startswith('-') else 'gt')
+            condition |= Q(**equal, **{lookup: value})
+            equal[name.lstrip('-')] = value
+
+        return condition
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+
+        row = self.rows[-1]
+
+        # rows are objects, or dicts for values() querysets
+        if isinstance(row, dict):
+            cursor = encode_cursor(*(row[name.lstrip('-')] for name in self.ordering))
+        else:
+            cursor = encode_cursor(*(getattr(row, name.lstrip('-')) for name in self.ordering))
+
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, cursor)
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {
+                    'type': 'string',
+                    'nullable': True,
+                    'format': 'uri',
+                },
+                'results': schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [{
+            'name': self.cursor_query_param,
+            'required': False,
+            'in': 'query',
+            'description': 'The pagination cursor value.',
+            'schema': {
+                'type': 'string',
+            },
+        }]
+
+
+class DeletedPagination(KeysetPagination):
+    ordering = ('-deleted_at', '-pk')
+
+
+class WithDeletedPagination(KeysetPagination):
+    ordering = ('-updated_at', '-pk')
@@ -40,8 +40,41 @@ class DefaultRouter(routers.DefaultRouter):
         initkwargs={'suffix': 'Restore'}
     ))
 
-    # retrieve deleted
+    # change feed
+    routers.DefaultRouter.routes.insert(3, routers.Route(
+        url=r'^{prefix}/changes{trailing_slash}$',
+        mapping={
+            'get': 'changes',
+        },
+        name='{basename}-changes',
+        detail=False,
+        initkwargs={'suffix': 'Changes'}
+    ))
+
+    # export deleted
+    routers.DefaultRouter.routes.insert(4, routers.Route(
+        url=r'^{prefix}/deleted/export{trailing_slash}$',
+        mapping={
+            'get': 'export_deleted',
+        },
+        name='{basename}-export-deleted',
+        detail=False,
+        initkwargs={'suffix': 'Export Deleted'}
+    ))
+
+    # export with deleted
     routers.DefaultRouter.routes.insert(5, routers.Route(
+        url=r'^{prefix}/with-deleted/export{trailing_slash}$',
+        mapping={
+            'get': 'export_with_deleted',
+        },
+        name='{basename}-export-with-deleted',
+        detail=False,
+        initkwargs={'suffix': 'Export With Deleted'}
+    ))
+
+    # retrieve deleted
+    routers.DefaultRouter.routes.insert(8, routers.Route(
         url=r'^{prefix}/deleted/{lookup}{trailing_slash}$',
         name='{basename}-deleted',
         mapping={
@@ -52,7 +85,7 @@ class DefaultRouter(routers.DefaultRouter):
     ))
 
     # retrieve with deleted
-    routers.DefaultRouter.routes.insert(6, routers.Route(
+    routers.DefaultRouter.routes.insert(9, routers.Route(
         url=r'^{prefix}/with-deleted/{lookup}{trailing_slash}$',
         name='{basename}-with-deleted',
         mapping={
@@ -63,7 +96,7 @@ class DefaultRouter(routers.DefaultRouter):
     ))
 
     # restore
-    routers.DefaultRouter.routes.insert(7, routers.Route(
+    routers.DefaultRouter.routes.insert(10, routers.Route(
         url=r'^{prefix}/{lookup}/restore{trailing_slash}$',
         name='{basename}-restore',
         mapping={
@@ -1,13 +1,98 @@
+import hashlib
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
 from rest_framework.serializers import BooleanField
 from rest_framework.views import View
 from .permissions import can_hard_delete
 
 
+_permanent = BooleanField(required=False, allow_null=True)
+
+
 def is_hard_delete_request(view: View) -> bool:
+    # parsed (and checked) once per request: the view is instantiated for each request
+    try:
+        return view._is_hard_delete_request
+    except AttributeError:
+        pass
+
     permanent = view.request.query_params.get('permanent')
-    is_hard_delete = BooleanField(required=False, allow_null=True).run_validation(permanent)
+    is_hard_delete = _permanent.run_validation(permanent)
 
     if is_hard_delete:
         can_hard_delete(view)
 
+    view._is_hard_delete_request = is_hard_delete
+
     return is_hard_delete
+
+
+def _etag(request, *values) -> str:
+    # the representation depends on the query string (page, filters...) and on the renderer
+    key = repr((request.get_full_path(), getattr(request, 'accepted_media_type', None), *values))
+    return 'W/"%s"' % hashlib.md5(key.encode()).hexdigest()
+
+
+def _last_modified(*values):
+    values = [value for value in values if value is not None]
+    return int(max(values).timestamp()) if values else None
+
+
+def queryset_validators(request, queryset):
+    """
+    Returns the (ETag, Last-Modified) of a listing, from a single aggregate:
+    MAX(updated_at), MAX(deleted_at) and the number of (deleted) rows, which change with every write
+    (the counts catch hard deletes and restores). None for models without updated_at.
+    """
+    fields = {field.name for field in queryset.model._meta.concrete_fields}
+
+    if 'updated_at' not in fields:
+        return None
+
+    aggregates = {'count': Count('pk'), 'updated_at': Max('updated_at')}
+
+    if 'deleted_at' in fields:
+        aggregates.update(deleted=Count('deleted_at'), deleted_at=Max('deleted_at'))
+
+    values = queryset.order_by().aggregate(**aggregates)
+
+    return (
+        _etag(request, *sorted(values.items())),
+        _last_modified(values['updated_at'], values.get('deleted_at')),
+    )
+
+
+def instance_validators(request, instance):
+    """Returns the (ETag, Last-Modified) of an object, from its timestamps. None for models without updated_at."""
+    if not hasattr(instance, 'updated_at'):
+        return None
+
+    deleted_at = getattr(instance, 'deleted_at', None)
+
+    return (
+        _etag(request, instance.pk, instance.updated_at, deleted_at),
+        _last_modified(instance.updated_at, deleted_at),
+    )
+
+
+def conditional_response(request, validators):
+    """Returns a 304 Not Modified (or 412 Precondition Failed) response if the request's validators match, else None."""
+    if validators is None:
+        return None
+
+    etag, last_modified = validators
+
+    return get_conditional_response(request, etag=etag, last_modified=last_modified)
+
+
+def add_validators(response, validators):
+    if validators is not None and response.status_code == 200:
+        etag, last_modified = validators
+        response['ETag'] = etag
+
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+
+    return response
@@ -0,0 +1,155 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db import models
+from rest_framework import fields, relations, serializers
+from rest_framework.settings import api_settings
+
+
+# fields whose to_representation() returns the values of values() as they are
+_AS_IS = (
+    fields.CharField,
+    fields.EmailField,
+    fields.SlugField,
+    fields.URLField,
+    fields.IntegerField,
+    fields.BooleanField,
+    fields.FloatField,
+)
+
+
+def _as_is(column: list) -> list:
+    return column
+
+
+def _each(field):
+    to_representation = field.to_representation
+
+    def convert(column: list) -> list:
+        return [None if value is None else to_representation(value) for value in column]
+
+    return convert
+
+
+def _uuids(field):
+    if field.uuid_format != 'hex_verbose':
+        return _each(field)
+
+    def convert(column: list) -> list:
+        return [None if value is None else str(value) for value in column]
+
+    return convert
+
+
+def _datetimes(field):
+    """
+    Formats a column of datetimes as DateTimeField.to_representation() does, with the format and timezone
+    looked up once per column (instead of once per value).
+    """
+    output_format = getattr(field, 'format', api_settings.DATETIME_FORMAT)
+
+    if not isinstance(output_format, str) or output_format.lower() != fields.ISO_8601:
+        return _each(field)
+
+    field_timezone = field.timezone if hasattr(field, 'timezone') else field.default_timezone()
+
+    if field_timezone is None:
+        return _each(field)
+
+    to_representation = field.to_representation
+
+    def convert(column: list) -> list:
+        formatted = []
+
+        for value in column:
+            if not value:
+                formatted.append(None)
+                continue
+
+            if value.tzinfo is None:
+                formatted.append(to_representation(value))
+                continue
+
+            value = value.astimezone(field_timezone).isoformat()
+            formatted.append(value[:-6] + 'Z' if value.endswith('+00:00') else value)
+
+        return formatted
+
+    return convert
+
+
+def _converter(field, model_field):
+    if isinstance(model_field, (models.FileField, models.JSONField)):
+        # values() returns the name of the file, and JSONField values may need the field's decoder
+        return None
+
+    if type(field) is fields.DateTimeField:
+        return _datetimes(field)
+
+    if type(field) is fields.UUIDField:
+        return _uuids(field)
+
+    if type(field) in _AS_IS:
+        return _as_is
+
+    if isinstance(field, fields.Field) and not isinstance(field, (relations.RelatedField, relations.ManyRelatedField)):
+        return _each(field)
+
+    return None
+
+
+def values_plan(serializer):
+    """
+    Returns [(name, column, converter)] to serialize the objects of a ModelSerializer from values(),
+    or None if one of its fields can't (computed fields, nested serializers, sources spanning relations...).
+    Foreign keys serialized with PrimaryKeyRelatedField read the column of the key.
+    """
+    if not isinstance(serializer, serializers.ModelSerializer):
+        return None
+
+    # a custom to_representation() needs the objects
+    if type(serializer).to_representation is not serializers.Serializer.to_representation:
+        return None
+
+    opts = serializer.Meta.model._meta
+    plan = []
+
+    for field in serializer._readable_fields:
+        if not field.source or '.' in field.source or field.source == '*':
+            return None
+
+        try:
+            model_field = opts.pk if field.source == 'pk' else opts.get_field(field.source)
+        except FieldDoesNotExist:
+            return None
+
+        if not model_field.concrete:
+            return None
+
+        if model_field.is_relation:
+            if not (model_field.many_to_one and type(field) is relations.PrimaryKeyRelatedField and field.pk_field is None):
+                return None
+
+            converter = _as_is
+        else:
+            converter = _converter(field, model_field)
+
+            if converter is None:
+                return None
+
+        plan.append((field.field_name, model_field.attname, converter))
+
+    return plan
+
+
+def values_columns(plan) -> list:
+    return [column for _, column, _ in plan]
+
+
+def serialize_values(plan, rows: list) -> list:
+    """Serializes the rows of values() column by column."""
+    if not rows:
+        return []
+
+    names = [name for name, _, _ in plan]
+    columns = [converter([row[column] for row in rows]) for _, column, converter in plan]
+
+    return [dict(zip(names, values)) for values in zip(*columns)]
@@ -1,10 +1,14 @@
 from rest_framework import viewsets
 
 from .mixins import (
+    _list,
     ListDeletedModelMixin,
     ListWithDeletedModelMixin,
     RetrieveDeletedModelMixin,
     RetrieveWithDeletedModelMixin,
+    ListChangesModelMixin,
+    ExportDeletedModelMixin,
+    ExportWithDeletedModelMixin,
     RestoreModelMixin,
     BulkRestoreModelMixin,
     DestroyModelMixin,
@@ -16,9 +20,16 @@ class ModelViewSet(ListDeletedModelMixin,
                    ListWithDeletedModelMixin,
                    RetrieveDeletedModelMixin,
                    RetrieveWithDeletedModelMixin,
+                   ListChangesModelMixin,
+                   ExportDeletedModelMixin,
+                   ExportWithDeletedModelMixin,
                    RestoreModelMixin,
                    BulkRestoreModelMixin,
                    DestroyModelMixin,
                    BulkDestroyModelMixin,
                    viewsets.ModelViewSet):
-    pass
+    # list, list_deleted and list_with_deleted serialize from values() when the serializer allows it
+    fast_list = False
+
+    def list(self, request, *args, **kwargs):
+        return _list(self, request, None, *args, **kwargs)
@@ -0,0 +1,119 @@
+from django.db.backends.utils import names_digest, split_identifier
+from django.db.models import Index, Q, UniqueConstraint
+
+
+LIVE_ROWS = Q(deleted_at__isnull=True)
+DELETED_ROWS = Q(deleted_at__isnull=False)
+
+
+def _fields(model, fields) -> list:
+    if isinstance(fields, str):
+        fields = [fields]
+
+    pk_name = model._meta.pk.name
+
+    return [pk_name if field == 'pk' else field for field in fields]
+
+
+def _name(model, fields: list, suffix: str) -> str:
+    # same layout as Index.set_name_with_model():
+    # table name (11 chars), first column (7 chars), hash and a 3 chars suffix.
+    # it keeps names deterministic (stable migrations) and under 30 chars.
+    _, table_name = split_identifier(model._meta.db_table)
+    columns = [model._meta.get_field(field.lstrip('-')).column for field in fields]
+
+    name = '%s_%s_%s_%s' % (
+        table_name[:11],
+        columns[0][:7],
+        names_digest(table_name, *fields, suffix, length=6),
+        suffix,
+    )
+
+    if name[0] == '_' or name[0].isdigit():
+        name = 'D%s' % name[1:]
+
+    return name
+
+
+def live_index(model, fields) -> Index:
+    fields = _fields(model, fields)
+    return Index(fields=fields, name=_name(model, fields, 'sdl'), condition=LIVE_ROWS)
+
+
+def deleted_index(model) -> Index:
+    fields = ['deleted_at']
+    return Index(fields=fields, name=_name(model, fields, 'sdd'), condition=DELETED_ROWS)
+
+
+def live_unique_constraint(model, fields) -> UniqueConstraint:
+    fields = _fields(model, fields)
+    return UniqueConstraint(fields=fields, name=_name(model, fields, 'sdu'), condition=LIVE_ROWS)
+
+
+def timestamp_indexes(model) -> list:
+    """
+    Indexes for the time range queries of Meta.timestamp_indexes
+    (True for created_at and updated_at, or a list of these fields).
+    On SoftDeletes models they lead with deleted_at, which every manager filters on:
+    (deleted_at, created_at) serves objects.created_since() as well as objects_deleted.deleted_between().
+    There, updated_at also gets an (updated_at, pk) index for objects_with_deleted.changed_since(),
+    which doesn't filter on deleted_at.
+    """
+    opts = model._meta
+    value = getattr(opts, 'timestamp_indexes', False)
+
+    if not value:
+        return []
+
+    local = {field.name for field in opts.local_fields}
+    names = ['created_at', 'updated_at'] if value is True else _fields(model, value)
+    prefix = ['deleted_at'] if 'deleted_at' in local else []
+
+    indexes = [
+        Index(fields=[*prefix, name], name=_name(model, [*prefix, name], 'tsi'))
+        for name in names if name in local
+    ]
+
+    if prefix and 'updated_at' in names and 'updated_at' in local:
+        fields = ['updated_at', opts.pk.name]
+        indexes.append(Index(fields=fields, name=_name(model, fields, 'tsc')))
+
+    return indexes
+
+
+def _contribute(model, indexes: list, constraints: list) -> None:
+    opts = model._meta
+
+    declared = {index.name for index in opts.indexes} | {constraint.name for constraint in opts.constraints}
+
+    # never share the lists with the Meta of abstract parents
+    opts.indexes = [*opts.indexes, *(index for index in indexes if index.name not in declared)]
+    opts.constraints = [*opts.constraints, *(c for c in constraints if c.name not in declared)]
+
+    # the migrations autodetector only looks at options explicitly declared on Meta
+    if opts.indexes:
+        opts.original_attrs['indexes'] = opts.indexes
+
+    if opts.constraints:
+        opts.original_attrs['constraints'] = opts.constraints
+
+
+def contribute_soft_delete_indexes(model) -> None:
+    """
+    Adds the conditional indexes and unique constraints declared on Meta to the model.
+    Since they end up in Meta.indexes and Meta.constraints, makemigrations picks them up.
+    """
+    opts = model._meta
+
+    indexes = [live_index(model, fields) for fields in getattr(opts, 'soft_delete_indexes', ())]
+
+    if getattr(opts, 'soft_delete_index_deleted', False):
+        indexes.append(deleted_index(model))
+
+    constraints = [live_unique_constraint(model, fields) for fields in getattr(opts, 'soft_delete_unique', ())]
+
+    _contribute(model, indexes, constraints)
+
+
+def contribute_timestamp_indexes(model) -> None:
+    _contribute(model, timestamp_indexes(model), [])
@@ -0,0 +1,184 @@
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+from django.apps import apps
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.utils import timezone
+
+
+def soft_delete_models(labels=None) -> list:
+    from timestamps.models import SoftDeletes
+
+    models = [
+        model for model in apps.get_models()
+        if issubclass(model, SoftDeletes) and not model._meta.proxy
+    ]
+
+    if not labels:
+        return models
+
+    selected = []
+
+    for label in labels:
+        try:
+            if '.' in label:
+                model = apps.get_model(label)
+                selected += [model] if model in models else []
+            else:
+                app_config = apps.get_app_config(label)
+                selected += [model for model in models if model._meta.app_config is app_config]
+        except LookupError as e:
+            raise CommandError(str(e)) from e
+
+    return selected
+
+
+def retention(model, days=None):
+    value = getattr(model._meta, 'soft_delete_retention', None)
+
+    if value is None:
+        value = days if days is not None else getattr(settings, 'TIMESTAMPS__PURGE_RETENTION_DAYS', None)
+
+    if value is None or isinstance(value, timedelta):
+        return value
+
+    return timedelta(days=value)
+
+
+def purge(label: str, cutoff, batch_size: int, sleep: float, dry_run: bool, deadline: float = None) -> dict:
+    """
+    Hard deletes, in batches, the rows of a model soft deleted before `cutoff`.
+    Runs in the worker processes, so it only receives (and returns) picklable values.
+    """
+    from timestamps.archive import deleted_rows
+
+    model = apps.get_model(label)
+    queryset = deleted_rows(model).filter(deleted_at__lt=cutoff)
+
+    started = time.monotonic()
+    stats = {'label': label, 'rows': 0, 'related': 0, 'batches': 0, 'complete': True}
+
+    if dry_run:
+        stats['rows'] = queryset.count()
+    else:
+        deleted = Counter()
+
+        for using, pks in queryset._keyset_batches(batch_size, sleep):
+            if deadline is not None and time.time() >= deadline:
+                stats['complete'] = False
+                break
+
+            # the cutoff is checked again: a row restored and deleted since the page was read is kept
+            with transaction.atomic(using=using):
+                _, per_model = queryset.using(using).filter(pk__in=pks).delete(hard=True)
+
+            deleted.update(per_model)
+            stats['batches'] += 1
+
+        stats['rows'] = deleted.pop(queryset.model._meta.label, 0)
+        stats['related'] = sum(deleted.values())
+
+    stats['seconds'] = time.monotonic() - started
+
+    return stats
+
+
+def _setup_worker():
+    import django
+    django.setup()
+
+
+class Command(BaseCommand):
+    help = 'Hard deletes the rows soft deleted before their retention period.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'labels', nargs='*', metavar='app_label[.ModelName]',
+            help='Restricts the purge to these apps or models. Default: all SoftDeletes models.',
+        )
+        parser.add_argument(
+            '--days', type=int,
+            help='Retention period (in days) for models without Meta.soft_delete_retention. '
+                 'Default: settings.TIMESTAMPS__PURGE_RETENTION_DAYS.',
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Rows deleted per transaction.')
+        parser.add_argument('--sleep', type=float, default=0, help='Seconds to sleep between batches.')
+        parser.add_argument('--workers', type=int, default=1, help='Models purged in parallel (processes).')
+        parser.add_argument('--time-budget', type=float, help='Stops starting new batches after these seconds.')
+        parser.add_argument('--dry-run', action='store_true', help='Only counts the rows that would be purged.')
+
+    def handle(self, *labels, **options):
+        now = timezone.now()
+        deadline = time.time() + options['time_budget'] if options['time_budget'] else None
+
+        jobs = []
+
+        for model in soft_delete_models(labels):
+            period = retention(model, options['days'])
+
+            if period is None:
+                self.stdout.write('%s: skipped, no retention period' % model._meta.label, self.style.WARNING)
+                continue
+
+            jobs.append((
+                model._meta.label,
+                now - period,
+                options['batch_size'],
+                options['sleep'],
+                options['dry_run'],
+                deadline,
+            ))
+
+        started = time.monotonic()
+        workers = options['workers']
+
+        if workers > 1 and any(connection.vendor == 'sqlite' for connection in connections.all()):
+            self.stdout.write('SQLite allows a single writer: purging one model at a time', self.style.WARNING)
+            workers = 1
+
+        if workers > 1 and len(jobs) > 1:
+            # forked processes must not share the connections of this one
+            connections.close_all()
+
+            with ProcessPoolExecutor(max_workers=workers, initializer=_setup_worker) as executor:
+                results = [executor.submit(purge, *job) for job in jobs]
+                results = [result.result() for result in results]
+        else:
+            results = [purge(*job) for job in jobs]
+
+        for stats in results:
+            self.write_stats(stats, options['dry_run'])
+
+        seconds = time.monotonic() - started
+        rows = sum(stats['rows'] + stats['related'] for stats in results)
+
+        self.stdout.write(
+            '%d rows %s in %.2fs (%.0f rows/s)' % (
+                rows,
+                'would be purged' if options['dry_run'] else 'purged',
+                seconds,
+                rows / seconds if seconds else 0,
+            ),
+            self.style.SUCCESS,
+        )
+
+    def write_stats(self, stats: dict, dry_run: bool):
+        if dry_run:
+            self.stdout.write('%(label)s: %(rows)d rows would be purged' % stats)
+            return
+
+        self.stdout.write(
+            '%s: %d rows purged (+%d related) in %d batches, %.2fs (%.0f rows/s)%s' % (
+                stats['label'],
+                stats['rows'],
+                stats['related'],
+                stats['batches'],
+                stats['seconds'],
+                stats['rows'] / stats['seconds'] if stats['seconds'] else 0,
+                '' if stats['complete'] else ', stopped by the time budget',
+            )
+        )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+
+from timestamps import counters
+from .purge_soft_deleted import soft_delete_models
+
+
+class Command(BaseCommand):
+    help = 'Recounts the live and deleted rows of the models with Meta.soft_delete_counters, repairing any drift.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'labels', nargs='*', metavar='app_label[.ModelName]',
+            help='Restricts the recount to these apps or models. Default: all models with counters.',
+        )
+        parser.add_argument(
+            '--database', default=DEFAULT_DB_ALIAS,
+            help='Database to count the rows on. Default: "%s".' % DEFAULT_DB_ALIAS,
+        )
+
+    def handle(self, *labels, **options):
+        using = options['database']
+
+        for model in soft_delete_models(labels):
+            if not counters.is_counted(model):
+                continue
+
+            for deleted in (False, True):
+                value = counters.count_rows(model, using, deleted)
+                drift = value - counters.get_count(model, using, deleted)
+
+                counters.set_count(model, using, deleted, value)
+
+                self.stdout.write('%s: %d %s rows%s' % (
+                    model._meta.label,
+                    value,
+                    'deleted' if deleted else 'live',
+                    ' (drift %+d, repaired)' % drift if drift else '',
+                ))
@@ -1,30 +1,160 @@
+from functools import lru_cache
+from django.db import router
 from django.db.models import Manager
-from .querysets import SoftDeleteQuerySet
+from . import counters
+from .querysets import ArchiveQuerySet, SoftDeleteQuerySet, TimestampableQuerySet, WithArchiveQuerySet
+
+
+class TimestampableManager(Manager.from_queryset(TimestampableQuerySet)):
+    pass
 
 
 class SoftDeleteManager(Manager):
+    """
+    Manager of the live rows. With only_deleted=True (or with_deleted=True),
+    the manager of the deleted rows (or of all the rows): see DeletedManager and WithDeletedManager.
+    """
+    with_deleted = False
+    only_deleted = False
+
     def __init__(self, *args, **kwargs):
-        self.with_deleted = kwargs.pop('with_deleted', False)
-        self.only_deleted = kwargs.pop('only_deleted', False)
+        with_deleted = kwargs.pop('with_deleted', False)
+        only_deleted = kwargs.pop('only_deleted', False)
         super(SoftDeleteManager, self).__init__(*args, **kwargs)
 
+        # related managers (e.g. foo.bar_set(manager='objects_deleted')) are made from the class of the manager:
+        # the kind of rows must be a class attribute, on a subclass keeping the methods of the manager
+        if with_deleted or only_deleted:
+            self.__class__ = _manager_class(self.__class__, bool(with_deleted), bool(only_deleted) and not with_deleted)
+
     def get_queryset(self):
+        archive = getattr(self.model, '_archive_model', None)
+
+        if archive is not None and self.only_deleted:
+            return ArchiveQuerySet(archive, using=self._db, hints=self._hints).from_replica()
+
+        # live and deleted rows are in different tables: filters apply to both sides of the union
+        if archive is not None and self.with_deleted:
+            return WithArchiveQuerySet.of(self.model, archive, using=self._db, hints=self._hints)
+
+        queryset = SoftDeleteQuerySet(self.model, using=self._db, hints=self._hints)
+
         if self.with_deleted:
-            return SoftDeleteQuerySet(self.model)
+            return queryset
 
         if self.only_deleted:
-            return SoftDeleteQuerySet(self.model).only_deleted()
+            return queryset.only_deleted().from_replica()
+
+        return queryset.without_deleted()
+
+    def fast_count(self) -> int:
+        """
+        Number of rows of the manager (live, deleted or both), read from the counters
+        of Meta.soft_delete_counters instead of a COUNT(*). Without counters, it's a count().
+        """
+        if not counters.is_counted(self.model):
+            return self.count()
+
+        using = self._db or router.db_for_write(self.model)
+
+        if self.with_deleted:
+            return counters.get_count(self.model, using, False) + counters.get_count(self.model, using, True)
+
+        return counters.get_count(self.model, using, self.only_deleted)
+
+    def created_between(self, start, end):
+        return self.get_queryset().created_between(start, end)
+
+    def created_since(self, timestamp):
+        return self.get_queryset().created_since(timestamp)
+
+    def updated_between(self, start, end):
+        return self.get_queryset().updated_between(start, end)
+
+    def updated_since(self, timestamp):
+        return self.get_queryset().updated_since(timestamp)
+
+    def touch(self) -> int:
+        return self.get_queryset().touch()
 
-        return SoftDeleteQuerySet(self.model).without_deleted()
+    def deleted_between(self, start, end):
+        return self.get_queryset().deleted_between(start, end)
 
-    def delete(self, hard: bool = False):
-        return self.get_queryset().delete(hard=hard)
+    def deleted_since(self, timestamp):
+        return self.get_queryset().deleted_since(timestamp)
+
+    def changed_since(self, timestamp=None, cursor: str = None):
+        return self.get_queryset().changed_since(timestamp, cursor=cursor)
+
+    def delete(self, hard: bool = False, cascade: bool = None, batch_size: int = None, sleep: float = 0, progress=None):
+        return self.get_queryset().delete(
+            hard=hard,
+            cascade=cascade,
+            batch_size=batch_size,
+            sleep=sleep,
+            progress=progress
+        )
     
-    def soft_delete(self):
-        return self.delete(hard=False)
+    def soft_delete(self, cascade: bool = None, batch_size: int = None, sleep: float = 0, progress=None):
+        return self.delete(hard=False, cascade=cascade, batch_size=batch_size, sleep=sleep, progress=progress)
     
-    def hard_delete(self):
-        return self.delete(hard=True)
+    def hard_delete(self, batch_size: int = None, sleep: float = 0, progress=None):
+        return self.delete(hard=True, batch_size=batch_size, sleep=sleep, progress=progress)
+
+    def restore(self, batch_size: int = None, sleep: float = 0, progress=None):
+        return self.get_queryset().restore(batch_size=batch_size, sleep=sleep, progress=progress)
+
+    async def adelete(self, hard: bool = False, cascade: bool = None, batch_size: int = None, sleep: float = 0,
+                      progress=None):
+        return await self.get_queryset().adelete(
+            hard=hard,
+            cascade=cascade,
+            batch_size=batch_size,
+            sleep=sleep,
+            progress=progress
+        )
+
+    async def asoft_delete(self, cascade: bool = None, batch_size: int = None, sleep: float = 0, progress=None):
+        return await self.adelete(hard=False, cascade=cascade, batch_size=batch_size, sleep=sleep, progress=progress)
+
+    async def ahard_delete(self, batch_size: int = None, sleep: float = 0, progress=None):
+        return await self.adelete(hard=True, batch_size=batch_size, sleep=sleep, progress=progress)
+
+    async def arestore(self, batch_size: int = None, sleep: float = 0, progress=None):
+        return await self.get_queryset().arestore(batch_size=batch_size, sleep=sleep, progress=progress)
+
+
+class DeletedManager(SoftDeleteManager):
+    only_deleted = True
+
+
+class WithDeletedManager(SoftDeleteManager):
+    with_deleted = True
+
+
+@lru_cache(maxsize=None)
+def _manager_class(manager_class, with_deleted: bool, only_deleted: bool):
+    if (manager_class.with_deleted, manager_class.only_deleted) == (with_deleted, only_deleted):
+        return manager_class
+
+    if manager_class is SoftDeleteManager:
+        return WithDeletedManager if with_deleted else DeletedManager
+
+    # same name: the manager is deconstructed (for migrations) as the class and the arguments it was made with
+    return type(manager_class.__name__, (manager_class,), {
+        '__module__': manager_class.__module__,
+        '__qualname__': manager_class.__qualname__,
+        'with_deleted': with_deleted,
+        'only_deleted': only_deleted,
+    })
+
+
+class ArchiveManager(Manager.from_queryset(ArchiveQuerySet)):
+    def delete(self, hard: bool = False, batch_size: int = None, sleep: float = 0, progress=None):
+        return self.get_queryset().delete(hard=hard, batch_size=batch_size, sleep=sleep, progress=progress)
+
+    def hard_delete(self, batch_size: int = None, sleep: float = 0, progress=None):
+        return self.delete(hard=True, batch_size=batch_size, sleep=sleep, progress=progress)
 
-    def restore(self):
-        return self.get_queryset().restore()
+    def restore(self, batch_size: int = None, sleep: float = 0, progress=None):
+        return self.get_queryset().restore(batch_size=batch_size, sleep=sleep, progress=progress)
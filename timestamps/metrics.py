@@ -0,0 +1,214 @@
+import functools
+import inspect
+import threading
+import time
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.core.signals import setting_changed
+from django.dispatch import receiver
+from django.http import HttpResponse
+from django.utils.module_loading import import_string
+
+
+class Registry:
+    """
+    Local registry of the soft delete metrics, exported in Prometheus text format.
+    Set settings.TIMESTAMPS__METRICS_REGISTRY to the dotted path of a subclass
+    to forward them somewhere else (e.g. prometheus_client or statsd).
+    """
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.operations = {}
+        self.signals = {}
+
+    def record_operation(self, operation: str, target: str, model: str, rows: int, seconds: float):
+        key = (operation, target, model)
+
+        with self.lock:
+            count, total_rows, total_seconds = self.operations.get(key, (0, 0, 0.0))
+            self.operations[key] = (count + 1, total_rows + rows, total_seconds + seconds)
+
+    def record_signal(self, signal: str, model: str, seconds: float):
+        key = (signal, model)
+
+        with self.lock:
+            count, total_seconds = self.signals.get(key, (0, 0.0))
+            self.signals[key] = (count + 1, total_seconds + seconds)
+
+    def reset(self):
+        with self.lock:
+            self.operations.clear()
+            self.signals.clear()
+
+    def export(self) -> str:
+        with self.lock:
+            operations = sorted(self.operations.items())
+            signals = sorted(self.signals.items())
+
+        lines = []
+
+        def metric(name, kind, description, samples):
+            lines.append('# HELP %s %s' % (name, description))
+            lines.append('# TYPE %s %s' % (name, kind))
+            lines.extend('%s{%s} %s' % (sample_name, _labels(labels), value) for sample_name, labels, value in samples)
+
+        metric('timestamps_operations_total', 'counter', 'Soft delete, restore and hard delete operations.', [
+            ('timestamps_operations_total', {'operation': o, 'target': t, 'model': m}, count)
+            for (o, t, m), (count, _, _) in operations
+        ])
+        metric('timestamps_rows_total', 'counter', 'Rows soft deleted, restored or hard deleted.', [
+            ('timestamps_rows_total', {'operation': o, 'target': t, 'model': m}, rows)
+            for (o, t, m), (_, rows, _) in operations
+        ])
+        metric('timestamps_operation_seconds', 'summary', 'Duration of the operations.', [
+            sample
+            for (o, t, m), (count, _, seconds) in operations
+            for sample in (
+                ('timestamps_operation_seconds_sum', {'operation': o, 'target': t, 'model': m}, repr(seconds)),
+                ('timestamps_operation_seconds_count', {'operation': o, 'target': t, 'model': m}, count),
+            )
+        ])
+        metric('timestamps_signal_seconds', 'summary', 'Duration of the signal receivers.', [
+            sample
+            for (s, m), (count, seconds) in signals
+            for sample in (
+                ('timestamps_signal_seconds_sum', {'signal': s, 'model': m}, repr(seconds)),
+                ('timestamps_signal_seconds_count', {'signal': s, 'model': m}, count),
+            )
+        ])
+
+        return '\n'.join(lines) + '\n'
+
+
+def _labels(labels: dict) -> str:
+    return ','.join(
+        '%s="%s"' % (name, str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n'))
+        for name, value in labels.items()
+    )
+
+
+_NOT_LOADED = object()
+_registry = _NOT_LOADED
+
+# set while an operation is measured: operations calling other operations (e.g. adelete -> delete) count once
+_measuring = ContextVar('timestamps_metrics_measuring', default=False)
+
+
+def get_registry():
+    """
+    The registry of settings.TIMESTAMPS__METRICS_REGISTRY, or None when settings.TIMESTAMPS__METRICS is off.
+    """
+    global _registry
+
+    if _registry is _NOT_LOADED:
+        if getattr(settings, 'TIMESTAMPS__METRICS', False):
+            _registry = import_string(getattr(settings, 'TIMESTAMPS__METRICS_REGISTRY', 'timestamps.metrics.Registry'))()
+        else:
+            _registry = None
+
+    return _registry
+
+
+@receiver(setting_changed)
+def _reset_registry(setting, **kwargs):
+    global _registry
+
+    if setting in ('TIMESTAMPS__METRICS', 'TIMESTAMPS__METRICS_REGISTRY'):
+        _registry = _NOT_LOADED
+
+
+def _rows(result) -> int:
+    # bool (instances), int (soft delete, restore) or (total, per model) (hard delete, cascade)
+    if isinstance(result, tuple):
+        return result[0]
+
+    return int(result or 0)
+
+
+def instrument(operation: str, hard_operation: str = None, target: str = 'queryset'):
+    """
+    Records the count, rows and duration of a soft delete operation (sync or async), labelled by model.
+    When hard_operation is given, calls with hard=True are recorded under that name.
+    When the metrics are off, the only cost is one check of a global.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        def start(self, args, kwargs):
+            name = operation
+
+            if hard_operation and signature.bind(self, *args, **kwargs).arguments.get('hard'):
+                name = hard_operation
+
+            model = getattr(self, 'model', type(self))
+
+            return name, model._meta.label, _measuring.set(True), time.perf_counter()
+
+        def finish(registry, name, model, token, started, result):
+            seconds = time.perf_counter() - started
+            _measuring.reset(token)
+            registry.record_operation(name, target, model, _rows(result), seconds)
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def wrapper(self, *args, **kwargs):
+                registry = _registry if _registry is not _NOT_LOADED else get_registry()
+
+                if registry is None or _measuring.get():
+                    return await func(self, *args, **kwargs)
+
+                name, model, token, started = start(self, args, kwargs)
+
+                try:
+                    result = await func(self, *args, **kwargs)
+                except BaseException:
+                    _measuring.reset(token)
+                    raise
+
+                finish(registry, name, model, token, started, result)
+
+                return result
+        else:
+            @functools.wraps(func)
+            def wrapper(self, *args, **kwargs):
+                registry = _registry if _registry is not _NOT_LOADED else get_registry()
+
+                if registry is None or _measuring.get():
+                    return func(self, *args, **kwargs)
+
+                name, model, token, started = start(self, args, kwargs)
+
+                try:
+                    result = func(self, *args, **kwargs)
+                except BaseException:
+                    _measuring.reset(token)
+                    raise
+
+                finish(registry, name, model, token, started, result)
+
+                return result
+
+        return wrapper
+
+    return decorator
+
+
+def record_signal(signal: str, sender, started: float):
+    registry = _registry if _registry is not _NOT_LOADED else get_registry()
+
+    if registry is not None:
+        registry.record_signal(signal, sender._meta.label, time.perf_counter() - started)
+
+
+def prometheus(request):
+    """
+    View exporting the metrics in Prometheus text format. Route it in your urls (and protect it):
+    path('metrics/', timestamps.metrics.prometheus)
+    """
+    registry = get_registry()
+
+    return HttpResponse(
+        registry.export() if registry is not None else '',
+        content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
@@ -1,9 +1,48 @@
-from django.db import models, router
+from asgiref.sync import sync_to_async
+from django.db import models, router, transaction
+from django.db.models import options
+from django.db.models.signals import class_prepared
+from django.dispatch import receiver
 from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
-from .managers import SoftDeleteManager
+from .archive import archive_model, archive_rows, create_archive_model, restore_rows
+from .caching import contribute_cache
+from .counters import contribute_counters, rows_moved
+from .deletion import cascade_soft_delete, hard_deleted
+from .indexes import contribute_soft_delete_indexes, contribute_timestamp_indexes
+from .managers import DeletedManager, SoftDeleteManager, WithDeletedManager
+from .metrics import instrument
+from .querysets import primary_db
 from . import signals
 
+
+# Meta options understood by SoftDeletes models:
+# - soft_delete_indexes: fields (or tuples of fields) indexed only for live rows
+# - soft_delete_index_deleted: index deleted_at for deleted rows (objects_deleted)
+# - soft_delete_unique: tuples of fields unique among live rows
+# - soft_delete_cascade: soft delete related SoftDeletes rows (on_delete=CASCADE) by default
+# - soft_delete_retention: days (or timedelta) before purge_soft_deleted hard deletes a row
+# - soft_delete_archive: soft deleted rows are moved to a generated archive table
+# - soft_delete_counters: keep live/deleted row counters in the cache (objects.fast_count())
+# - soft_delete_cache: invalidate the objects cached by the DRF retrieve views (retrieve_cache = True)
+# - soft_delete_audit: record the soft deletes, restores and hard deletes in the audit log (timestamps.audit)
+# and by Timestampable models:
+# - timestamp_indexes: index created_at and updated_at (True, or a list of them) for the time range queries
+options.DEFAULT_NAMES = (
+    *options.DEFAULT_NAMES,
+    'soft_delete_indexes',
+    'soft_delete_index_deleted',
+    'soft_delete_unique',
+    'soft_delete_cascade',
+    'soft_delete_retention',
+    'soft_delete_archive',
+    'soft_delete_counters',
+    'soft_delete_cache',
+    'soft_delete_audit',
+    'timestamp_indexes',
+)
+
+
 class Timestampable(models.Model):
     created_at = models.DateTimeField(auto_now_add=True, verbose_name=_("created_at"))
     updated_at = models.DateTimeField(auto_now=True, verbose_name=_("updated_at"))
@@ -16,48 +55,186 @@ class SoftDeletes(models.Model):
     deleted_at = models.DateTimeField(null=True, blank=True, verbose_name=_("deleted_at"))
 
     objects = SoftDeleteManager()
-    objects_deleted = SoftDeleteManager(only_deleted=True)
-    objects_with_deleted = SoftDeleteManager(with_deleted=True)
+    objects_deleted = DeletedManager()
+    objects_with_deleted = WithDeletedManager()
 
     class Meta:
         abstract = True
 
-    def delete(self, using=None, keep_parents: bool = False, hard: bool = False) -> None:
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super(SoftDeletes, cls).from_db(db, field_names, values)
+        instance._state.db = primary_db(cls, db)
+        return instance
+
+    @instrument('soft_delete', 'hard_delete', target='instance')
+    def delete(self, using=None, keep_parents: bool = False, hard: bool = False, cascade: bool = None) -> bool:
         if hard:
-            return super().delete(using, keep_parents)
+            using = using or router.db_for_write(self.__class__, instance=self)
+            pk, deleted = self.pk, self.deleted_at is not None
+
+            result = super().delete(using, keep_parents)
+            hard_deleted(self.__class__, using, result[1], live=int(not deleted), deleted=int(deleted), pk=pk)
+
+            return result
 
-        using = using or router.db_for_write(self.__class__, instance=self)
+        using = self._soft_delete_db(using, 'deleted')
 
-        signals.pre_soft_delete.send(
-            sender=self.__class__,
-            instance=self,
-            using=using
-        )
+        signals.pre_soft_delete.send(sender=self.__class__, instance=self, using=using)
 
-        self.deleted_at = timezone.now()
-        self.save()
+        # the row was already deleted (e.g. by a concurrent request)
+        if not self._soft_delete(using, cascade):
+            return False
 
-        signals.post_soft_delete.send(
-            sender=self.__class__,
-            instance=self,
-            using=using
-        )
+        signals.post_soft_delete.send(sender=self.__class__, instance=self, using=using)
 
-    def soft_delete(self) -> None:
-        self.delete(hard=False)
+        return True
+
+    def soft_delete(self, cascade: bool = None, using=None) -> bool:
+        return self.delete(using, hard=False, cascade=cascade)
 
     def hard_delete(self, using=None, keep_parents: bool = False):
         return self.delete(using, keep_parents, hard=True)
 
-    def restore(self) -> None:
-        signals.pre_restore.send(sender=self.__class__, instance=self)
+    @instrument('restore', target='instance')
+    def restore(self, using=None) -> bool:
+        using = self._soft_delete_db(using, 'restored')
+
+        signals.pre_restore.send(sender=self.__class__, instance=self, using=using)
+
+        # the row was already restored (e.g. by a concurrent request)
+        if not self._update_deleted_at(None, using):
+            return False
+
+        signals.post_restore.send(sender=self.__class__, instance=self, using=using)
+
+        return True
+
+    # async API: the queries run in one thread hop, and the signals are sent with signals.asend()
+    @instrument('soft_delete', 'hard_delete', target='instance')
+    async def adelete(self, using=None, keep_parents: bool = False, hard: bool = False, cascade: bool = None):
+        if hard:
+            return await sync_to_async(self.delete)(using, keep_parents, hard=True)
+
+        using = self._soft_delete_db(using, 'deleted')
+
+        await signals.asend(signals.pre_soft_delete, sender=self.__class__, instance=self, using=using)
+
+        if not await sync_to_async(self._soft_delete)(using, cascade):
+            return False
+
+        await signals.asend(signals.post_soft_delete, sender=self.__class__, instance=self, using=using)
+
+        return True
+
+    async def asoft_delete(self, cascade: bool = None, using=None) -> bool:
+        return await self.adelete(using, hard=False, cascade=cascade)
+
+    async def ahard_delete(self, using=None, keep_parents: bool = False):
+        return await self.adelete(using, keep_parents, hard=True)
+
+    @instrument('restore', target='instance')
+    async def arestore(self, using=None) -> bool:
+        using = self._soft_delete_db(using, 'restored')
+
+        await signals.asend(signals.pre_restore, sender=self.__class__, instance=self, using=using)
+
+        if not await sync_to_async(self._update_deleted_at)(None, using):
+            return False
+
+        await signals.asend(signals.post_restore, sender=self.__class__, instance=self, using=using)
 
-        self.deleted_at = None
-        self.save()
+        return True
 
-        signals.post_restore.send(sender=self.__class__, instance=self)
+    def _soft_delete_db(self, using, action: str) -> str:
+        if self.pk is None:
+            raise ValueError(
+                "%s object can't be %s because its %s attribute is set to None."
+                % (self._meta.object_name, action, self._meta.pk.attname)
+            )
+
+        return using or router.db_for_write(self.__class__, instance=self)
+
+    def _soft_delete(self, using: str, cascade: bool = None) -> bool:
+        if cascade is None:
+            cascade = getattr(self._meta, 'soft_delete_cascade', False)
+
+        with transaction.atomic(using=using):
+            deleted = self._update_deleted_at(timezone.now(), using, cascade)
+
+            if deleted and cascade:
+                cascade_soft_delete(self.__class__, self.deleted_at, using, pks=[self.pk])
+
+        return deleted
+
+    def _update_deleted_at(self, deleted_at, using, cascade: bool = False) -> bool:
+        """
+        Sets deleted_at (and updated_at, for Timestampable models) with a single conditional UPDATE,
+        instead of saving every column: UPDATE ... WHERE pk = ... AND deleted_at IS [NOT] NULL.
+        Returns whether the row was changed. If it wasn't, the instance is left untouched.
+        """
+        values = {'deleted_at': deleted_at}
+
+        if isinstance(self, Timestampable):
+            values['updated_at'] = deleted_at or timezone.now()
+
+        model = self.__class__
+        archive = archive_model(model)
+
+        if archive is None:
+            updated = model._base_manager.using(using).filter(
+                pk=self.pk,
+                deleted_at__isnull=deleted_at is not None,
+            ).update(**values)
+        elif deleted_at is not None:
+            updated = archive_rows(
+                model._base_manager.filter(pk=self.pk, deleted_at__isnull=True), using, cascade=cascade, **values
+            )
+        else:
+            updated = restore_rows(archive._base_manager.filter(pk=self.pk), using, **values)
+
+        if not updated:
+            return False
+
+        rows_moved(model, using, 1, deleted=deleted_at is not None)
+
+        for field, value in values.items():
+            setattr(self, field, value)
+
+        self._state.db = using
+
+        return True
 
 
 class Model(Timestampable, SoftDeletes, models.Model):
     class Meta:
         abstract = True
+
+
+@receiver(class_prepared)
+def __contribute_soft_delete_options(sender, **kwargs):
+    opts = sender._meta
+
+    if opts.abstract or opts.proxy:
+        return
+
+    if issubclass(sender, Timestampable):
+        contribute_timestamp_indexes(sender)
+
+    if not issubclass(sender, SoftDeletes):
+        return
+
+    # multi-table inheritance: deleted_at lives in the parent table
+    if opts.get_field('deleted_at') not in opts.local_fields:
+        return
+
+    contribute_soft_delete_indexes(sender)
+
+    if getattr(opts, 'soft_delete_archive', False):
+        create_archive_model(sender)
+
+    if getattr(opts, 'soft_delete_counters', False):
+        contribute_counters(sender)
+
+    if getattr(opts, 'soft_delete_cache', False):
+        contribute_cache(sender)
@@ -1,21 +1,626 @@
-from django.db.models import QuerySet
+import asyncio
+import inspect
+import time
+from collections import Counter
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist
+from django.db import NotSupportedError, router, transaction
+from django.db.models import Q, QuerySet
 from django.utils import timezone
+from .cursors import decode_cursor, encode_cursor
+from .deletion import cascade_soft_delete, hard_deleted
+from . import caching, counters, signals
+from .metrics import instrument
 
 
-class SoftDeleteQuerySet(QuerySet):
+class TimestampableQuerySet(QuerySet):
+    """
+    Time ranges are half-open: start <= value < end, so consecutive ranges never overlap.
+    Declare Meta.timestamp_indexes = True to index the filtered columns.
+    """
+    def created_between(self, start, end):
+        return self.filter(created_at__gte=start, created_at__lt=end)
+
+    def created_since(self, timestamp):
+        return self.filter(created_at__gte=timestamp)
+
+    def updated_between(self, start, end):
+        return self.filter(updated_at__gte=start, updated_at__lt=end)
+
+    def updated_since(self, timestamp):
+        return self.filter(updated_at__gte=timestamp)
+
+    def update(self, **kwargs):
+        return super(TimestampableQuerySet, self).update(**self._with_updated_at(kwargs))
+
+    update.alters_data = True
+
+    def touch(self) -> int:
+        """Sets updated_at of the rows to now, without changing anything else."""
+        return self.update(updated_at=timezone.now())
+
+    touch.alters_data = True
+
+    def _with_updated_at(self, values: dict) -> dict:
+        # what auto_now does on save(), for bulk writes (update(), bulk_update(), soft deletes and restores),
+        # unless updated_at is set explicitly. The clock of save() (timezone.now(), not the database's NOW()),
+        # so timestamps never go backwards between saves and bulk writes: soft deletes use deleted_at.
+        if 'updated_at' in values:
+            return values
+
+        try:
+            field = self.model._meta.get_field('updated_at')
+        except FieldDoesNotExist:
+            return values
+
+        if not getattr(field, 'auto_now', False):
+            return values
+
+        return {**values, 'updated_at': values.get('deleted_at') or timezone.now()}
+
+
+class SoftDeleteQuerySet(TimestampableQuerySet):
+    def __init__(self, *args, **kwargs):
+        super(SoftDeleteQuerySet, self).__init__(*args, **kwargs)
+        self._read_db = None
+
+    @property
+    def db(self):
+        # reads go to the replica of from_replica(), writes (update, delete, select_for_update...) don't
+        if self._read_db is not None and self._db is None and not self._for_write:
+            return self._read_db
+
+        return super(SoftDeleteQuerySet, self).db
+
+    def from_replica(self):
+        """
+        Reads the rows from settings.TIMESTAMPS__REPLICA_DATABASE (if it's set), instead of the database of the router.
+        Writes of the queryset (and of the objects it reads) still go to the database of the router.
+        """
+        clone = self._chain()
+        clone._read_db = getattr(settings, 'TIMESTAMPS__REPLICA_DATABASE', None)
+        return clone
+
+    def _clone(self):
+        clone = super(SoftDeleteQuerySet, self)._clone()
+        clone._read_db = self._read_db
+        return clone
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = list(objs)
+        created = super(SoftDeleteQuerySet, self).bulk_create(objs, *args, **kwargs)
+        using = self._write_db()
+
+        # conflicts skip (or update) some rows: how many were inserted isn't known
+        if kwargs.get('ignore_conflicts') or kwargs.get('update_conflicts'):
+            counters.reset(self.model, using)
+        else:
+            deleted = sum(1 for obj in objs if obj.deleted_at is not None)
+            counters.add(self.model, using, live=len(objs) - deleted, deleted=deleted)
+
+        return created
+
+    bulk_create.alters_data = True
+
     def only_deleted(self):
         return self.filter(deleted_at__isnull=False)
 
     def without_deleted(self):
         return self.filter(deleted_at__isnull=True)
 
+    def deleted_between(self, start, end):
+        return self.filter(deleted_at__gte=start, deleted_at__lt=end)
+
+    def deleted_since(self, timestamp):
+        return self.filter(deleted_at__gte=timestamp)
+
+    def changed_since(self, timestamp=None, cursor: str = None):
+        """
+        Rows created, updated or deleted after the timestamp (or after the cursor), ordered by (updated_at, pk):
+        soft deletes and restores set updated_at, so a keyset scan of the (updated_at, pk) index
+        of Meta.timestamp_indexes finds them too.
+        Deleted rows are included (call it from objects_with_deleted), so they can be sent as tombstones.
+        Use changes_cursor() on the last row to get the cursor of the next call.
+        """
+        from .archive import archive_model
+
+        if archive_model(self.model) is not None:
+            raise NotSupportedError(
+                "%s: changed_since() isn't supported in archive mode." % self.model._meta.label
+            )
+
+        queryset = self.order_by('updated_at', 'pk')
+
+        if timestamp is not None:
+            queryset = queryset.filter(updated_at__gt=timestamp)
+
+        if cursor is not None:
+            opts = self.model._meta
+            updated_at, pk = decode_cursor(cursor, [opts.get_field('updated_at'), opts.pk])
+            queryset = queryset.filter(Q(updated_at__gt=updated_at) | Q(updated_at=updated_at, pk__gt=pk))
+
+        return queryset
+
+    @staticmethod
+    def changes_cursor(row) -> str:
+        return encode_cursor(row.updated_at, row.pk)
+
+    def update(self, **kwargs):
+        count = super(SoftDeleteQuerySet, self).update(**kwargs)
+
+        if count:
+            caching.invalidate_model(self.model, self._write_db())
+
+        return count
+
+    update.alters_data = True
+
     #  bulk deleting
-    def delete(self, hard: bool = False):
+    @instrument('soft_delete', 'hard_delete')
+    def delete(self, hard: bool = False, cascade: bool = None, batch_size: int = None, sleep: float = 0, progress=None):
         if hard:
-            return super(SoftDeleteQuerySet, self).delete()
+            if batch_size:
+                return self._hard_delete_in_batches(batch_size, sleep, progress)
+
+            return self._hard_delete_rows(self._write_db())
+
+        if cascade is None:
+            cascade = getattr(self.model._meta, 'soft_delete_cascade', False)
+
+        deleted_at = timezone.now()
+        queryset = self.without_deleted()
+
+        if batch_size:
+            return queryset._soft_delete_in_batches(deleted_at, cascade, batch_size, sleep, progress)
+
+        if not cascade:
+            return queryset._update_sending_signals(
+                signals.pre_bulk_soft_delete,
+                signals.post_bulk_soft_delete,
+                deleted_at=deleted_at
+            )
+
+        using = self._write_db()
+
+        # like a hard delete, returns the total and the rows deleted per model
+        with transaction.atomic(using=using):
+            count = queryset._update_sending_signals(
+                signals.pre_bulk_soft_delete,
+                signals.post_bulk_soft_delete,
+                cascade=True,
+                deleted_at=deleted_at
+            )
+            deleted = cascade_soft_delete(self.model, deleted_at, using)
 
-        return super(SoftDeleteQuerySet, self).update(deleted_at=timezone.now())
+        deleted[self.model._meta.label] += count
+
+        return sum(deleted.values()), dict(deleted)
 
     #  bulk restore
-    def restore(self):
-        return super(SoftDeleteQuerySet, self).update(deleted_at=None)
+    @instrument('restore')
+    def restore(self, batch_size: int = None, sleep: float = 0, progress=None):
+        queryset = self.only_deleted()
+
+        if not batch_size:
+            return queryset._update_sending_signals(
+                signals.pre_bulk_restore,
+                signals.post_bulk_restore,
+                deleted_at=None
+            )
+
+        count = 0
+
+        for using, pks in queryset._keyset_batches(batch_size, sleep):
+            restored = queryset._restore_batch(using, pks)
+            count += restored
+
+            if progress:
+                progress(restored, count)
+
+        return count
+
+    #  async API: each operation (or batch) runs in one thread hop, and batches sleep without holding a thread
+    @instrument('soft_delete', 'hard_delete')
+    async def adelete(self, hard: bool = False, cascade: bool = None, batch_size: int = None, sleep: float = 0,
+                      progress=None):
+        if not batch_size:
+            return await sync_to_async(self.delete)(hard=hard, cascade=cascade)
+
+        deleted = Counter()
+
+        if hard:
+            async for using, pks in self._akeyset_batches(batch_size, sleep):
+                count, per_model = await sync_to_async(self._hard_delete_batch)(using, pks)
+                deleted.update(per_model)
+
+                await _call(progress, count, sum(deleted.values()))
+
+            return sum(deleted.values()), dict(deleted)
+
+        if cascade is None:
+            cascade = getattr(self.model._meta, 'soft_delete_cascade', False)
+
+        deleted_at = timezone.now()
+        queryset = self.without_deleted()
+        label = self.model._meta.label
+
+        async for using, pks in queryset._akeyset_batches(batch_size, sleep):
+            batch = await sync_to_async(queryset._soft_delete_batch)(using, pks, deleted_at, cascade)
+            deleted.update(batch)
+
+            await _call(progress, batch[label], deleted[label])
+
+        if not cascade:
+            return deleted[label]
+
+        return sum(deleted.values()), dict(deleted)
+
+    async def asoft_delete(self, cascade: bool = None, batch_size: int = None, sleep: float = 0, progress=None):
+        return await self.adelete(hard=False, cascade=cascade, batch_size=batch_size, sleep=sleep, progress=progress)
+
+    async def ahard_delete(self, batch_size: int = None, sleep: float = 0, progress=None):
+        return await self.adelete(hard=True, batch_size=batch_size, sleep=sleep, progress=progress)
+
+    @instrument('restore')
+    async def arestore(self, batch_size: int = None, sleep: float = 0, progress=None):
+        if not batch_size:
+            return await sync_to_async(self.restore)()
+
+        queryset = self.only_deleted()
+        count = 0
+
+        async for using, pks in queryset._akeyset_batches(batch_size, sleep):
+            restored = await sync_to_async(queryset._restore_batch)(using, pks)
+            count += restored
+
+            await _call(progress, restored, count)
+
+        return count
+
+    def _write_db(self) -> str:
+        return self._db or router.db_for_write(self.model, **self._hints)
+
+    def _signal_sender(self):
+        return self.model
+
+    def _update_rows(self, queryset, using: str, cascade: bool = False, **values) -> int:
+        count = self._write_rows(queryset, using, cascade, **self._with_updated_at(values))
+
+        if count and 'deleted_at' in values:
+            counters.rows_moved(self._signal_sender(), using, count, deleted=values['deleted_at'] is not None)
+
+        if count:
+            caching.invalidate_model(self._signal_sender(), using)
+
+        return count
+
+    def _write_rows(self, queryset, using: str, cascade: bool = False, **values) -> int:
+        from .archive import archive_model, archive_rows
+
+        # archive mode: soft deleted rows are moved to the archive table (cascade: their children follow them)
+        if values.get('deleted_at') is not None and archive_model(self.model) is not None:
+            return archive_rows(queryset, using, cascade=cascade, **values)
+
+        return super(SoftDeleteQuerySet, queryset).update(**values)
+
+    def _update_sending_signals(self, pre_signal, post_signal, cascade: bool = False, **values) -> int:
+        """
+        Updates the rows, sending the bulk signals with their primary keys in chunks
+        (one dispatch per chunk and signal).
+        Without receivers, it's just an UPDATE: primary keys are not even queried.
+        """
+        sender = self._signal_sender()
+
+        if not (pre_signal.has_listeners(sender) or post_signal.has_listeners(sender)):
+            return self._update_rows(self, self._write_db(), cascade, **values)
+
+        using = self._write_db()
+
+        with transaction.atomic(using=using):
+            pks = list(self.using(using).values_list('pk', flat=True))
+            return self._update_pks(pks, pre_signal, post_signal, using, cascade, **values)
+
+    def _update_pks(self, pks: list, pre_signal, post_signal, using: str, cascade: bool = False, **values) -> int:
+        model = self._signal_sender()
+        send = pre_signal.has_listeners(model) or post_signal.has_listeners(model)
+        chunk_size = getattr(settings, 'TIMESTAMPS__BULK_SIGNALS_CHUNK_SIZE', 1000)
+
+        count = 0
+
+        for i in range(0, len(pks), chunk_size):
+            chunk = pks[i:i + chunk_size]
+
+            if send:
+                pre_signal.send(sender=model, pks=chunk, using=using)
+
+            # the filters of the queryset still apply: a row changed in the meantime is skipped
+            count += self._update_rows(self.using(using).filter(pk__in=chunk), using, cascade, **values)
+
+            if send:
+                post_signal.send(sender=model, pks=chunk, using=using)
+
+        return count
+
+    def _keyset_page(self, using: str, batch_size: int, last_pk=None) -> list:
+        queryset = self.using(using).order_by('pk').values_list('pk', flat=True)
+
+        if last_pk is not None:
+            queryset = queryset.filter(pk__gt=last_pk)
+
+        return list(queryset[:batch_size])
+
+    def _keyset_batches(self, batch_size: int, sleep: float = 0):
+        """
+        Yields (using, pks) pages of primary keys, paginated by keyset (WHERE pk > last ORDER BY pk),
+        which costs the same for the first and the last page. Sleeps between pages.
+        """
+        using = self._write_db()
+        last_pk = None
+
+        while True:
+            pks = self._keyset_page(using, batch_size, last_pk)
+
+            if pks:
+                yield using, pks
+
+            if len(pks) < batch_size:
+                return
+
+            last_pk = pks[-1]
+
+            if sleep:
+                time.sleep(sleep)
+
+    async def _akeyset_batches(self, batch_size: int, sleep: float = 0):
+        """
+        Same as _keyset_batches(), for async code: sleeping doesn't hold a thread.
+        """
+        using = self._write_db()
+        last_pk = None
+
+        while True:
+            pks = await sync_to_async(self._keyset_page)(using, batch_size, last_pk)
+
+            if pks:
+                yield using, pks
+
+            if len(pks) < batch_size:
+                return
+
+            last_pk = pks[-1]
+
+            if sleep:
+                await asyncio.sleep(sleep)
+
+    def _soft_delete_batch(self, using: str, pks: list, deleted_at, cascade: bool) -> Counter:
+        deleted = Counter()
+
+        with transaction.atomic(using=using):
+            count = self._update_pks(
+                pks,
+                signals.pre_bulk_soft_delete,
+                signals.post_bulk_soft_delete,
+                using,
+                cascade,
+                deleted_at=deleted_at
+            )
+
+            if cascade and count:
+                deleted.update(cascade_soft_delete(self.model, deleted_at, using, pks=pks))
+
+        deleted[self.model._meta.label] += count
+
+        return deleted
+
+    def _restore_batch(self, using: str, pks: list) -> int:
+        with transaction.atomic(using=using):
+            return self._update_pks(
+                pks,
+                signals.pre_bulk_restore,
+                signals.post_bulk_restore,
+                using,
+                deleted_at=None
+            )
+
+    def _hard_delete_batch(self, using: str, pks: list):
+        with transaction.atomic(using=using):
+            return self.filter(pk__in=pks)._hard_delete_rows(using)
+
+    def _hard_delete_rows(self, using: str):
+        """
+        QuerySet.delete(), keeping the row counters and the retrieve cache up to date without post_delete receivers
+        (they'd keep django from fast deleting the rows): counted models pay one aggregate before the DELETE.
+        """
+        model = self._signal_sender()
+        queryset = self.using(using)
+        live, deleted = counters.count_before_delete(queryset) if counters.is_counted(model) else (0, 0)
+
+        count, per_model = super(SoftDeleteQuerySet, queryset).delete()
+        hard_deleted(model, using, per_model, live, deleted)
+
+        return count, per_model
+
+    def _soft_delete_in_batches(self, deleted_at, cascade: bool, batch_size: int, sleep: float, progress):
+        deleted = Counter()
+        label = self.model._meta.label
+
+        for using, pks in self._keyset_batches(batch_size, sleep):
+            batch = self._soft_delete_batch(using, pks, deleted_at, cascade)
+            deleted.update(batch)
+
+            if progress:
+                progress(batch[label], deleted[label])
+
+        if not cascade:
+            return deleted[label]
+
+        return sum(deleted.values()), dict(deleted)
+
+    def _hard_delete_in_batches(self, batch_size: int, sleep: float, progress):
+        deleted = Counter()
+
+        for using, pks in self._keyset_batches(batch_size, sleep):
+            count, per_model = self._hard_delete_batch(using, pks)
+            deleted.update(per_model)
+
+            if progress:
+                progress(count, sum(deleted.values()))
+
+        return sum(deleted.values()), dict(deleted)
+
+
+def primary_db(model, db: str) -> str:
+    """
+    Objects read from settings.TIMESTAMPS__REPLICA_DATABASE are attached to the database of the router instead:
+    saving, deleting or restoring them must not write to the replica.
+    """
+    if db is not None and db == getattr(settings, 'TIMESTAMPS__REPLICA_DATABASE', None):
+        return router.db_for_write(model)
+
+    return db
+
+
+async def _call(progress, *args):
+    # progress callbacks of the async API can be sync or async functions
+    if progress is None:
+        return
+
+    result = progress(*args)
+
+    if inspect.isawaitable(result):
+        await result
+
+
+class ArchiveQuerySet(SoftDeleteQuerySet):
+    """
+    Queryset of the archive table of a SoftDeletes model in archive mode (Meta.soft_delete_archive).
+    All its rows are soft deleted: restoring moves them back to the table of the model.
+    """
+    def _signal_sender(self):
+        return self.model.archived_model
+
+    def _write_rows(self, queryset, using: str, cascade: bool = False, **values) -> int:
+        from .archive import restore_rows
+
+        if values.get('deleted_at') is None:
+            return restore_rows(queryset, using, **values)
+
+        return super(ArchiveQuerySet, self)._write_rows(queryset, using, cascade, **values)
+
+
+class WithArchiveQuerySet(SoftDeleteQuerySet):
+    """
+    All the rows of a SoftDeletes model in archive mode: UNION ALL of its table and of its archive table.
+    filter(), exclude() and get() apply to both sides of the union (django doesn't filter a union),
+    and update(), delete() and restore() run on each side, in one transaction (django doesn't write a union).
+    """
+    def __init__(self, *args, **kwargs):
+        super(WithArchiveQuerySet, self).__init__(*args, **kwargs)
+        self._parts = None
+
+    @classmethod
+    def of(cls, model, archive, using=None, hints=None):
+        return cls._union(cls(model, using=using, hints=hints), ArchiveQuerySet(archive, using=using, hints=hints))
+
+    @staticmethod
+    def _union(live, archived):
+        queryset = live.union(archived, all=True)
+        queryset._parts = (live, archived)
+        return queryset
+
+    def _clone(self):
+        clone = super(WithArchiveQuerySet, self)._clone()
+        clone._parts = self._parts
+        return clone
+
+    def filter(self, *args, **kwargs):
+        return self._filter_parts('filter', args, kwargs)
+
+    def exclude(self, *args, **kwargs):
+        return self._filter_parts('exclude', args, kwargs)
+
+    def _filter_parts(self, method: str, args, kwargs):
+        if self._parts is None:
+            return getattr(super(WithArchiveQuerySet, self), method)(*args, **kwargs)
+
+        if self.query.low_mark or self.query.high_mark is not None:
+            raise TypeError('Cannot filter a query once a slice has been taken.')
+
+        live, archived = (getattr(part, method)(*args, **kwargs) for part in self._parts)
+        queryset = self._union(live, archived)
+        queryset.query.order_by = self.query.order_by
+        queryset._db, queryset._read_db = self._db, self._read_db
+
+        return queryset
+
+    def get(self, *args, **kwargs):
+        if self._parts is not None and (args or kwargs):
+            return self.filter(*args, **kwargs).get()
+
+        return super(WithArchiveQuerySet, self).get(*args, **kwargs)
+
+    def _write_parts(self, method: str) -> tuple:
+        if self.query.low_mark or self.query.high_mark is not None:
+            raise TypeError('Cannot %s a query once a slice has been taken.' % method)
+
+        using = self._write_db()
+        return using, tuple(part.using(using) for part in self._parts)
+
+    @staticmethod
+    def _merge(results: list):
+        # counts, or (total, rows per model) for cascades and hard deletes
+        if not any(isinstance(result, tuple) for result in results):
+            return sum(results)
+
+        per_model = Counter()
+
+        for result in results:
+            if isinstance(result, tuple):
+                per_model.update(result[1])
+
+        return sum(per_model.values()), dict(per_model)
+
+    def _on_parts(self, method: str, *args, **kwargs):
+        using, parts = self._write_parts(method)
+
+        with transaction.atomic(using=using):
+            return self._merge([getattr(part, method)(*args, **kwargs) for part in parts])
+
+    async def _aon_parts(self, method: str, *args, **kwargs):
+        # batches commit one by one: no transaction around both sides
+        _, parts = self._write_parts(method)
+        return self._merge([await getattr(part, method)(*args, **kwargs) for part in parts])
+
+    def update(self, **kwargs):
+        if self._parts is None:
+            return super(WithArchiveQuerySet, self).update(**kwargs)
+
+        return self._on_parts('update', **kwargs)
+
+    update.alters_data = True
+
+    def delete(self, *args, **kwargs):
+        if self._parts is None:
+            return super(WithArchiveQuerySet, self).delete(*args, **kwargs)
+
+        return self._on_parts('delete', *args, **kwargs)
+
+    def restore(self, *args, **kwargs):
+        if self._parts is None:
+            return super(WithArchiveQuerySet, self).restore(*args, **kwargs)
+
+        return self._on_parts('restore', *args, **kwargs)
+
+    async def adelete(self, *args, **kwargs):
+        if self._parts is None:
+            return await super(WithArchiveQuerySet, self).adelete(*args, **kwargs)
+
+        return await self._aon_parts('adelete', *args, **kwargs)
+
+    async def arestore(self, *args, **kwargs):
+        if self._parts is None:
+            return await super(WithArchiveQuerySet, self).arestore(*args, **kwargs)
+
+        return await self._aon_parts('arestore', *args, **kwargs)
+
@@ -1,8 +1,63 @@
+import time
+from asgiref.sync import sync_to_async
 from django.dispatch import Signal
+from . import metrics
 
 
-pre_soft_delete = Signal()
-post_soft_delete = Signal()
+class SoftDeleteSignal(Signal):
+    """
+    Signal timing its receivers when the metrics are on (settings.TIMESTAMPS__METRICS).
+    """
+    def __init__(self, name: str, *args, **kwargs):
+        super(SoftDeleteSignal, self).__init__(*args, **kwargs)
+        self.name = name
 
-pre_restore = Signal()
-post_restore = Signal()
+    def send(self, sender, **named):
+        if metrics.get_registry() is None:
+            return super(SoftDeleteSignal, self).send(sender, **named)
+
+        started = time.perf_counter()
+        responses = super(SoftDeleteSignal, self).send(sender, **named)
+
+        if responses:
+            metrics.record_signal(self.name, sender, started)
+
+        return responses
+
+    if hasattr(Signal, 'asend'):
+        async def asend(self, sender, **named):
+            if metrics.get_registry() is None:
+                return await super(SoftDeleteSignal, self).asend(sender, **named)
+
+            started = time.perf_counter()
+            responses = await super(SoftDeleteSignal, self).asend(sender, **named)
+
+            if responses:
+                metrics.record_signal(self.name, sender, started)
+
+            return responses
+
+
+pre_soft_delete = SoftDeleteSignal('pre_soft_delete')
+post_soft_delete = SoftDeleteSignal('post_soft_delete')
+
+pre_restore = SoftDeleteSignal('pre_restore')
+post_restore = SoftDeleteSignal('post_restore')
+
+# sent by querysets (bulk operations), with the primary keys of the affected rows in chunks
+pre_bulk_soft_delete = SoftDeleteSignal('pre_bulk_soft_delete')
+post_bulk_soft_delete = SoftDeleteSignal('post_bulk_soft_delete')
+
+pre_bulk_restore = SoftDeleteSignal('pre_bulk_restore')
+post_bulk_restore = SoftDeleteSignal('post_bulk_restore')
+
+
+async def asend(signal: Signal, sender, **named):
+    """
+    Sends a signal from async code: with Signal.asend() (Django >= 5.0) async receivers run in the event loop,
+    otherwise the receivers run in a thread.
+    """
+    if hasattr(signal, 'asend'):
+        return await signal.asend(sender, **named)
+
+    return await sync_to_async(signal.send)(sender, **named)